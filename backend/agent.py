@@ -21,13 +21,34 @@ import hashlib
 import redis
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Any
 from dataclasses import dataclass
 import logging
 from decimal import Decimal
+import io
+import itertools
 import json
-import pickle
+import tempfile
+import threading
+import time
 from dotenv import load_dotenv
+
+from services.local_cache import LocalCache
+from services.report_catalog import ReportCatalog
+from services.render_metrics import SectionTimer
+from services.report_partials import compare_years, merge_partials, partial_from_row
+from services.report_periods import (
+    MAX_COMPARISON_YEARS, MULTI_MONTH_PERIODS, YEAR_PERIODS, add_months, end_of_day,
+    fiscal_quarter, fiscal_year_bounds, fiscal_year_label, fiscal_year_of, previous_period
+)
+from services.report_exports import (
+    BATCH_ROWS, TABLES, TRANSACTION_COLUMNS, dataset_tables, export_key, write_export
+)
+from services.memory_cache import INVALIDATION_CHANNEL, InvalidationListener, LRUCache
+from services.circuit_breaker import CLOSED, CircuitOpenError, HALF_OPEN, get_breaker
+from services.pdf_delivery import MEMORY_SCHEME, MemoryReportStore
+from services.uploads import get_upload_service
+from services.artifact_store import ARTIFACT_SCHEME, artifact_key, parse_ref, store_from_env
 load_dotenv()
 
 # Database
@@ -36,13 +57,14 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
 
 # PDF Generation with Professional Fonts
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, mm
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-    Image, PageBreak, HRFlowable, KeepTogether
+    Image, PageBreak, HRFlowable, KeepTogether, Flowable
 )
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY, TA_RIGHT
 from reportlab.pdfbase import pdfmetrics
@@ -59,6 +81,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Streams are written as binary: ASCII85 text encoding makes PDFs ~25% larger and,
+# without reportlab's C accelerator, was the slowest step of a render.
+# REPORT_PDF_COMPRESS=false also leaves page streams uncompressed (for debugging).
+PDF_COMPRESS = os.getenv("REPORT_PDF_COMPRESS", "true").lower() == "true"
+rl_config.useA85 = 0
+
+# The cover logo decoded, downscaled and re-encoded once per process, keyed by
+# (path, size). Only the PNG bytes are shared: every render builds its own
+# flowables, since reportlab keeps layout and image state on them while drawing.
+_cover_logo_cache: Dict[tuple, Optional[bytes]] = {}
+_cover_logo_lock = threading.Lock()
+
+
+class SectionMark(Flowable):
+    """Zero-size flowable: when laid out, attributes the render time that follows to a section"""
+
+    def __init__(self, timer: SectionTimer, name: str):
+        super().__init__()
+        self.timer = timer
+        self.name = name
+
+    def wrap(self, available_width, available_height):
+        return 0, 0
+
+    def draw(self):
+        self.timer.enter(self.name)
+
+# Bump when the report layout or data changes: cached reports of another
+# version are regenerated
+REPORT_VERSION = "11.1.0"
+
 # ==================== DATA MODELS ====================
 @dataclass
 class ReportCache:
@@ -71,7 +124,7 @@ class ReportCache:
     generated_at: str
     file_path: str
     data_fingerprint: str
-    version: str = "11.0.0"
+    version: str = REPORT_VERSION
 
     def to_dict(self) -> dict:
         return {
@@ -97,12 +150,25 @@ class ReportCache:
             generated_at=data['generated_at'],
             file_path=data['file_path'],
             data_fingerprint=data['data_fingerprint'],
-            version=data.get('version', '11.0.0')
+            # Entries without a version predate versioning: never current
+            version=data.get('version', '')
         )
 
+@dataclass
+class ReportDataset:
+    """Everything a report needs, fetched together from one snapshot"""
+    summary: Dict[str, Any]
+    donors: List[Dict[str, Any]]
+    schools: List[Dict[str, Any]]
+    campaigns: List[Dict[str, Any]]
+    status_summary: Dict[str, Any]
+    monthly_data: Optional[List[Dict[str, Any]]] = None
+    # {"label": previous period, "summary": its summary} — None if unavailable
+    comparison: Optional[Dict[str, Any]] = None
+
 # ==================== ULTRA PROFESSIONAL DONATION REPORT AGENT ====================
 class FinalDonationReportAgent:
-    VERSION = "11.0.0"
+    VERSION = REPORT_VERSION
 
     def __init__(self, db_url: str = None, logo_path: str = None,
                  redis_host: str = None, redis_port: int = None,
@@ -117,33 +183,33 @@ class FinalDonationReportAgent:
         # Enable/disable Redis via env
         self.use_redis = os.getenv("USE_REDIS", "true").lower() == "true"
 
-        self.redis_client = None
-        if self.use_redis:
-            self.redis_client = self._get_redis_connection()
-
-        if self.redis_client:
-            logger.info("Redis cache enabled - Smart validation active")
-        else:
-            logger.warning("Redis cache disabled - No caching available")
-
         # S3 Storage (NOW ENABLED)
         self.use_s3 = os.getenv("USE_S3", "false").lower() == "true"
         self.s3_bucket = os.getenv("S3_BUCKET_NAME")
-        self.s3_client = None
-
-        if self.use_s3 and self.s3_bucket:
-            self.s3_client = self._get_s3_client()
-            if self.s3_client:
-                logger.info(f"S3 enabled: {self.s3_bucket}")
-                logger.info("Lifecycle: Files auto-delete after 7 days")
-
-        if not self.s3_client and self.use_s3:
-            logger.warning("S3 requested but unavailable — using local storage")
+        # Upload in the background and serve the local copy meanwhile
+        self.s3_background = os.getenv("S3_UPLOAD_BACKGROUND", "true").lower() == "true"
 
         # Database configuration
         self.db_url = db_url or self._build_db_url()
-        self.engine = self._create_engine()
-        self.SessionLocal = sessionmaker(bind=self.engine)
+
+        # Redis, S3, the DB engine and the style sheet are all created on
+        # first use (see the properties below) so constructing the agent
+        # never blocks on the network.
+        self._init_lock = threading.RLock()
+        self._redis_client = None
+        self._redis_checked = not self.use_redis
+        self._s3_client = None
+        self._s3_checked = not (self.use_s3 and self.s3_bucket)
+        self._engine = None
+        self._session_factory = None
+        self._styles = None
+        self._table_styles = None
+
+        # Shared per-process breakers: a degraded dependency fails fast and the
+        # report path drops to the local cache / local storage instead
+        self.redis_breaker = get_breaker("redis")
+        self.s3_breaker = get_breaker("s3")
+        self.db_breaker = get_breaker("db")
 
         # Company information
         self.company_name = "Vidyaanidhi Educational Trust"
@@ -164,14 +230,143 @@ class FinalDonationReportAgent:
         self.cache_dir   = Path("cache")
         self.reports_dir.mkdir(exist_ok=True)
         self.cache_dir.mkdir(exist_ok=True)
-        self.pickle_cache_file = self.cache_dir / "report_cache.pkl"
-
-        # Professional Styles
-        self.styles = getSampleStyleSheet()
-        self._setup_professional_styles()
+        # Keyed SQLite fallback for when Redis is down (shared by all workers)
+        self.local_cache = LocalCache(self.cache_dir / "report_cache.db")
+        # Index of every artifact produced on this node; listing and the
+        # scheduled sweeper query it instead of scanning reports/
+        self.catalog = ReportCatalog(self.cache_dir / "report_catalog.db")
+        # Month-level partial aggregates: only changed months are re-queried
+        self.incremental = os.getenv("REPORT_INCREMENTAL", "true").lower() == "true"
+        self.partial_ttl = int(os.getenv("REPORT_PARTIAL_TTL_DAYS", 35)) * 24 * 60 * 60
+        # Render output (see PDF_COMPRESS); logo downscaled to this many pixels
+        # (70 mm wide on the cover — 600 px is ~220 dpi)
+        self.pdf_compress = PDF_COMPRESS
+        self.logo_px = int(os.getenv("REPORT_LOGO_PX", 600))
+        try:
+            if self.catalog.is_empty():
+                self.catalog.adopt_directory(self.reports_dir, self._report_ttl)
+        except Exception as e:
+            logger.error(f"Report catalog import failed: {e}")
+
+        # REPORT_RENDER_MODE=memory renders into a buffer and keeps the PDF in
+        # memory (or S3); reports/ is then only an optional cache
+        # (REPORT_DISK_CACHE) for small ephemeral container disks.
+        self.render_mode = os.getenv("REPORT_RENDER_MODE", "disk").lower()
+        self.disk_cache = os.getenv("REPORT_DISK_CACHE", "true").lower() == "true"
+        self.memory_store = MemoryReportStore(
+            max_bytes=int(os.getenv("REPORT_MEMORY_MB", 64)) * 1024 * 1024
+        )
+        # Content-addressed store shared by all replicas (ARTIFACT_BACKEND);
+        # None keeps reports per node
+        self.artifact_store = store_from_env(self.cache_dir / "artifacts")
+        # In-process tier in front of Redis; kept coherent via pub/sub
+        self.memory_cache = LRUCache(
+            maxsize=int(os.getenv("MEMORY_CACHE_SIZE", 256)),
+            ttl_seconds=int(os.getenv("MEMORY_CACHE_TTL", 300))
+        )
+        self._invalidation = InvalidationListener(self.memory_cache)
 
         logger.info(f"UltraProfessionalReportAgent v{self.VERSION} initialized")
 
+    # ==================== LAZY RESOURCES ====================
+    @property
+    def redis_client(self):
+        """Redis connection, established on first use and re-probed when the breaker half-opens"""
+        if self._redis_client is None and self.use_redis and (
+                not self._redis_checked or self.redis_breaker.state == HALF_OPEN):
+            with self._init_lock:
+                if self._redis_client is None and self.redis_breaker.allow():
+                    self._redis_client = self._get_redis_connection()
+                    self._redis_checked = True
+                    if self._redis_client:
+                        self.redis_breaker.record_success()
+                        logger.info("Redis cache enabled - Smart validation active")
+                        self._invalidation.start(self._redis_client)
+                    else:
+                        self.redis_breaker.trip("connection failed")
+                        logger.warning("Redis cache disabled - using local cache until it recovers")
+        return self._redis_client
+
+    @redis_client.setter
+    def redis_client(self, client):
+        self._redis_client = client
+        self._redis_checked = True
+
+    @property
+    def s3_client(self):
+        """S3 client, probed on first use and re-probed when the breaker half-opens"""
+        if self._s3_client is None and self.use_s3 and self.s3_bucket and (
+                not self._s3_checked or self.s3_breaker.state == HALF_OPEN):
+            with self._init_lock:
+                if self._s3_client is None and self.s3_breaker.allow():
+                    self._s3_client = self._get_s3_client()
+                    self._s3_checked = True
+                    if self._s3_client:
+                        self.s3_breaker.record_success()
+                        logger.info(f"S3 enabled: {self.s3_bucket}")
+                        logger.info("Lifecycle: Files auto-delete after 7 days")
+                    else:
+                        self.s3_breaker.trip("head_bucket failed")
+                        logger.warning("S3 requested but unavailable — using local storage")
+        return self._s3_client
+
+    @s3_client.setter
+    def s3_client(self, client):
+        self._s3_client = client
+        self._s3_checked = True
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._init_lock:
+                if self._engine is None:
+                    self._engine = self._create_engine()
+        return self._engine
+
+    @property
+    def SessionLocal(self):
+        if self._session_factory is None:
+            with self._init_lock:
+                if self._session_factory is None:
+                    self._session_factory = sessionmaker(bind=self.engine)
+        return self._session_factory
+
+    @property
+    def styles(self):
+        """Report style sheet, built the first time a PDF is rendered"""
+        if self._styles is None:
+            with self._init_lock:
+                if self._styles is None:
+                    self._styles = getSampleStyleSheet()
+                    self._setup_professional_styles()
+        return self._styles
+
+    @property
+    def table_styles(self) -> Dict[str, TableStyle]:
+        """Table styles shared by every render (a TableStyle is only read by setStyle)"""
+        if self._table_styles is None:
+            with self._init_lock:
+                if self._table_styles is None:
+                    self._table_styles = self._setup_table_styles()
+        return self._table_styles
+
+    def dependency_status(self) -> Dict[str, str]:
+        """Report Redis / S3 state without triggering a connection attempt"""
+        def state(enabled, checked, client, breaker):
+            if not enabled:
+                return "disabled"
+            if not checked:
+                return "not connected yet"
+            if client and breaker.state != "closed":
+                return f"degraded (circuit {breaker.state}, local fallback)"
+            return "ok" if client else "unavailable (local fallback)"
+
+        return {
+            "redis": state(self.use_redis, self._redis_checked, self._redis_client, self.redis_breaker),
+            "s3": state(self.use_s3 and bool(self.s3_bucket), self._s3_checked, self._s3_client,
+                        self.s3_breaker),
+        }
+
     # ==================== DATABASE UTILITIES ====================
     def _build_db_url(self) -> str:
         """Build database URL from env vars, or fall back to DATABASE_URL"""
@@ -195,7 +390,9 @@ class FinalDonationReportAgent:
             pool_size=10,
             max_overflow=20,
             pool_pre_ping=True,
-            echo=False
+            echo=False,
+            # Fail fast on an unreachable DB instead of the OS-level TCP timeout
+            connect_args={"connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 5))}
         )
 
     # ==================== REDIS CACHING ====================
@@ -205,140 +402,135 @@ class FinalDonationReportAgent:
         base_string = f"{period_type}_{year}_{start_date}_{end_date}_{self.VERSION}"
         return hashlib.md5(base_string.encode()).hexdigest()[:16]
 
-    def _generate_data_fingerprint(self, start_date: str, end_date: str) -> str:
+    # Per-month fingerprint: anything that can change a month's report sections
+    SEGMENT_FINGERPRINT_SQL = """
+        LEFT(MD5(
+            COUNT(*) || '|' || COUNT(DISTINCT payment_id) || '|' ||
+            COALESCE(SUM(CASE WHEN payment_status = 'Success' THEN amount ELSE 0 END), 0) || '|' ||
+            COUNT(CASE WHEN payment_status = 'Success' THEN 1 END) || '|' ||
+            COALESCE(MAX(payment_date)::text, '') || '|' ||
+            COALESCE(MAX(created_at)::text, '') || '|' ||
+            -- content checksum: catches edits to names / schools / campaigns too
+            COALESCE(SUM(hashtext(concat_ws('|', payment_id, payment_status, amount, donor_name,
+                                            donor_email, school_name, school_location,
+                                            campaign_name))), 0)
+        ), 16)
+    """
+
+    def _segment_fingerprints(self, start_date: str, end_date: str) -> Optional[Dict[str, str]]:
+        """Month segment fingerprints of one period (see _period_fingerprints)"""
+        periods = self._period_fingerprints((start_date, end_date))
+        return None if periods is None else periods[0]
+
+    def _period_fingerprints(self, *periods: Tuple[str, str]) -> Optional[List[Dict[str, str]]]:
         """
-        Generate comprehensive data fingerprint to detect ANY changes.
+        Fingerprint every calendar month of each (disjoint) period in ONE
+        grouped scan: one {'YYYY-MM-01': fingerprint} per period. Months
+        without donations are absent.
 
-        IMPORTANT: Always scans up to NOW (not end_date) so that records
-        added today for any date within the period are caught immediately.
+        Each fingerprint covers:
+        1. COUNT(*) / COUNT(DISTINCT payment_id) — inserts and deletes
+        2. Success SUM(amount) / COUNT          — edits, pending→success
+        3. MAX(payment_date), MAX(created_at)   — late inserts
+        4. A checksum of the row contents       — any other edit
 
-        Checks:
-        1. COUNT(*)          — number of records in period
-        2. SUM(amount)       — total amount (catches edits)
-        3. MAX(payment_date) — latest payment date
-        4. COUNT(Success)    — catches status changes (pending→success)
-        5. MAX(updated_at/created_at) — catches any row-level update
+        Returns None when the database is unreachable (or its breaker is open).
         """
+        if not self.db_breaker.allow():
+            logger.warning("Database circuit open — skipping fingerprint")
+            return None
+        conditions = [f"payment_date BETWEEN :start_{i} AND :end_{i}" for i in range(len(periods))]
+        params = {}
+        for i, (start_date, end_date) in enumerate(periods):
+            params[f"start_{i}"], params[f"end_{i}"] = start_date, end_date
+        started = time.monotonic()
         session = self.SessionLocal()
         try:
-            # Always scan to NOW so today's inserts are visible
-            scan_end = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            # Use IDENTICAL counting logic as the report queries
-            query = """
-                SELECT
-                    COUNT(DISTINCT payment_id)                                                          AS record_count,
-                    COALESCE(SUM(CASE WHEN payment_status = 'Success' THEN amount ELSE 0 END), 0)       AS total_amount,
-                    COALESCE(MAX(payment_date)::text, '')                                               AS max_payment_date,
-                    COUNT(CASE WHEN payment_status = 'Success' THEN 1 END)                              AS success_count,
-                    (SELECT COUNT(*) FROM (
-                        SELECT DISTINCT donor_name, donor_email
-                        FROM donations_raw d2
-                        WHERE d2.payment_date >= :start_date
-                          AND d2.payment_date <= :scan_end
-                    ) sub) AS unique_donors
+            rows = session.execute(text(f"""
+                SELECT CASE {" ".join(f"WHEN {c} THEN {i}" for i, c in enumerate(conditions))} END AS period,
+                       DATE_TRUNC('month', payment_date)::date::text AS month,
+                       {self.SEGMENT_FINGERPRINT_SQL} AS fingerprint
                 FROM donations_raw
-                WHERE payment_date >= :start_date
-                  AND payment_date <= :scan_end
-            """
-
-            result = session.execute(
-                text(query),
-                {"start_date": start_date, "scan_end": scan_end}
-            ).fetchone()
-
-            record_count     = result[0] or 0
-            total_amount     = result[1] or 0
-            max_payment_date = result[2] or ""
-            success_count    = result[3] or 0
-            unique_donors    = result[4] or 0
-
-            # Also check for a timestamp column to catch silent row updates
-            ts_col_query = """
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_name = 'donations_raw'
-                  AND column_name IN ('updated_at','created_at','inserted_at','modified_at')
-                ORDER BY CASE column_name
-                    WHEN 'updated_at'  THEN 1
-                    WHEN 'modified_at' THEN 2
-                    WHEN 'created_at'  THEN 3
-                    WHEN 'inserted_at' THEN 4
-                END
-                LIMIT 1
-            """
-            ts_result = session.execute(text(ts_col_query)).fetchone()
-            max_timestamp = ""
-
-            if ts_result:
-                ts_col = ts_result[0]
-                # Check the whole table for ANY recent modification
-                # (catches status updates on old records too)
-                max_timestamp = session.execute(
-                    text(f"""
-                        SELECT COALESCE(MAX({ts_col})::text, '')
-                        FROM donations_raw
-                        WHERE payment_date >= :start_date
-                    """),
-                    {"start_date": start_date}
-                ).scalar() or ""
-
-            raw_fingerprint = (
-                f"{record_count}|{total_amount}|"
-                f"{max_payment_date}|{success_count}|{unique_donors}|{max_timestamp}"
-            )
-
-            logger.info(
-                f"DB scan: records={record_count}, "
-                f"amount=Rs.{float(total_amount):,.2f}, "
-                f"success={success_count}, "
-                f"unique_donors={unique_donors}, "
-                f"latest_payment={max_payment_date[:10] if max_payment_date else 'N/A'}, "
-                f"last_modified={max_timestamp[:19] if max_timestamp else 'N/A'}, "
-                f"fingerprint={hashlib.md5(raw_fingerprint.encode()).hexdigest()[:16]}"
-            )
-
+                WHERE {" OR ".join(conditions)}
+                GROUP BY 1, 2
+                ORDER BY 1, 2
+            """), params).fetchall()
+            self.db_breaker.record_success(time.monotonic() - started)
         except Exception as e:
             session.rollback()
+            self.db_breaker.record_failure(e)
             logger.error(f"Fingerprint generation failed: {e}", exc_info=True)
-            raw_fingerprint = f"error|{datetime.now().timestamp()}"
+            return None
         finally:
             session.close()
 
-        return hashlib.md5(raw_fingerprint.encode()).hexdigest()[:16]
+        segments = [{} for _ in periods]
+        for period, month, fingerprint in rows:
+            segments[period][month] = fingerprint
+        logger.info(f"DB scan: {len(rows)} month segments, "
+                    f"fingerprint={self._combine_fingerprints(*segments)}")
+        return segments
+
+    @staticmethod
+    def _combine_fingerprints(*segment_sets: Optional[Dict[str, str]]) -> Optional[str]:
+        """One fingerprint for all segments of one or more periods (None if any is unknown)"""
+        if any(segments is None for segments in segment_sets):
+            return None
+        raw = "||".join(
+            "|".join(f"{month}:{fp}" for month, fp in sorted(segments.items()))
+            for segments in segment_sets
+        )
+        return hashlib.md5(raw.encode()).hexdigest()[:16]
+
+    def _generate_data_fingerprint(self, start_date: str, end_date: str) -> Optional[str]:
+        """Whole-period fingerprint: a hash of the month segment fingerprints (None if DB unreachable)"""
+        return self._combine_fingerprints(self._segment_fingerprints(start_date, end_date))
 
     def _get_cached_report(self, report_id: str, data_fingerprint: str,
                            period_type: str) -> Optional[str]:
         """
         Lookup cached report.
-        Tries Redis first; falls back to local pickle cache if Redis is unavailable.
+        Tries the in-process tier, then Redis; falls back to the local SQLite
+        cache if Redis is unavailable. In-process hits never touch the network.
 
         Validation:
         1. Version must match
-        2. Data fingerprint must match (detects ANY DB change)
+        2. Data fingerprint must match (detects ANY DB change) — skipped when
+           data_fingerprint is None (DB unreachable): a possibly stale report
+           beats no report
         3. PDF file must exist on disk OR S3
         4. Weekly/Monthly: expire after 7 days
         5. Yearly: keep for 30 days (past years never change)
         """
         cache_key = f"report:{report_id}"
 
-        # ── Try Redis first ──────────────────────────────────────────────────
+        # ── Try the in-process tier, then Redis ──────────────────────────────
+        # The memory tier is only trusted while Redis pub/sub keeps it
+        # coherent. Once the Redis breaker leaves CLOSED, invalidations may
+        # have been missed: the tier is dropped and bypassed until it closes.
         if self.redis_client:
+            trusted = self.redis_breaker.state == CLOSED
+            if not trusted:
+                self.memory_cache.clear()
             try:
-                cache_data = self.redis_client.hgetall(cache_key)
+                cache_data = self.memory_cache.get(cache_key) if trusted else None
+                if cache_data is None:
+                    cache_data = self.redis_breaker.call(self.redis_client.hgetall, cache_key)
+                    if cache_data and trusted:
+                        self.memory_cache.set(cache_key, cache_data)
             except Exception as e:
-                logger.warning(f"Redis read error: {e} — falling back to pickle")
+                logger.warning(f"Redis read error: {e} — falling back to local cache")
                 cache_data = {}
         else:
             cache_data = {}
 
-        # ── Fall back to pickle if Redis returned nothing ────────────────────
-        using_pickle = False
+        # ── Fall back to the local cache if Redis returned nothing ───────────
+        using_local = False
         if not cache_data:
-            cache_data = self._pickle_get(cache_key) or {}
+            cache_data = self.local_cache.get(cache_key) or {}
             if cache_data:
-                using_pickle = True
-                logger.info("Using local pickle cache (Redis unavailable)")
+                using_local = True
+                logger.info("Using local cache (Redis unavailable)")
 
         if not cache_data:
             logger.info("No cache found — will generate fresh report")
@@ -347,17 +539,19 @@ class FinalDonationReportAgent:
         # ── Validate version ─────────────────────────────────────────────────
         if cache_data.get("version") != self.VERSION:
             logger.info(f"Cache version mismatch, regenerating")
-            self._evict_cache(cache_key, using_pickle)
+            self._evict_cache(cache_key, using_local)
             return None
 
         # ── Validate data fingerprint (core: detects any DB change) ─────────
         stored_fp = cache_data.get("data_fingerprint", "")
-        if stored_fp != data_fingerprint:
+        if data_fingerprint is None:
+            logger.warning("Database unavailable — serving cached report without fingerprint check")
+        elif stored_fp != data_fingerprint:
             logger.info(
                 f"Data changed — cached fingerprint={stored_fp} "
                 f"current fingerprint={data_fingerprint} — regenerating"
             )
-            self._evict_cache(cache_key, using_pickle)
+            self._evict_cache(cache_key, using_local)
             return None
 
         # ── Validate file still exists (disk or S3) ──────────────────────────
@@ -369,10 +563,10 @@ class FinalDonationReportAgent:
             logger.info(f"Cache hit (S3) — returning URL")
             return file_path
         
-        # Check if local file exists
-        if not file_path or not Path(file_path).exists():
-            logger.info("Cached PDF missing from disk, regenerating")
-            self._evict_cache(cache_key, using_pickle)
+        # Check the PDF is still held in memory or on disk
+        if not file_path or not self._report_exists(file_path):
+            logger.info("Cached PDF missing from memory/disk, regenerating")
+            self._evict_cache(cache_key, using_local)
             return None
 
         # ── Age check for weekly/monthly (7-day max) ─────────────────────────
@@ -381,25 +575,34 @@ class FinalDonationReportAgent:
             age_days = (datetime.now() - generated_at).days
             if age_days >= 7:
                 logger.info(f"Cache expired ({age_days} days old), deleting")
-                self._evict_cache(cache_key, using_pickle, delete_file=True,
+                self._evict_cache(cache_key, using_local, delete_file=True,
                                   file_path=file_path)
                 return None
 
-        logger.info(f"Cache hit — returning {'pickle' if using_pickle else 'Redis'} "
+        logger.info(f"Cache hit — returning {'local' if using_local else 'Redis'} "
                     f"cached report: {file_path}")
         return file_path
 
-    def _evict_cache(self, cache_key: str, from_pickle: bool,
+    def _evict_cache(self, cache_key: str, from_local: bool,
                      delete_file: bool = False, file_path: str = ""):
-        """Remove a cache entry from Redis and/or pickle, optionally delete PDF."""
+        """Remove a cache entry from every tier, optionally delete PDF."""
+        self.memory_cache.delete(cache_key)
         if self.redis_client:
             try:
-                self.redis_client.delete(cache_key)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.delete(cache_key)
+                pipe.publish(INVALIDATION_CHANNEL, self._invalidation.message(cache_key))
+                self.redis_breaker.call(pipe.execute)
             except Exception:
                 pass
-        self._pickle_delete(cache_key)
+        self.local_cache.delete(cache_key)
 
         # Don't delete S3 files (lifecycle handles it)
+        if delete_file and file_path:
+            self._remove_from_catalog(file_path)
+        if delete_file and file_path.startswith(MEMORY_SCHEME):
+            self.memory_store.delete(file_path)
+            file_path = str(self.reports_dir / MemoryReportStore.name_of(file_path))
         if delete_file and file_path and not file_path.startswith('http'):
             try:
                 Path(file_path).unlink()
@@ -411,7 +614,7 @@ class FinalDonationReportAgent:
                       start_date: str, end_date: str, file_path: str,
                       data_fingerprint: str):
         """
-        Save report metadata to Redis (primary) and local pickle (fallback).
+        Save report metadata to memory + Redis (primary) and the local cache (fallback).
         TTL rules:
         - Weekly/Monthly: 7 days
         - Yearly: 30 days
@@ -419,12 +622,8 @@ class FinalDonationReportAgent:
         """
         cache_key = f"report:{report_id}"
 
-        if period_type in ["weekly", "monthly"]:
-            ttl_seconds = 60 * 60 * 24 * 7
-            ttl_label   = "7 days"
-        else:
-            ttl_seconds = 60 * 60 * 24 * 30
-            ttl_label   = "30 days"
+        ttl_seconds = self._report_ttl(period_type)
+        ttl_label   = f"{ttl_seconds // 86400} days"
 
         mapping = {
             "report_id":        report_id,
@@ -438,67 +637,60 @@ class FinalDonationReportAgent:
             "version":          self.VERSION,
         }
 
-        # ── 1. Write to Redis ────────────────────────────────────────────────
+        # ── 1. Write to Redis — one pipelined round trip ─────────────────────
         redis_ok = False
         if self.redis_client:
             try:
-                self.redis_client.hset(cache_key, mapping=mapping)
-                self.redis_client.expire(cache_key, ttl_seconds)
-
-                # Verify
-                saved_fp = self.redis_client.hget(cache_key, "data_fingerprint")
-                if saved_fp == data_fingerprint:
-                    logger.info(f"Redis cache saved  TTL={ttl_label}  fingerprint={data_fingerprint}")
-                    redis_ok = True
-                else:
-                    logger.error("Redis save verification failed")
-
-                self.redis_client.lpush("reports:recent", report_id)
-                self.redis_client.ltrim("reports:recent", 0, 99)
+                pipe = self.redis_client.pipeline(transaction=True)
+                pipe.hset(cache_key, mapping=mapping)
+                pipe.expire(cache_key, ttl_seconds)
+                pipe.lpush("reports:recent", report_id)
+                pipe.ltrim("reports:recent", 0, 99)
+                # Other processes drop their in-memory copy of this key
+                pipe.publish(INVALIDATION_CHANNEL, self._invalidation.message(cache_key))
+                self.redis_breaker.call(pipe.execute)
+
+                self.memory_cache.set(cache_key, mapping, ttl_seconds)
+                logger.info(f"Redis cache saved  TTL={ttl_label}  fingerprint={data_fingerprint}")
+                redis_ok = True
 
             except Exception as e:
+                self.memory_cache.delete(cache_key)
                 logger.error(f"Redis cache write error: {e}", exc_info=True)
 
-        # ── 2. Always write to local pickle (works offline / Redis down) ─────
+        # ── 2. Always write to the local cache (works offline / Redis down) ──
         try:
-            self._pickle_set(cache_key, mapping.copy(), ttl_seconds)
-            logger.info(f"Pickle cache saved   TTL={ttl_label}")
+            self.local_cache.set(cache_key, mapping, ttl_seconds)
+            logger.info(f"Local cache saved    TTL={ttl_label}")
         except Exception as e:
-            logger.error(f"Pickle cache write error: {e}")
+            logger.error(f"Local cache write error: {e}")
 
         if not redis_ok and not self.redis_client:
-            logger.info("Redis unavailable — only pickle cache active")
+            logger.info("Redis unavailable — only local cache active")
 
-    def _cleanup_old_files(self):
-        """
-        Automatic cleanup of old report files.
-        
-        Rules:
-        - Weekly/Monthly reports older than 7 days: DELETE
-        - Yearly reports: KEEP (past years are permanent)
-        - S3 files are handled by lifecycle rules
-        """
+    @staticmethod
+    def _report_ttl(period_type: str) -> int:
+        """Lifetime of a report (cache entry and artifact): 7 days weekly/monthly, 30 days otherwise"""
+        if period_type in ["weekly", "monthly"]:
+            return 60 * 60 * 24 * 7
+        return 60 * 60 * 24 * 30
+
+    def _catalog_report(self, location: str, cache_entry: dict, size_bytes: int = 0):
         try:
-            cutoff_date = datetime.now() - timedelta(days=7)
-            deleted_count = 0
-            
-            for file in self.reports_dir.glob("*.pdf"):
-                filename = file.name
-                
-                # Check if weekly or monthly report
-                if 'weekly' in filename or 'monthly' in filename:
-                    file_mtime = datetime.fromtimestamp(file.stat().st_mtime)
-                    
-                    if file_mtime < cutoff_date:
-                        file.unlink()
-                        deleted_count += 1
-                        logger.info(f"Deleted old {filename}")
-            
-            if deleted_count > 0:
-                logger.info(f"Cleanup complete: {deleted_count} old reports deleted")
-                
+            self.catalog.record(
+                location, cache_entry["period_type"], year=cache_entry["year"],
+                report_id=cache_entry["report_id"],
+                data_fingerprint=cache_entry["data_fingerprint"],
+                size_bytes=size_bytes, ttl_seconds=self._report_ttl(cache_entry["period_type"])
+            )
+        except Exception as e:
+            logger.error(f"Report catalog write error: {e}")
+
+    def _remove_from_catalog(self, location: str):
+        try:
+            self.catalog.remove(location)
         except Exception as e:
-            logger.error(f"Cleanup error: {e}")
+            logger.error(f"Report catalog delete error: {e}")
 
     def _get_redis_connection(self) -> redis.Redis | None:
         """
@@ -508,6 +700,9 @@ class FinalDonationReportAgent:
         - Local Redis (redis://localhost:6379)
         - Host/port config
         """
+        # Short timeouts: a slow Redis must cost milliseconds, the breaker does the rest
+        connect_timeout = float(os.getenv("REDIS_CONNECT_TIMEOUT", 1.0))
+        socket_timeout = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
         try:
             redis_url = os.getenv("REDIS_URL", "").strip()
 
@@ -520,9 +715,9 @@ class FinalDonationReportAgent:
                 client = redis.from_url(
                     redis_url,
                     decode_responses=True,
-                    socket_connect_timeout=10,
-                    socket_timeout=10,
-                    retry_on_timeout=True,
+                    socket_connect_timeout=connect_timeout,
+                    socket_timeout=socket_timeout,
+                    retry_on_timeout=False,
                     health_check_interval=30,
                     ssl_cert_reqs=None if is_tls else None,
                 )
@@ -534,9 +729,9 @@ class FinalDonationReportAgent:
                     db=self.redis_db,
                     password=self.redis_password,
                     decode_responses=True,
-                    socket_connect_timeout=10,
-                    socket_timeout=10,
-                    retry_on_timeout=True,
+                    socket_connect_timeout=connect_timeout,
+                    socket_timeout=socket_timeout,
+                    retry_on_timeout=False,
                 )
 
             client.ping()
@@ -545,80 +740,31 @@ class FinalDonationReportAgent:
 
         except redis.ConnectionError as e:
             logger.error(f"Redis connection failed: {e}")
-            logger.info("Falling back to local pickle cache")
+            logger.info("Falling back to local cache")
             return None
         except redis.TimeoutError as e:
             logger.error(f"Redis timeout — check REDIS_URL or network: {e}")
-            logger.info("Falling back to local pickle cache")
+            logger.info("Falling back to local cache")
             return None
         except Exception as e:
             logger.error(f"Redis error: {e}")
-            logger.info("Falling back to local pickle cache")
+            logger.info("Falling back to local cache")
             return None
 
 
-    # ==================== PICKLE FALLBACK CACHE ====================
-    def _pickle_load(self) -> dict:
-        """Load local pickle cache"""
-        try:
-            if self.pickle_cache_file.exists():
-                with open(self.pickle_cache_file, 'rb') as f:
-                    return pickle.load(f)
-        except Exception:
-            pass
-        return {}
-
-    def _pickle_save(self, store: dict):
-        """Save local pickle cache"""
-        try:
-            with open(self.pickle_cache_file, 'wb') as f:
-                pickle.dump(store, f)
-        except Exception as e:
-            logger.error(f"Pickle save error: {e}")
-
-    def _pickle_get(self, cache_key: str) -> Optional[dict]:
-        """Get entry from pickle cache — returns None if expired"""
-        store = self._pickle_load()
-        entry = store.get(cache_key)
-        if entry is None:
-            return None
-        # Check expiry
-        expires_at_str = entry.get("_expires_at", "")
-        if expires_at_str:
-            try:
-                if datetime.now() > datetime.fromisoformat(expires_at_str):
-                    logger.info(f"🗑️  Pickle cache expired for key={cache_key}")
-                    self._pickle_delete(cache_key)
-                    return None
-            except Exception:
-                pass
-        return entry
-
-    def _pickle_set(self, cache_key: str, mapping: dict, ttl_seconds: int):
-        """Set entry in pickle cache with expiry timestamp"""
-        store = self._pickle_load()
-        mapping["_expires_at"] = (datetime.now() + timedelta(seconds=ttl_seconds)).isoformat()
-        store[cache_key] = mapping
-        self._pickle_save(store)
-
-    def _pickle_delete(self, cache_key: str):
-        """Delete entry from pickle cache"""
-        store = self._pickle_load()
-        if cache_key in store:
-            del store[cache_key]
-            self._pickle_save(store)
-            
     # ==================== S3 STORAGE ====================
     def _get_s3_client(self):
-        """Initialize S3 client using AWS default credential chain (IAM Role / env / config)"""
+        """
+        Shared upload service's client (AWS default credential chain), verified
+        with head_bucket. Called as the s3_client property's breaker probe, so
+        head_bucket runs directly: the property already holds the probe slot
+        and records the outcome.
+        """
         try:
-            import boto3
-
-            # IMPORTANT: Do NOT pass access keys explicitly
-            s3 = boto3.client(
-                "s3",
-                region_name=os.getenv("AWS_REGION", "ap-southeast-2")
-            )
+            service = get_upload_service()
+            if service is None:
+                return None
+            s3 = service.client
 
             # Test connection
             s3.head_bucket(Bucket=self.s3_bucket)
@@ -632,44 +778,55 @@ class FinalDonationReportAgent:
             logger.error(f"S3 connection failed: {e}")
             return None
 
-    def _upload_to_s3(self, local_path: str) -> Optional[str]:
-        """Upload generated PDF to S3 and return presigned URL"""
-        if not self.s3_client:
+    def _upload_to_s3(self, local_path: str, data: bytes = None) -> Optional[str]:
+        """Upload generated PDF (a file, or bytes named by local_path) to S3 and return presigned URL"""
+        service = get_upload_service()
+        if not self.s3_client or service is None:
             logger.warning("S3 client not initialized")
             return None
 
         try:
-            filename = Path(local_path).name
-            s3_key = f"reports/{filename}"
-
-            # Upload file
-            self.s3_client.upload_file(
-                local_path,
-                self.s3_bucket,
-                s3_key,
-                ExtraArgs={
-                    "ContentType": "application/pdf",
-                    "ServerSideEncryption": "AES256"
-                }
-            )
+            # Content-addressed key: identical PDFs are only stored once
+            if data is not None:
+                result = service.upload_bytes(data, "reports", suffix=".pdf",
+                                              content_type="application/pdf")
+            else:
+                result = service.upload_file(local_path, "reports", content_type="application/pdf")
 
             # Generate presigned URL (7 days)
-            s3_url = self.s3_client.generate_presigned_url(
-                "get_object",
-                Params={
-                    "Bucket": self.s3_bucket,
-                    "Key": s3_key
-                },
-                ExpiresIn=604800  # 7 days
-            )
-
-            logger.info(f"Uploaded to S3: {s3_key}")
+            s3_url = service.presigned_url(result.key, expires_in=604800,
+                                           filename=Path(local_path).name)
+            logger.info(f"{'Reused existing' if result.skipped else 'Uploaded to'} S3: {result.key}")
             return s3_url
 
+        except CircuitOpenError:
+            logger.warning("S3 circuit open — keeping report in local storage")
+            return None
         except Exception as e:
             logger.error(f"S3 upload failed: {e}")
             return None
-            
+
+    def _upload_in_background(self, local_path: str, data: Optional[bytes], cache_entry: dict):
+        """
+        Upload off the request path; once S3 has the PDF the cache entry is
+        re-pointed at the presigned URL. Until then the local copy is served.
+        """
+        service = get_upload_service()
+
+        def upload():
+            s3_url = self._upload_to_s3(local_path, data=data)
+            if s3_url is None:
+                raise RuntimeError("S3 upload failed")
+            return s3_url
+
+        def on_done(s3_url):
+            self._update_cache(file_path=s3_url, **cache_entry)
+            self._catalog_report(s3_url, cache_entry,
+                                 len(data) if data is not None else os.path.getsize(local_path))
+            logger.info(f"Cache re-pointed at S3 for report {cache_entry['report_id']}")
+
+        service.submit(upload, on_done=on_done)
+
     # ==================== UTILITY FUNCTIONS ====================
     def _safe_float(self, value: Any) -> float:
         if value is None:
@@ -849,6 +1006,74 @@ class FinalDonationReportAgent:
             leading=14
         ))
 
+        styles.add(ParagraphStyle(
+            name='PeriodBox',
+            parent=styles['Normal'],
+            fontSize=14,
+            textColor=self.white,
+            alignment=TA_CENTER,
+            fontName='Times-Bold',
+            leading=18,
+            leftIndent=20,
+            rightIndent=20
+        ))
+
+    def _setup_table_styles(self) -> Dict[str, TableStyle]:
+        def data_table(font_size, v_pad, h_pad, *commands):
+            """Navy header row, zebra rows, grid"""
+            return TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), self.primary_navy),
+                ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
+                ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), font_size),
+                *commands,
+                ('TOPPADDING', (0, 0), (-1, -1), v_pad),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), v_pad),
+                ('LEFTPADDING', (0, 0), (-1, -1), h_pad),
+                ('RIGHTPADDING', (0, 0), (-1, -1), h_pad),
+                ('FONTNAME', (0, 1), (-1, -1), 'Times-Roman'),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [self.white, self.light_silver]),
+                ('GRID', (0, 0), (-1, -1), 0.5, self.border_gray),
+                ('LINEBELOW', (0, 0), (-1, 0), 1.5, self.white),
+            ])
+
+        ranked_totals = data_table(9, 4, 5, ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+                                   ('ALIGN', (3, 0), (4, -1), 'RIGHT'))
+        return {
+            'period_box': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), self.primary_navy),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('TOPPADDING', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+                ('BOX', (0, 0), (-1, -1), 1, self.accent_gold),
+            ]),
+            'cover_info': TableStyle([
+                ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+                ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+                ('TOPPADDING', (0, 0), (-1, -1), 8),
+                ('LEFTPADDING', (0, 0), (0, -1), 10),
+                ('RIGHTPADDING', (0, 0), (0, -1), 15),
+                ('LEFTPADDING', (1, 0), (1, -1), 15),
+                ('RIGHTPADDING', (1, 0), (1, -1), 10),
+                ('BOX', (0, 0), (-1, -1), 1.5, self.accent_gold),
+                ('BACKGROUND', (0, 0), (-1, -1), self.light_silver),
+            ]),
+            'metrics': data_table(10, 5, 8, ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+                                  ('ALIGN', (1, 0), (1, -1), 'RIGHT')),
+            'donors': data_table(9, 4, 5, ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+                                 ('ALIGN', (2, 0), (4, -1), 'RIGHT')),
+            'schools': ranked_totals,
+            'campaigns': ranked_totals,
+            # label column, then figures
+            'figures': data_table(9, 4, 5, ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+                                  ('ALIGN', (0, 0), (0, -1), 'LEFT')),
+            'figures_compact': data_table(8, 3, 4, ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+                                          ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+                                          ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')),
+        }
+
     # ==================== DATABASE QUERIES ====================
     def execute_query(self, query: str, params: dict = None) -> List[Dict]:
         """Execute SQL query"""
@@ -873,21 +1098,32 @@ class FinalDonationReportAgent:
         """
         Calculate date range for the report period.
 
-        Weekly  : last complete Mon–Sun week
-        Monthly : last complete calendar month
-        Yearly  : Jan 1 – Dec 31 for past years
-                  Jan 1 – RIGHT NOW for current year (includes today's data)
+        Weekly       : last complete Mon–Sun week
+        Monthly      : last complete calendar month
+        Quarterly    : last complete fiscal quarter (Apr–Jun, Jul–Sep, Oct–Dec, Jan–Mar)
+        Yearly       : Jan 1 – Dec 31 for past years
+                       Jan 1 – RIGHT NOW for current year (includes today's data)
+        Fiscal yearly: Apr 1 – Mar 31, year = the April it starts in;
+                       Apr 1 – RIGHT NOW for the current fiscal year
+
+        Complete periods end at 23:59:59 of their last day, so a month is the
+        same segment whichever report it is part of.
         """
         current_date = datetime.now()
+        today = current_date.replace(hour=0, minute=0, second=0, microsecond=0)
 
         if period_type == 'weekly':
-            end_date = current_date - timedelta(days=current_date.weekday() + 1)
-            start_date = end_date - timedelta(days=6)
+            end_date = end_of_day(today - timedelta(days=today.weekday() + 1))
+            start_date = today - timedelta(days=today.weekday() + 7)
 
         elif period_type == 'monthly':
-            first_day_current = current_date.replace(day=1)
-            end_date   = first_day_current - timedelta(days=1)
-            start_date = end_date.replace(day=1)
+            start_date = add_months(today.replace(day=1), -1)
+            end_date   = end_of_day(today.replace(day=1) - timedelta(days=1))
+
+        elif period_type == 'quarterly':
+            quarter_start = today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1)
+            start_date = add_months(quarter_start, -3)
+            end_date   = end_of_day(quarter_start - timedelta(days=1))
 
         elif period_type == 'yearly':
             year = year or (current_date.year - 1)
@@ -899,6 +1135,14 @@ class FinalDonationReportAgent:
                 # Past year: full calendar year
                 end_date = datetime(year, 12, 31, 23, 59, 59)
 
+        elif period_type == 'fiscal_yearly':
+            year = year or (fiscal_year_of(current_date) - 1)
+            start_date = datetime(year, 4, 1)
+            if year == fiscal_year_of(current_date):
+                end_date = current_date
+            else:
+                end_date = datetime(year + 1, 3, 31, 23, 59, 59)
+
         else:
             raise ValueError(f"Invalid period_type: {period_type}")
 
@@ -1008,7 +1252,10 @@ class FinalDonationReportAgent:
         ORDER BY count DESC
         """
         results = self.execute_query(query, {'start_date': start_date, 'end_date': end_date})
+        return self._summarize_statuses(results)
 
+    def _summarize_statuses(self, results: List[Dict]) -> Dict:
+        """Fold per-status counts into success / failed totals"""
         summary = {
             'success_count': 0,
             'success_amount': 0,
@@ -1039,28 +1286,327 @@ class FinalDonationReportAgent:
             COALESCE(SUM(CASE WHEN payment_status = 'Success' THEN amount ELSE 0 END), 0) as total_amount,
             COUNT(DISTINCT (donor_name, donor_email)) as unique_donors
         FROM donations_raw
-        WHERE EXTRACT(YEAR FROM payment_date) = :year
+        WHERE payment_date >= :year_start AND payment_date < :next_year_start
             AND payment_status = 'Success'
         GROUP BY EXTRACT(MONTH FROM payment_date), TO_CHAR(payment_date, 'Month')
         ORDER BY month_number
         """
-        return self.execute_query(query, {'year': year})
+        # A plain range (not EXTRACT(YEAR ...) = :year) so an index on payment_date applies
+        return self.execute_query(query, {'year_start': datetime(year, 1, 1),
+                                          'next_year_start': datetime(year + 1, 1, 1)})
+
+    # One scan of the period, every report section aggregated from it
+    REPORT_DATASET_SQL = """
+    WITH base AS MATERIALIZED (
+        SELECT payment_id, donor_name, donor_email, school_name, school_location,
+               campaign_name, payment_status, amount, payment_date
+        FROM donations_raw
+        WHERE payment_date BETWEEN :start_date AND :end_date
+    ),
+    ok AS (
+        SELECT * FROM base WHERE payment_status = 'Success'
+    )
+    SELECT
+        (SELECT row_to_json(s) FROM (
+            SELECT
+                COUNT(DISTINCT payment_id) AS total_transactions,
+                (SELECT COUNT(*) FROM (SELECT DISTINCT donor_name, donor_email FROM base) u) AS unique_donors,
+                COALESCE(SUM(CASE WHEN payment_status = 'Success' THEN amount ELSE 0 END), 0) AS total_amount,
+                COALESCE(AVG(CASE WHEN payment_status = 'Success' THEN amount END), 0) AS avg_donation,
+                COALESCE(MIN(CASE WHEN payment_status = 'Success' THEN amount END), 0) AS min_donation,
+                COALESCE(MAX(CASE WHEN payment_status = 'Success' THEN amount END), 0) AS max_donation,
+                COUNT(CASE WHEN payment_status = 'Success' THEN 1 END) AS successful_transactions,
+                COUNT(CASE WHEN payment_status != 'Success' THEN 1 END) AS failed_transactions
+            FROM base
+        ) s) AS summary,
+
+        (SELECT COALESCE(json_agg(d), '[]'::json) FROM (
+            SELECT
+                COALESCE(donor_name, donor_email, 'Anonymous') AS donor_name,
+                COUNT(DISTINCT payment_id) AS number_of_donations,
+                COALESCE(SUM(amount), 0) AS total_donated,
+                COALESCE(AVG(amount), 0) AS average_donation,
+                CASE WHEN COUNT(DISTINCT payment_id) > 1 THEN 'Recurring' ELSE 'One-time' END AS donor_type
+            FROM ok
+            GROUP BY donor_name, donor_email
+            ORDER BY total_donated DESC
+            LIMIT :limit
+        ) d) AS donors,
+
+        (SELECT COALESCE(json_agg(sc), '[]'::json) FROM (
+            SELECT
+                COALESCE(school_name, 'Not Specified') AS school_name,
+                COALESCE(school_location, 'Unknown') AS school_location,
+                COUNT(DISTINCT payment_id) AS donation_count,
+                COALESCE(SUM(amount), 0) AS total_amount,
+                COUNT(DISTINCT (donor_name, donor_email)) AS unique_donors
+            FROM ok
+            WHERE school_name IS NOT NULL AND school_name != ''
+            GROUP BY school_name, school_location
+            ORDER BY total_amount DESC
+            LIMIT :limit
+        ) sc) AS schools,
+
+        (SELECT COALESCE(json_agg(c), '[]'::json) FROM (
+            SELECT
+                COALESCE(campaign_name, 'General Fund') AS campaign_name,
+                CASE
+                    WHEN COUNT(DISTINCT payment_id) > COUNT(DISTINCT (donor_name, donor_email))
+                    THEN 'Recurring'
+                    ELSE 'One-time'
+                END AS donation_type,
+                COUNT(DISTINCT payment_id) AS donation_count,
+                COALESCE(SUM(amount), 0) AS total_amount,
+                COUNT(DISTINCT (donor_name, donor_email)) AS unique_donors
+            FROM ok
+            WHERE campaign_name IS NOT NULL AND campaign_name != ''
+            GROUP BY campaign_name
+            ORDER BY total_amount DESC
+            LIMIT :limit
+        ) c) AS campaigns,
+
+        (SELECT COALESCE(json_agg(st), '[]'::json) FROM (
+            SELECT payment_status, COUNT(*) AS count, COALESCE(SUM(amount), 0) AS total_amount
+            FROM base
+            GROUP BY payment_status
+            ORDER BY count DESC
+        ) st) AS statuses,
+
+        (SELECT COALESCE(json_agg(m), '[]'::json) FROM (
+            SELECT
+                EXTRACT(MONTH FROM payment_date) AS month_number,
+                TO_CHAR(payment_date, 'Month') AS month_name,
+                COUNT(DISTINCT payment_id) AS transaction_count,
+                COALESCE(SUM(amount), 0) AS total_amount,
+                COUNT(DISTINCT (donor_name, donor_email)) AS unique_donors
+            FROM ok
+            WHERE :with_monthly
+            GROUP BY EXTRACT(MONTH FROM payment_date), TO_CHAR(payment_date, 'Month')
+            ORDER BY MIN(payment_date)
+        ) m) AS monthly
+    """
+
+    # Partial aggregates for the given months of a period, one row per month
+    # (see services/report_partials.py); same snapshot as its fingerprint
+    MONTH_PARTIALS_SQL = """
+    WITH base AS MATERIALIZED (
+        SELECT DATE_TRUNC('month', payment_date)::date::text AS month,
+               payment_id, donor_name, donor_email, school_name, school_location,
+               campaign_name, payment_status, amount, payment_date, created_at,
+               LEFT(MD5(json_build_array(donor_name, donor_email)::text), 16) AS donor_key
+        FROM donations_raw
+        WHERE payment_date BETWEEN :start_date AND :end_date
+          AND DATE_TRUNC('month', payment_date)::date::text = ANY(:months)
+    ),
+    ok AS (
+        SELECT * FROM base WHERE payment_status = 'Success'
+    ),
+    totals AS (
+        SELECT month,
+               {fingerprint} AS fingerprint,
+               TO_CHAR(MIN(payment_date), 'Month') AS month_name,
+               COUNT(DISTINCT payment_id) AS payments,
+               COALESCE(SUM(CASE WHEN payment_status = 'Success' THEN amount ELSE 0 END), 0) AS success_amount,
+               COUNT(CASE WHEN payment_status = 'Success' THEN 1 END) AS success_rows,
+               COUNT(CASE WHEN payment_status != 'Success' THEN 1 END) AS failed_rows,
+               MIN(CASE WHEN payment_status = 'Success' THEN amount END) AS min_success,
+               MAX(CASE WHEN payment_status = 'Success' THEN amount END) AS max_success,
+               ARRAY_AGG(DISTINCT donor_key) AS donor_keys
+        FROM base
+        GROUP BY month
+    ),
+    ok_totals AS (
+        SELECT month, COUNT(DISTINCT payment_id) AS ok_payments FROM ok GROUP BY month
+    ),
+    donors AS (
+        SELECT month, json_agg(json_build_array(donor_key, name, n_pay, n_rows, total)) AS donors
+        FROM (
+            SELECT month, donor_key, COALESCE(donor_name, donor_email, 'Anonymous') AS name,
+                   COUNT(DISTINCT payment_id) AS n_pay, COUNT(*) AS n_rows,
+                   COALESCE(SUM(amount), 0) AS total
+            FROM ok
+            GROUP BY month, donor_key, donor_name, donor_email
+        ) d
+        GROUP BY month
+    ),
+    schools AS (
+        SELECT month, json_agg(json_build_array(school_name, school_location, n_pay, total, donor_keys)) AS schools
+        FROM (
+            SELECT month, school_name, school_location,
+                   COUNT(DISTINCT payment_id) AS n_pay, COALESCE(SUM(amount), 0) AS total,
+                   ARRAY_AGG(DISTINCT donor_key) AS donor_keys
+            FROM ok
+            WHERE school_name IS NOT NULL AND school_name != ''
+            GROUP BY month, school_name, school_location
+        ) sc
+        GROUP BY month
+    ),
+    campaigns AS (
+        SELECT month, json_agg(json_build_array(campaign_name, n_pay, total, donor_keys)) AS campaigns
+        FROM (
+            SELECT month, campaign_name,
+                   COUNT(DISTINCT payment_id) AS n_pay, COALESCE(SUM(amount), 0) AS total,
+                   ARRAY_AGG(DISTINCT donor_key) AS donor_keys
+            FROM ok
+            WHERE campaign_name IS NOT NULL AND campaign_name != ''
+            GROUP BY month, campaign_name
+        ) c
+        GROUP BY month
+    ),
+    statuses AS (
+        SELECT month, json_agg(json_build_array(payment_status, count, total)) AS statuses
+        FROM (
+            SELECT month, payment_status, COUNT(*) AS count, COALESCE(SUM(amount), 0) AS total
+            FROM base
+            GROUP BY month, payment_status
+        ) st
+        GROUP BY month
+    )
+    SELECT t.*, o.ok_payments, d.donors, sc.schools, c.campaigns, st.statuses
+    FROM totals t
+    LEFT JOIN ok_totals o USING (month)
+    LEFT JOIN donors d USING (month)
+    LEFT JOIN schools sc USING (month)
+    LEFT JOIN campaigns c USING (month)
+    LEFT JOIN statuses st USING (month)
+    """
+
+    def build_report_dataset(self, start_date: str, end_date: str,
+                             with_monthly: bool = False, limit: int = 10,
+                             segments: Optional[Dict[str, str]] = None) -> ReportDataset:
+        """
+        Fetch every report section.
+
+        With month segments (from _segment_fingerprints) the dataset is merged
+        from per-month partial aggregates: months whose fingerprint matches a
+        cached partial are reused and only the changed ones are queried.
+        Otherwise (or with REPORT_INCREMENTAL=false) the period is fetched in
+        ONE round trip: scanned once (materialized CTE) inside a read-only
+        REPEATABLE READ transaction, so all sections see the same snapshot.
+        """
+        if segments is not None and self.incremental:
+            return self._build_dataset_from_partials(start_date, end_date, segments,
+                                                     with_monthly, limit)
+
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+            with conn.begin():
+                conn.execute(text("SET TRANSACTION READ ONLY"))
+                row = conn.execute(text(self.REPORT_DATASET_SQL), {
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'limit': limit,
+                    'with_monthly': with_monthly,
+                }).mappings().one()
+
+        return ReportDataset(
+            summary=row['summary'] or {},
+            donors=row['donors'],
+            schools=row['schools'],
+            campaigns=row['campaigns'],
+            status_summary=self._summarize_statuses(row['statuses']),
+            monthly_data=row['monthly'] if with_monthly else None,
+        )
+
+    def _partial_cache_key(self, month: str, start_date: str, end_date: str, fingerprint: str) -> str:
+        # A month clipped by the period boundaries is a different segment
+        month_start = f"{month} 00:00:00"
+        next_month = (datetime.strptime(month, '%Y-%m-%d') + timedelta(days=32)).replace(day=1)
+        month_end = (next_month - timedelta(days=1)).strftime('%Y-%m-%d 23:59:59')
+        return (f"partial:{self.VERSION}:{max(start_date, month_start)}:"
+                f"{min(end_date, month_end)}:{fingerprint}")
+
+    def _build_dataset_from_partials(self, start_date: str, end_date: str,
+                                     segments: Dict[str, str], with_monthly: bool,
+                                     limit: int) -> ReportDataset:
+        partials = self._load_month_partials(start_date, end_date, segments)
+        merged = merge_partials(partials, limit=limit, with_monthly=with_monthly)
+        return ReportDataset(
+            summary=merged['summary'],
+            donors=merged['donors'],
+            schools=merged['schools'],
+            campaigns=merged['campaigns'],
+            status_summary=self._summarize_statuses(merged['statuses']),
+            monthly_data=merged['monthly'],
+        )
+
+    def _load_month_partials(self, start_date: str, end_date: str,
+                             segments: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Partials of the segment months: cached ones as is, the rest in ONE query"""
+        partials, stale = [], []
+        for month, fingerprint in sorted(segments.items()):
+            cached = self.local_cache.get(self._partial_cache_key(month, start_date, end_date, fingerprint))
+            if cached is not None:
+                partials.append(cached)
+            else:
+                stale.append(month)
+
+        if stale:
+            with self.engine.connect() as conn:
+                conn = conn.execution_options(isolation_level="REPEATABLE READ")
+                with conn.begin():
+                    conn.execute(text("SET TRANSACTION READ ONLY"))
+                    rows = conn.execute(
+                        text(self.MONTH_PARTIALS_SQL.format(fingerprint=self.SEGMENT_FINGERPRINT_SQL)),
+                        {'start_date': start_date, 'end_date': end_date, 'months': stale}
+                    ).mappings().all()
+            for row in rows:
+                partial = partial_from_row(row)
+                partials.append(partial)
+                try:
+                    # Keyed by the fingerprint of exactly the rows aggregated
+                    self.local_cache.set(
+                        self._partial_cache_key(row['month'], start_date, end_date, row['fingerprint']),
+                        partial, self.partial_ttl
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not cache month partial {row['month']}: {e}")
+
+        logger.info(f"Loaded {len(partials)} month partials "
+                    f"({len(partials) - len(stale)} cached, {len(stale)} recomputed)")
+        return partials
 
     # ==================== COVER PAGE ====================
-    def _create_stunning_cover_page(self, period_type: str, start_date: datetime,
-                                    end_date: datetime, year: int) -> List:
+    def _cover_logo(self) -> Optional[bytes]:
+        """The downscaled logo PNG, loaded once per process (None when missing or unreadable)"""
+        key = (self.logo_path, self.logo_px)
+        with _cover_logo_lock:
+            if key not in _cover_logo_cache:
+                _cover_logo_cache[key] = self._load_logo()
+            return _cover_logo_cache[key]
+
+    def _load_logo(self) -> Optional[bytes]:
+        """The logo decoded and downscaled (the source PNG is far larger than it is drawn)"""
+        if not os.path.exists(self.logo_path):
+            return None
+        try:
+            from PIL import Image as PILImage
+            with PILImage.open(self.logo_path) as source:
+                source.thumbnail((self.logo_px, self.logo_px))
+                logo = source.convert('RGBA')
+            # Flattened onto the white cover: no soft mask to encode on every render
+            flat = PILImage.new('RGB', logo.size, (255, 255, 255))
+            flat.paste(logo, mask=logo.getchannel('A'))
+            buffer = io.BytesIO()
+            flat.save(buffer, format='PNG', optimize=True)
+            return buffer.getvalue()
+        except Exception as e:
+            logger.warning(f"Logo error: {e}")
+            return None
+
+    def _cover_masthead(self) -> List:
+        """Logo, name, tagline and title: fresh flowables per render around the cached logo"""
         elements = []
         elements.append(Spacer(1, 5*mm))
 
-        if os.path.exists(self.logo_path):
-            try:
-                logo = Image(self.logo_path, width=70*mm, height=70*mm, kind='proportional')
-                logo.hAlign = 'CENTER'
-                elements.append(logo)
-                elements.append(Spacer(1, 3*mm))
-            except Exception as e:
-                logger.warning(f"Logo error: {e}")
-                elements.append(Spacer(1, 8*mm))
+        logo_png = self._cover_logo()
+        if logo_png is not None:
+            logo = Image(io.BytesIO(logo_png), width=70*mm, height=70*mm, kind='proportional')
+            logo.hAlign = 'CENTER'
+            elements.append(logo)
+            elements.append(Spacer(1, 3*mm))
+        elif os.path.exists(self.logo_path):
+            elements.append(Spacer(1, 8*mm))
         else:
             elements.append(Spacer(1, 3*mm))
 
@@ -1087,29 +1633,16 @@ class FinalDonationReportAgent:
         ))
 
         elements.append(Paragraph("DONATION PERFORMANCE REPORT", self.styles['CoverTitle']))
+        return elements
 
-        period_display = self._get_period_display(period_type, year)
+    def _create_stunning_cover_page(self, period_type: str, start_date: datetime,
+                                    end_date: datetime, year: int) -> List:
+        elements = self._cover_masthead()
 
-        period_box_style = ParagraphStyle(
-            name='PeriodBox',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            textColor=self.white,
-            alignment=TA_CENTER,
-            fontName='Times-Bold',
-            leading=18,
-            leftIndent=20,
-            rightIndent=20
-        )
+        period_display = self._get_period_display(period_type, year)
 
-        period_table = Table([[Paragraph(period_display, period_box_style)]], colWidths=[120*mm])
-        period_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), self.primary_navy),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('BOX', (0, 0), (-1, -1), 1, self.accent_gold),
-        ]))
+        period_table = Table([[Paragraph(period_display, self.styles['PeriodBox'])]], colWidths=[120*mm])
+        period_table.setStyle(self.table_styles['period_box'])
 
         elements.append(period_table)
         elements.append(Spacer(1, 20*mm))
@@ -1126,19 +1659,7 @@ class FinalDonationReportAgent:
         ]
 
         info_table = Table(info_data, colWidths=[55*mm, 95*mm])
-        info_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('LEFTPADDING', (0, 0), (0, -1), 10),
-            ('RIGHTPADDING', (0, 0), (0, -1), 15),
-            ('LEFTPADDING', (1, 0), (1, -1), 15),
-            ('RIGHTPADDING', (1, 0), (1, -1), 10),
-            ('BOX', (0, 0), (-1, -1), 1.5, self.accent_gold),
-            ('BACKGROUND', (0, 0), (-1, -1), self.light_silver),
-        ]))
+        info_table.setStyle(self.table_styles['cover_info'])
 
         elements.append(info_table)
 
@@ -1206,22 +1727,7 @@ class FinalDonationReportAgent:
         ]
 
         metrics_table = Table(metrics_data, colWidths=[95*mm, 70*mm])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), self.primary_navy),
-            ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('TOPPADDING', (0, 0), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('FONTNAME', (0, 1), (-1, -1), 'Times-Roman'),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [self.white, self.light_silver]),
-            ('GRID', (0, 0), (-1, -1), 0.5, self.border_gray),
-            ('LINEBELOW', (0, 0), (-1, 0), 1.5, self.white),
-        ]))
+        metrics_table.setStyle(self.table_styles['metrics'])
 
         elements.append(metrics_table)
         return elements
@@ -1260,22 +1766,7 @@ class FinalDonationReportAgent:
             ])
 
         donor_table = Table(table_data, colWidths=[8*mm, 52*mm, 32*mm, 18*mm, 28*mm, 22*mm])
-        donor_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), self.primary_navy),
-            ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-            ('ALIGN', (2, 0), (4, -1), 'RIGHT'),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            ('FONTNAME', (0, 1), (-1, -1), 'Times-Roman'),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [self.white, self.light_silver]),
-            ('GRID', (0, 0), (-1, -1), 0.5, self.border_gray),
-            ('LINEBELOW', (0, 0), (-1, 0), 1.5, self.white),
-        ]))
+        donor_table.setStyle(self.table_styles['donors'])
 
         elements.append(donor_table)
         return elements
@@ -1311,22 +1802,7 @@ class FinalDonationReportAgent:
             ])
 
         school_table = Table(table_data, colWidths=[8*mm, 58*mm, 36*mm, 38*mm, 20*mm])
-        school_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), self.primary_navy),
-            ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-            ('ALIGN', (3, 0), (4, -1), 'RIGHT'),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            ('FONTNAME', (0, 1), (-1, -1), 'Times-Roman'),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [self.white, self.light_silver]),
-            ('GRID', (0, 0), (-1, -1), 0.5, self.border_gray),
-            ('LINEBELOW', (0, 0), (-1, 0), 1.5, self.white),
-        ]))
+        school_table.setStyle(self.table_styles['schools'])
 
         elements.append(school_table)
         return elements
@@ -1362,26 +1838,48 @@ class FinalDonationReportAgent:
             ])
 
         campaign_table = Table(table_data, colWidths=[8*mm, 64*mm, 28*mm, 38*mm, 22*mm])
-        campaign_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), self.primary_navy),
-            ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-            ('ALIGN', (3, 0), (4, -1), 'RIGHT'),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            ('FONTNAME', (0, 1), (-1, -1), 'Times-Roman'),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [self.white, self.light_silver]),
-            ('GRID', (0, 0), (-1, -1), 0.5, self.border_gray),
-            ('LINEBELOW', (0, 0), (-1, 0), 1.5, self.white),
-        ]))
+        campaign_table.setStyle(self.table_styles['campaigns'])
 
         elements.append(campaign_table)
         return elements
 
+    def _create_period_comparison_table(self, summary: Dict, comparison: Dict) -> List:
+        elements = []
+        elements.append(Paragraph("PERIOD-OVER-PERIOD COMPARISON", self.styles['SectionHeader']))
+
+        previous = comparison.get('summary') or {}
+        table_data = [[
+            Paragraph("<b>Metric</b>", self.styles['TableHeader']),
+            Paragraph("<b>This Period</b>", self.styles['TableHeader']),
+            Paragraph("<b>Previous Period</b>", self.styles['TableHeader']),
+            Paragraph("<b>Change</b>", self.styles['TableHeader'])
+        ]]
+
+        rows = [
+            ("Total Donations", 'total_amount', self._format_currency),
+            ("Transactions", 'total_transactions', self._format_number),
+            ("Successful Transactions", 'successful_transactions', self._format_number),
+            ("Unique Donors", 'unique_donors', self._format_number),
+            ("Average Donation", 'avg_donation', self._format_currency),
+        ]
+        for label, key, fmt in rows:
+            current_value = self._safe_float(summary.get(key, 0))
+            previous_value = self._safe_float(previous.get(key, 0))
+            if previous_value > 0:
+                change = ((current_value - previous_value) / previous_value) * 100
+                change_text = f"+{change:.1f}%" if change > 0 else f"{change:.1f}%"
+            else:
+                change_text = "—"
+            table_data.append([label, fmt(current_value), fmt(previous_value), change_text])
+
+        comparison_table = Table(table_data, colWidths=[50*mm, 40*mm, 40*mm, 30*mm])
+        comparison_table.setStyle(self.table_styles['figures'])
+
+        elements.append(comparison_table)
+        elements.append(Spacer(1, 3*mm))
+        elements.append(Paragraph(f"Previous period: {comparison.get('label', '')}.", self.styles['BodyTextClean']))
+        return elements
+
     def _create_monthly_breakdown_table(self, monthly_data: List[Dict]) -> List:
         elements = []
         elements.append(Paragraph("MONTHLY DONATION BREAKDOWN", self.styles['SectionHeader']))
@@ -1427,22 +1925,7 @@ class FinalDonationReportAgent:
             previous_amount = total
 
         monthly_table = Table(table_data, colWidths=[30*mm, 45*mm, 30*mm, 25*mm, 30*mm])
-        monthly_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), self.primary_navy),
-            ('TEXTCOLOR', (0, 0), (-1, 0), self.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            ('FONTNAME', (0, 1), (-1, -1), 'Times-Roman'),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [self.white, self.light_silver]),
-            ('GRID', (0, 0), (-1, -1), 0.5, self.border_gray),
-            ('LINEBELOW', (0, 0), (-1, 0), 1.5, self.white),
-        ]))
+        monthly_table.setStyle(self.table_styles['figures'])
 
         elements.append(monthly_table)
 
@@ -1548,6 +2031,13 @@ class FinalDonationReportAgent:
             return f"{start_date.strftime('%d %b %Y')} to {end_date.strftime('%d %b %Y')}"
         elif period_type == 'monthly':
             return f"{start_date.strftime('%B %Y')}"
+        elif period_type == 'quarterly':
+            quarter, fiscal_year = fiscal_quarter(start_date)
+            return (f"Q{quarter} FY {fiscal_year_label(fiscal_year)} "
+                    f"({start_date.strftime('%b')} – {end_date.strftime('%b %Y')})")
+        elif period_type == 'fiscal_yearly':
+            return (f"Fiscal Year {fiscal_year_label(start_date.year)} "
+                    f"({start_date.strftime('%d %b %Y')} to {end_date.strftime('%d %b %Y')})")
         else:
             return f"Calendar Year {start_date.year}"
 
@@ -1556,47 +2046,71 @@ class FinalDonationReportAgent:
             return "Weekly Performance Analysis"
         elif period_type == 'monthly':
             return "Monthly Performance Analysis"
+        elif period_type == 'quarterly':
+            return "Quarterly Performance Analysis"
+        elif period_type == 'fiscal_yearly':
+            return f"FY {fiscal_year_label(year)} Annual Performance Analysis"
         else:
             return f"{year} Annual Performance Analysis"
 
+    @staticmethod
+    def _resolve_year(period_type: str, year: Optional[int]) -> Optional[int]:
+        """Year periods default to the current (fiscal) year; others have no year"""
+        if period_type == 'yearly':
+            return year if year is not None else datetime.now().year
+        if period_type == 'fiscal_yearly':
+            return year if year is not None else fiscal_year_of(datetime.now())
+        return None
+
     # ==================== MAIN GENERATION ====================
+    def resolve_report_id(self, period_type: str, year: int = None) -> Tuple[str, Optional[int]]:
+        """
+        report_id (and resolved year) that generate_report would use right now.
+        Lets callers deduplicate identical requests without touching the DB.
+        """
+        resolved_year = self._resolve_year(period_type, year)
+        _, _, start_date_str, _, end_date_key = self.get_date_range(period_type, resolved_year)
+        return self._generate_report_id(period_type, resolved_year, start_date_str, end_date_key), resolved_year
+
     def generate_report(self, period_type: str, year: int = None,
-                        force_regenerate: bool = False) -> str:
+                        force_regenerate: bool = False,
+                        progress: Optional[Callable[[int, str], None]] = None) -> str:
         """
         Generate ultra professional donation report with smart caching.
 
         Process:
         1. Resolve year once — used consistently for date range, report_id, filename, cache
-        2. Auto-cleanup old weekly/monthly files (> 7 days)
+        2. (Expired files are removed by the scheduled sweeper, see sweep_reports)
         3. Generate data fingerprint by querying DB (ALWAYS runs, even on cache hit)
         4. Lookup Redis cache — valid only if fingerprint matches AND file exists
         5. Cache hit → return cached path instantly
         6. Cache miss / data changed → generate fresh PDF and save to Redis
         7. If S3 enabled: upload to S3 and cache S3 URL
+
+        progress, if given, is called as progress(percent, stage) between steps.
         """
+        report_progress = progress or (lambda percent, stage: None)
         try:
             # ── Step 1: Resolve year ONCE ──────────────────────────────────────
             # This prevents report_id / filename / date-range from diverging
-            if period_type == 'yearly':
-                resolved_year = year if year is not None else datetime.now().year
-            else:
-                resolved_year = None   # not relevant for weekly/monthly
+            resolved_year = self._resolve_year(period_type, year)   # None for weekly/monthly/quarterly
 
             logger.info(
                 f"📊 Generating {period_type} report"
                 f"{f' (year={resolved_year})' if resolved_year else ''}"
             )
 
-            # ── Step 2: Auto-cleanup ───────────────────────────────────────────
-            self._cleanup_old_files()
-
             # ── Step 3: Date range ─────────────────────────────────────────────
             start_date, end_date, start_date_str, end_date_str, end_date_key = \
                 self.get_date_range(period_type, resolved_year)
 
             # ── Step 4: Fingerprint — ALWAYS queries the database ──────────────
+            report_progress(10, "fingerprint")
             logger.info("Querying database to check for new/changed data...")
-            data_fingerprint = self._generate_data_fingerprint(start_date_str, end_date_str)
+            # ...together with the previous period the report is compared with
+            data_fingerprint, segments, previous = self._fingerprint_period(
+                period_type, start_date, end_date, start_date_str, end_date_str
+            )
 
             # ── Step 5: Cache lookup ───────────────────────────────────────────
             # Use end_date_KEY (date only) for report_id so the cache key is
@@ -1605,6 +2119,7 @@ class FinalDonationReportAgent:
                 period_type, resolved_year, start_date_str, end_date_key
             )
 
+            report_progress(20, "cache_lookup")
             if not force_regenerate:
                 cached_path = self._get_cached_report(
                     report_id, data_fingerprint, period_type
@@ -1612,17 +2127,40 @@ class FinalDonationReportAgent:
                 if cached_path:
                     return cached_path
 
+            # ── Step 5b: Shared artifact store — another replica may have ──────
+            # rendered exactly this data already (metadata lost or never seen here)
+            content_key = None
+            cache_entry = dict(
+                report_id=report_id, period_type=period_type, year=resolved_year,
+                start_date=start_date_str, end_date=end_date_key,
+                # unknown fingerprint never matches → revalidated next time
+                data_fingerprint=data_fingerprint or ""
+            )
+            if self.artifact_store is not None and data_fingerprint:
+                content_key = artifact_key(
+                    self.VERSION, period_type, resolved_year,
+                    start_date_str, end_date_key, data_fingerprint
+                )
+                artifact_name = (
+                    f"donation_report_{period_type}"
+                    f"_{resolved_year if resolved_year else 'current'}"
+                    f"_{content_key[:12]}.pdf"
+                )
+                try:
+                    if not force_regenerate and self.artifact_store.exists(content_key):
+                        ref = self.artifact_store.ref(content_key, artifact_name)
+                        logger.info(f"Artifact hit — reusing {content_key[:16]}")
+                        self._update_cache(file_path=ref, **cache_entry)
+                        self._catalog_report(ref, cache_entry)
+                        return ref
+                except Exception as e:
+                    logger.warning(f"Artifact store lookup failed: {e}")
+
             # ── Step 6: Generate fresh report ─────────────────────────────────
+            report_progress(30, "querying")
             logger.info("Generating fresh report (data changed or no cache)...")
-            summary        = self.get_donations_summary(start_date_str, end_date_str)
-            donors         = self.get_top_donors(start_date_str, end_date_str, 10)
-            schools        = self.get_top_schools(start_date_str, end_date_str, 10)
-            campaigns      = self.get_top_campaigns(start_date_str, end_date_str, 10)
-            status_summary = self.get_transaction_status_summary(start_date_str, end_date_str)
-
-            monthly_data = None
-            if period_type == 'yearly':
-                monthly_data = self.get_monthly_breakdown(resolved_year)
+            dataset = self._load_report_dataset(period_type, start_date_str, end_date_str,
+                                                segments, previous)
 
             timestamp   = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename    = (
@@ -1632,37 +2170,57 @@ class FinalDonationReportAgent:
             )
             output_path = self.reports_dir / filename
 
-            logger.info(f"Building PDF: {output_path}")
+            report_progress(50, "rendering")
+            in_memory = self.render_mode == "memory" or content_key is not None
+            render_target = io.BytesIO() if in_memory else str(output_path)
+            logger.info(f"Building PDF: {filename + ' (in memory)' if in_memory else output_path}")
             self._build_ultra_professional_pdf(
-                output_path    = str(output_path),
+                output_path    = render_target,
                 period_type    = period_type,
                 year           = resolved_year,
                 start_date     = start_date,
                 end_date       = end_date,
-                summary        = summary,
-                donors         = donors,
-                schools        = schools,
-                campaigns      = campaigns,
-                status_summary = status_summary,
-                monthly_data   = monthly_data,
+                dataset        = dataset,
             )
 
             # ── Step 7: Upload to S3 (if enabled) ──────────────────────────────
-            final_path = str(output_path)
-            if self.s3_client:
-                s3_url = self._upload_to_s3(str(output_path))
-                if s3_url:
-                    # Use S3 URL in cache instead of local path
-                    final_path = s3_url
-                    logger.info(f"S3 URL available: {s3_url[:80]}...")
+            report_progress(85, "storing")
+            final_path = None
+            if content_key is not None:
+                try:
+                    final_path = self.artifact_store.put(
+                        content_key, render_target.getvalue(), artifact_name
+                    )
+                except Exception as e:
+                    logger.warning(f"Artifact store write failed: {e} — keeping report on this node")
+            if final_path is None and in_memory:
+                final_path = self._store_rendered_pdf(filename, render_target.getvalue())
+            elif final_path is None:
+                final_path = str(output_path)
+                if self.s3_client and not self.s3_background:
+                    s3_url = self._upload_to_s3(str(output_path))
+                    if s3_url:
+                        # Use S3 URL in cache instead of local path
+                        final_path = s3_url
+                        logger.info(f"S3 URL available: {s3_url[:80]}...")
 
             # ── Step 8: Save to Redis ──────────────────────────────────────────
-            self._update_cache(
-                report_id, period_type, resolved_year,
-                start_date_str, end_date_key,
-                final_path,  # S3 URL or local path
-                data_fingerprint
-            )
+            # S3 URL, artifact:// / memory:// reference or local path
+            self._update_cache(file_path=final_path, **cache_entry)
+            size_bytes = (len(render_target.getvalue()) if in_memory
+                          else os.path.getsize(output_path))
+            if not in_memory and final_path != str(output_path):
+                # Synchronously uploaded: the local copy still needs sweeping
+                self._catalog_report(str(output_path), cache_entry, size_bytes)
+            self._catalog_report(final_path, cache_entry, size_bytes)
+
+            # Local copy is cached first; the upload re-points the entry when done
+            if self.s3_client and self.s3_background and content_key is None:
+                self._upload_in_background(
+                    str(output_path) if not in_memory else filename,
+                    render_target.getvalue() if in_memory else None,
+                    cache_entry
+                )
 
             logger.info(f"Report ready: {final_path}")
             return final_path
@@ -1671,11 +2229,119 @@ class FinalDonationReportAgent:
             logger.error(f"Report generation failed: {e}", exc_info=True)
             raise
 
-    def _build_ultra_professional_pdf(self, output_path: str, period_type: str, year: int,
-                                      start_date: datetime, end_date: datetime, summary: Dict,
-                                      donors: List[Dict], schools: List[Dict], campaigns: List[Dict],
-                                      status_summary: Dict, monthly_data: List[Dict] = None):
-        """Build ultra professional PDF"""
+    def _fingerprint_period(self, period_type: str, start_date: datetime, end_date: datetime,
+                            start_date_str: str, end_date_str: str):
+        """
+        Fingerprint a period and the previous period it is compared with in
+        one scan: (data_fingerprint, month segments, previous), where previous
+        is the arguments of _previous_period_summary after period_type.
+        """
+        previous_start, previous_end = previous_period(period_type, start_date, end_date)
+        previous_range = (previous_start.strftime('%Y-%m-%d %H:%M:%S'),
+                          previous_end.strftime('%Y-%m-%d %H:%M:%S'))
+        segments, previous_segments = (
+            self._period_fingerprints((start_date_str, end_date_str), previous_range)
+            or (None, None)
+        )
+        return (self._combine_fingerprints(segments, previous_segments), segments,
+                (previous_start, previous_end, previous_range, previous_segments))
+
+    def _load_report_dataset(self, period_type: str, start_date_str: str, end_date_str: str,
+                             segments: Optional[Dict[str, str]], previous: tuple,
+                             limit: int = 10) -> ReportDataset:
+        """The dataset a report (or an export of it) is built from, with its comparison"""
+        dataset = self.db_breaker.call(
+            self.build_report_dataset,
+            start_date_str, end_date_str,
+            with_monthly=(period_type in MULTI_MONTH_PERIODS),
+            limit=limit,
+            segments=segments
+        )
+        dataset.comparison = self._previous_period_summary(period_type, *previous)
+        return dataset
+
+    def _previous_period_summary(self, period_type: str, start_date: datetime, end_date: datetime,
+                                 date_range: Tuple[str, str],
+                                 segments: Optional[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """
+        Summary of the period before, for the comparison section. Its months
+        are mostly cached partials already (last quarter's report built them).
+        A report without the comparison beats no report.
+        """
+        try:
+            previous = self.db_breaker.call(self.build_report_dataset, *date_range, segments=segments)
+        except Exception as e:
+            logger.warning(f"Period comparison skipped: {e}")
+            return None
+        if period_type in YEAR_PERIODS:
+            label = f"{start_date.strftime('%d %b %Y')} to {end_date.strftime('%d %b %Y')}"
+        else:
+            label = self._format_period_string(period_type, start_date, end_date)
+        return {"label": label, "summary": previous.summary}
+
+    def _store_rendered_pdf(self, filename: str, data: bytes) -> str:
+        """Keep an in-memory render: S3 if available, else the memory store (+ optional disk copy)"""
+        if self.s3_client and not self.s3_background:
+            s3_url = self._upload_to_s3(filename, data=data)
+            if s3_url:
+                logger.info(f"S3 URL available: {s3_url[:80]}...")
+                return s3_url
+
+        ref = self.memory_store.put(filename, data)
+        if self.disk_cache:
+            try:
+                (self.reports_dir / filename).write_bytes(data)
+            except OSError as e:
+                # Disk is only a cache here — a full ephemeral disk must not fail the report
+                logger.warning(f"Could not cache report on disk: {e}")
+        return ref
+
+    def _report_exists(self, ref: str) -> bool:
+        if ref.startswith(ARTIFACT_SCHEME):
+            try:
+                return self.artifact_store is not None and self.artifact_store.exists(parse_ref(ref)[0])
+            except Exception as e:
+                logger.warning(f"Artifact store check failed: {e}")
+                return False
+        return self.open_report(ref) is not None
+
+    def open_report(self, ref: str) -> Optional[Tuple[str, Any]]:
+        """
+        Resolve what generate_report returned into something servable:
+        ("url", presigned_url), ("bytes", (data, etag)) or ("file", path).
+        None when the PDF is gone (evicted from memory and not on disk).
+        """
+        if not ref:
+            return None
+        if ref.startswith("http"):
+            return "url", ref
+        if ref.startswith(ARTIFACT_SCHEME):
+            if self.artifact_store is None:
+                return None
+            key, filename = parse_ref(ref)
+            url = self.artifact_store.redirect_url(key, filename)
+            if url:
+                return "url", url
+            path = self.artifact_store.local_path(key)
+            return ("file", path) if path else None
+        if ref.startswith(MEMORY_SCHEME):
+            item = self.memory_store.get(ref)
+            if item is not None:
+                return "bytes", item
+            ref = str(self.reports_dir / MemoryReportStore.name_of(ref))
+        return ("file", ref) if Path(ref).exists() else None
+
+    def _build_ultra_professional_pdf(self, output_path, period_type: str, year: int,
+                                      start_date: datetime, end_date: datetime,
+                                      dataset: ReportDataset):
+        """Build ultra professional PDF into a file path or a writable buffer"""
+        summary        = dataset.summary
+        donors         = dataset.donors
+        schools        = dataset.schools
+        campaigns      = dataset.campaigns
+        status_summary = dataset.status_summary
+        monthly_data   = dataset.monthly_data
+
         doc = SimpleDocTemplate(
             output_path,
             pagesize=A4,
@@ -1684,50 +2350,474 @@ class FinalDonationReportAgent:
             topMargin=25*mm,
             bottomMargin=22*mm,
             title=f"{self.company_name} - Donation Report",
-            author=self.company_name
+            author=self.company_name,
+            pageCompression=1 if self.pdf_compress else 0
         )
 
         story = []
-        story.extend(self._create_stunning_cover_page(period_type, start_date, end_date, year))
+        timer = SectionTimer("report")
+
+        def add_section(name: str, build: Callable[..., List], *args):
+            with timer.section(name):
+                flowables = build(*args)
+            story.append(SectionMark(timer, name))
+            story.extend(flowables)
+
+        add_section("cover", self._create_stunning_cover_page, period_type, start_date, end_date, year)
         story.append(PageBreak())
 
-        story.extend(self._create_executive_summary(summary, status_summary))
-        story.extend(self._create_tight_metrics_table(summary))
+        add_section("executive_summary", self._create_executive_summary, summary, status_summary)
+        add_section("metrics", self._create_tight_metrics_table, summary)
+
+        if dataset.comparison:
+            add_section("comparison", self._create_period_comparison_table, summary, dataset.comparison)
 
-        if period_type == 'yearly' and monthly_data:
-            story.extend(self._create_monthly_breakdown_table(monthly_data))
+        if period_type in MULTI_MONTH_PERIODS and monthly_data:
+            add_section("monthly", self._create_monthly_breakdown_table, monthly_data)
 
-        story.extend(self._create_tight_donors_table(donors))
-        story.extend(self._create_tight_schools_table(schools))
-        story.extend(self._create_tight_campaigns_table(campaigns))
-        story.extend(self._create_comprehensive_analysis(summary, donors, schools, campaigns, status_summary))
+        add_section("donors", self._create_tight_donors_table, donors)
+        add_section("schools", self._create_tight_schools_table, schools)
+        add_section("campaigns", self._create_tight_campaigns_table, campaigns)
+        add_section("analysis", self._create_comprehensive_analysis,
+                    summary, donors, schools, campaigns, status_summary)
+        story.append(SectionMark(timer, "write"))
 
         doc.build(story, onFirstPage=self._create_header_footer, onLaterPages=self._create_header_footer)
+        total = timer.finish()
+        logger.info(f"PDF rendered in {total * 1000:.0f} ms ({timer.describe()})")
+
+    # ==================== PER-SCHOOL STATEMENTS ====================
+    # Every school's sections from one scan, partitioned by school_name
+    SCHOOL_STATEMENTS_SQL = """
+    WITH base AS MATERIALIZED (
+        SELECT school_name, school_location, payment_id, donor_name, donor_email,
+               campaign_name, payment_status, amount
+        FROM donations_raw
+        WHERE payment_date BETWEEN :start_date AND :end_date
+          AND school_name IS NOT NULL AND school_name != ''
+    ),
+    ok AS (
+        SELECT * FROM base WHERE payment_status = 'Success'
+    ),
+    summaries AS (
+        SELECT school_name,
+               MIN(school_location) AS school_location,
+               json_build_object(
+                   'total_transactions', COUNT(DISTINCT payment_id),
+                   'unique_donors', COUNT(DISTINCT (donor_name, donor_email)),
+                   'total_amount', COALESCE(SUM(CASE WHEN payment_status = 'Success' THEN amount ELSE 0 END), 0),
+                   'avg_donation', COALESCE(AVG(CASE WHEN payment_status = 'Success' THEN amount END), 0),
+                   'min_donation', COALESCE(MIN(CASE WHEN payment_status = 'Success' THEN amount END), 0),
+                   'max_donation', COALESCE(MAX(CASE WHEN payment_status = 'Success' THEN amount END), 0),
+                   'successful_transactions', COUNT(CASE WHEN payment_status = 'Success' THEN 1 END),
+                   'failed_transactions', COUNT(CASE WHEN payment_status != 'Success' THEN 1 END)
+               ) AS summary
+        FROM base
+        GROUP BY school_name
+    ),
+    donors AS (
+        SELECT school_name, json_agg(json_build_object(
+                   'donor_name', donor_name, 'number_of_donations', number_of_donations,
+                   'total_donated', total_donated, 'average_donation', average_donation,
+                   'donor_type', donor_type
+               ) ORDER BY total_donated DESC) AS donors
+        FROM (
+            SELECT school_name,
+                   COALESCE(donor_name, donor_email, 'Anonymous') AS donor_name,
+                   COUNT(DISTINCT payment_id) AS number_of_donations,
+                   COALESCE(SUM(amount), 0) AS total_donated,
+                   COALESCE(AVG(amount), 0) AS average_donation,
+                   CASE WHEN COUNT(DISTINCT payment_id) > 1 THEN 'Recurring' ELSE 'One-time' END AS donor_type,
+                   ROW_NUMBER() OVER (PARTITION BY school_name ORDER BY SUM(amount) DESC) AS rank
+            FROM ok
+            GROUP BY school_name, donor_name, donor_email
+        ) d
+        WHERE rank <= :limit
+        GROUP BY school_name
+    ),
+    campaigns AS (
+        SELECT school_name, json_agg(json_build_object(
+                   'campaign_name', campaign_name, 'donation_type', donation_type,
+                   'donation_count', donation_count, 'total_amount', total_amount,
+                   'unique_donors', unique_donors
+               ) ORDER BY total_amount DESC) AS campaigns
+        FROM (
+            SELECT school_name,
+                   COALESCE(campaign_name, 'General Fund') AS campaign_name,
+                   CASE
+                       WHEN COUNT(DISTINCT payment_id) > COUNT(DISTINCT (donor_name, donor_email))
+                       THEN 'Recurring'
+                       ELSE 'One-time'
+                   END AS donation_type,
+                   COUNT(DISTINCT payment_id) AS donation_count,
+                   COALESCE(SUM(amount), 0) AS total_amount,
+                   COUNT(DISTINCT (donor_name, donor_email)) AS unique_donors,
+                   ROW_NUMBER() OVER (PARTITION BY school_name ORDER BY SUM(amount) DESC) AS rank
+            FROM ok
+            WHERE campaign_name IS NOT NULL AND campaign_name != ''
+            GROUP BY school_name, campaign_name
+        ) c
+        WHERE rank <= :limit
+        GROUP BY school_name
+    )
+    SELECT s.school_name, s.school_location, s.summary,
+           COALESCE(d.donors, '[]'::json) AS donors,
+           COALESCE(c.campaigns, '[]'::json) AS campaigns
+    FROM summaries s
+    LEFT JOIN donors d USING (school_name)
+    LEFT JOIN campaigns c USING (school_name)
+    ORDER BY s.school_name
+    """
+
+    def build_school_datasets(self, start_date: str, end_date: str, limit: int = 10) -> List[Dict]:
+        """Sections for every school in the period, from ONE partitioned aggregation"""
+        def fetch():
+            with self.engine.connect() as conn:
+                conn = conn.execution_options(isolation_level="REPEATABLE READ")
+                with conn.begin():
+                    conn.execute(text("SET TRANSACTION READ ONLY"))
+                    return [dict(row) for row in conn.execute(text(self.SCHOOL_STATEMENTS_SQL), {
+                        'start_date': start_date, 'end_date': end_date, 'limit': limit,
+                    }).mappings()]
+        return self.db_breaker.call(fetch)
+
+    def render_school_statement(self, school: Dict, period_type: str,
+                                start_date: datetime, end_date: datetime) -> bytes:
+        """One school's statement PDF, rendered in memory"""
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=20*mm,
+            leftMargin=20*mm,
+            topMargin=25*mm,
+            bottomMargin=22*mm,
+            title=f"{school['school_name']} - Donation Statement",
+            author=self.company_name,
+            pageCompression=1 if self.pdf_compress else 0
+        )
+
+        story = [
+            Paragraph(school['school_name'], self.styles['CoverTitle']),
+            Paragraph(school.get('school_location') or "Location not specified", self.styles['CoverTagline']),
+            Paragraph(f"Donation Statement — {self._format_period_string(period_type, start_date, end_date)}",
+                      self.styles['CoverPeriod']),
+            Spacer(1, 6*mm),
+        ]
+        story.extend(self._create_tight_metrics_table(school['summary']))
+        story.extend(self._create_tight_donors_table(school['donors']))
+        story.extend(self._create_tight_campaigns_table(school['campaigns']))
+
+        doc.build(story, onFirstPage=self._create_header_footer, onLaterPages=self._create_header_footer)
+        return buffer.getvalue()
+
+    # ==================== YEAR-OVER-YEAR COMPARISON ====================
+    def build_year_comparison(self, years: List[int], fiscal: bool = False,
+                              limit: int = 10) -> Dict[str, Any]:
+        """
+        Up to MAX_COMPARISON_YEARS (fiscal) years side by side, from the month
+        partials (see services/report_partials.compare_years). All years are
+        fingerprinted in ONE grouped scan and the months not cached yet are
+        aggregated in ONE query, whatever the number of years. The current
+        year runs to date.
+        """
+        years = sorted(set(years))
+        if not 2 <= len(years) <= MAX_COMPARISON_YEARS:
+            raise ValueError(f"Compare between 2 and {MAX_COMPARISON_YEARS} years")
+        period_type = 'fiscal_yearly' if fiscal else 'yearly'
+        ranges = [self.get_date_range(period_type, year)[2:4] for year in years]
+
+        segment_sets = self._period_fingerprints(*ranges)
+        if segment_sets is None:
+            raise RuntimeError("Database unavailable — cannot build the year comparison")
+        segments = {month: fp for period in segment_sets for month, fp in period.items()}
+        # Every range lies inside the span, so months keep their yearly-report partial keys
+        partials = self.db_breaker.call(self._load_month_partials, ranges[0][0], ranges[-1][1], segments)
+
+        partials_by_year = {year: [] for year in years}
+        for partial in partials:
+            month = datetime.strptime(partial['month'], '%Y-%m-%d')
+            partials_by_year[fiscal_year_of(month) if fiscal else month.year].append(partial)
+        month_order = list(range(4, 13)) + [1, 2, 3] if fiscal else list(range(1, 13))
+
+        comparison = compare_years(partials_by_year, month_order, limit=limit)
+        comparison['fiscal'] = fiscal
+        comparison['labels'] = {
+            year: f"FY {fiscal_year_label(year)}" if fiscal else str(year) for year in years
+        }
+        return comparison
+
+    def render_year_comparison(self, comparison: Dict[str, Any]) -> bytes:
+        """The year-over-year comparison PDF, rendered in memory"""
+        years, labels = comparison['years'], comparison['labels']
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=20*mm,
+            leftMargin=20*mm,
+            topMargin=25*mm,
+            bottomMargin=22*mm,
+            title=f"{self.company_name} - Year-over-Year Comparison",
+            author=self.company_name,
+            pageCompression=1 if self.pdf_compress else 0
+        )
+
+        story = [
+            Paragraph("YEAR-OVER-YEAR COMPARISON", self.styles['CoverTitle']),
+            Paragraph(" vs ".join(labels[year] for year in years), self.styles['CoverPeriod']),
+            Spacer(1, 6*mm),
+        ]
+
+        def pct(value):
+            return "—" if value is None else f"{value:+.1f}%"
+
+        def amount(value):
+            return f"{self._safe_float(value):,.0f}"
+
+        year_headers = [Paragraph(f"<b>{labels[year]}</b>", self.styles['TableHeader']) for year in years]
+        summary_rows = [
+            ("Total Donations (Rs.)", lambda r: amount(r['total_amount'])),
+            ("Growth", lambda r: pct(r['growth_pct'])),
+            ("Transactions", lambda r: self._format_number(r['total_transactions'])),
+            ("Average Donation (Rs.)", lambda r: amount(r['avg_donation'])),
+            ("Donors", lambda r: self._format_number(r['unique_donors'])),
+            ("New Donors", lambda r: self._format_number(r['new_donors'])),
+            ("Retained Donors", lambda r: "—" if r['retained_donors'] is None
+             else self._format_number(r['retained_donors'])),
+            ("Retention", lambda r: "—" if r['retention_pct'] is None else f"{r['retention_pct']:.1f}%"),
+        ]
+        story.append(Paragraph("ANNUAL SUMMARY", self.styles['SectionHeader']))
+        story.append(self._comparison_table(
+            [[Paragraph("<b>Metric</b>", self.styles['TableHeader'])] + year_headers] +
+            [[label] + [fmt(row) for row in comparison['summary']] for label, fmt in summary_rows],
+            first_width=45
+        ))
+
+        story.append(Paragraph("MONTHLY DONATIONS (Rs.)", self.styles['SectionHeader']))
+        growth_header = Paragraph(f"<b>{labels[years[-1]]} vs {labels[years[-2]]}</b>", self.styles['TableHeader'])
+        story.append(self._comparison_table(
+            [[Paragraph("<b>Month</b>", self.styles['TableHeader'])] + year_headers + [growth_header]] +
+            [[m['month_name']] + [amount(m['amounts'][year]) for year in years] + [pct(m['growth_pct'])]
+             for m in comparison['monthly']],
+            first_width=28
+        ))
+
+        change_header = Paragraph(f"<b>Change since {labels[years[0]]}</b>", self.styles['TableHeader'])
+        for title, key, name_of in (
+            ("SCHOOLS (Rs.)", 'schools', lambda r: f"{r['school_name']}, {r['school_location']}"),
+            ("CAMPAIGNS (Rs.)", 'campaigns', lambda r: r['campaign_name']),
+        ):
+            story.append(Paragraph(title, self.styles['SectionHeader']))
+            if not comparison[key]:
+                story.append(Paragraph("No donations in these years.", self.styles['BodyTextClean']))
+                continue
+            story.append(self._comparison_table(
+                [[Paragraph("<b>Name</b>", self.styles['TableHeader'])] + year_headers + [change_header]] +
+                [[Paragraph(name_of(r), self.styles['BodyTextClean'])] +
+                 [amount(r['amounts'][year]) for year in years] + [pct(r['change_pct'])]
+                 for r in comparison[key]],
+                first_width=45
+            ))
+
+        doc.build(story, onFirstPage=self._create_header_footer, onLaterPages=self._create_header_footer)
+        return buffer.getvalue()
+
+    def _comparison_table(self, table_data: List[List], first_width: float) -> Table:
+        """First column for labels, the rest share the remaining width"""
+        other_width = (170 - first_width) / (len(table_data[0]) - 1)
+        table = Table(table_data, colWidths=[first_width*mm] + [other_width*mm] * (len(table_data[0]) - 1),
+                      repeatRows=1)
+        table.setStyle(self.table_styles['figures_compact'])
+        return table
+
+    # ==================== TABULAR EXPORTS ====================
+    def export_report(self, period_type: str, year: int = None, fmt: str = "xlsx",
+                      tables: Tuple[str, ...] = TABLES, limit: int = 10) -> Tuple[str, str, Any]:
+        """
+        A report's dataset as CSV / XLSX / Parquet (services/report_exports.py).
+
+        The export is keyed by the PDF's artifact key, i.e. the same data
+        fingerprint, so it is rebuilt only when the report would be. Returns
+        (filename, "file", path) for a cached export, else
+        (filename, "stream", chunks): the chunks are saved to reports/exports
+        as they are sent, and a download cut short leaves nothing behind.
+        """
+        resolved_year = self._resolve_year(period_type, year)
+        start_date, end_date, start_date_str, end_date_str, end_date_key = \
+            self.get_date_range(period_type, resolved_year)
+        data_fingerprint, segments, previous = self._fingerprint_period(
+            period_type, start_date, end_date, start_date_str, end_date_str
+        )
+        name = (f"donation_report_{period_type}_{resolved_year if resolved_year else 'current'}"
+                f"{'_' + tables[0] if len(tables) == 1 else ''}")
+
+        path = None
+        if data_fingerprint:
+            content_key = artifact_key(self.VERSION, period_type, resolved_year,
+                                       start_date_str, end_date_key, data_fingerprint)
+            key = export_key(content_key, fmt, tables, limit)
+            name = f"{name}_{content_key[:12]}"
+            path = self.reports_dir / "exports" / f"{key}.{fmt}"
+            if path.exists():
+                logger.info(f"Export cache hit — {path.name}")
+                return f"{name}.{fmt}", "file", str(path)
+
+        dataset = self._load_report_dataset(period_type, start_date_str, end_date_str,
+                                            segments, previous, limit=limit)
+        chunks = write_export(fmt, dataset_tables(dataset, tables))
+        if path is None:
+            # Unknown fingerprint: nothing to key a cached copy by
+            return f"{name}.{fmt}", "stream", chunks
+        cache_entry = dict(
+            report_id=self._generate_report_id(period_type, resolved_year, start_date_str, end_date_key),
+            period_type=period_type, year=resolved_year, data_fingerprint=data_fingerprint
+        )
+        return f"{name}.{fmt}", "stream", self._tee_to_file(chunks, path, cache_entry)
+
+    def _tee_to_file(self, chunks: Iterator[bytes], path: Path, cache_entry: dict) -> Iterator[bytes]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._catalog_report(str(path), cache_entry, size)
+
+    TRANSACTIONS_SQL = f"""
+        SELECT {", ".join(name for name, _ in TRANSACTION_COLUMNS)}
+        FROM donations_raw
+        WHERE {{where}}
+        ORDER BY payment_date, payment_id
+    """
+
+    def iter_transactions(self, start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None, school: str = None,
+                          campaign: str = None, status: str = None,
+                          batch_size: int = BATCH_ROWS) -> Iterator[List[tuple]]:
+        """
+        Raw donations in [start_date, end_date) (open ends allowed), optionally
+        of one school / campaign / payment status, in batches. stream_results
+        makes psycopg2 use a named server-side cursor, so memory holds one
+        batch however many rows match, a full-history export included.
+        """
+        params = {"start_date": start_date, "end_date": end_date,
+                  "school": school, "campaign": campaign, "status": status}
+        conditions = {
+            "start_date": "payment_date >= :start_date",
+            "end_date": "payment_date < :end_date",
+            "school": "school_name = :school",
+            "campaign": "campaign_name = :campaign",
+            "status": "payment_status = :status",
+        }
+        where = " AND ".join(sql for name, sql in conditions.items() if params[name] is not None)
+        with self.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+                text(self.TRANSACTIONS_SQL.format(where=where or "TRUE")), params
+            )
+            for rows in result.partitions(batch_size):
+                yield [tuple(row) for row in rows]
+
+    def stream_transactions(self, fmt: str, **filters) -> Iterator[bytes]:
+        """
+        iter_transactions(**filters) written as fmt. The first batch is read
+        before this returns, so an unreachable database fails the request
+        instead of truncating the download. Closing the returned iterator
+        (the client went away) closes the cursor and frees the connection.
+        """
+        batches = self.iter_transactions(**filters)
+        first = self.db_breaker.call(next, batches, [])
+        chunks = write_export(fmt, [("transactions", TRANSACTION_COLUMNS,
+                                     itertools.chain([first], batches))])
+        return self._closing(chunks, batches)
+
+    @staticmethod
+    def _closing(chunks: Iterator[bytes], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+        try:
+            yield from chunks
+        finally:
+            batches.close()
+
+    def export_transactions(self, year: int, fiscal: bool = False,
+                            fmt: str = "csv") -> Tuple[str, Iterator[bytes]]:
+        """Every donation of a calendar or fiscal year, one row each, as (filename, chunks); not cached"""
+        if fiscal:
+            start_date, end_date = fiscal_year_bounds(year)
+            label = f"FY{fiscal_year_label(year)}"
+        else:
+            start_date, end_date = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+            label = str(year)
+        return (f"donations_{label}.{fmt}",
+                self.stream_transactions(fmt, start_date=start_date, end_date=end_date))
 
     # ==================== UTILITIES ====================
-    def list_reports(self) -> List[Dict]:
-        """List all generated reports"""
+    def list_reports(self, limit: int = 50, offset: int = 0,
+                     period_type: str = None) -> Tuple[List[Dict], int]:
+        """Page through generated reports, newest first. Returns (reports, total)."""
+        rows, total = self.catalog.list(limit=limit, offset=offset, period_type=period_type)
         reports = []
-        for file in sorted(self.reports_dir.glob("*.pdf"), key=lambda x: x.stat().st_mtime, reverse=True):
-            stats = file.stat()
+        for row in rows:
+            location = row["location"]
             reports.append({
-                'filename': file.name,
-                'path': str(file),
-                'size_mb': stats.st_size / (1024 * 1024),
-                'created': datetime.fromtimestamp(stats.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
+                'filename': os.path.basename(location.split("?", 1)[0].split("://")[-1]),
+                'path': location,
+                'storage': row["storage"],
+                'period_type': row["period_type"],
+                'year': row["year"],
+                'report_id': row["report_id"],
+                'data_fingerprint': row["data_fingerprint"],
+                'size_mb': row["size_bytes"] / (1024 * 1024),
+                'created': datetime.fromtimestamp(row["created_at"]).strftime('%Y-%m-%d %H:%M:%S'),
+                'expires': datetime.fromtimestamp(row["expires_at"]).strftime('%Y-%m-%d %H:%M:%S')
+                if row["expires_at"] else None,
             })
-        return reports
+        return reports, total
 
-    def cleanup_old_reports(self, days: int = 30) -> int:
-        """Manual cleanup with custom days threshold"""
-        cutoff = datetime.now() - timedelta(days=days)
+    def sweep_reports(self, max_age_days: int = None) -> int:
+        """
+        Delete expired artifacts found by catalog query (plus, with max_age_days,
+        anything older). S3 objects and shared artifacts are only dropped from
+        the catalog — bucket lifecycle rules / the shared store own them.
+        """
         deleted = 0
-        for file in self.reports_dir.glob("*.pdf"):
-            if datetime.fromtimestamp(file.stat().st_ctime) < cutoff:
-                file.unlink()
-                deleted += 1
+        batches = [lambda: self.catalog.expired()]
+        if max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=max_age_days)).timestamp()
+            batches.append(lambda: self.catalog.created_before(cutoff))
+        for next_batch in batches:
+            while True:
+                rows = next_batch()
+                if not rows:
+                    break
+                for row in rows:
+                    self._delete_artifact(row["location"], row["storage"])
+                    self.catalog.remove(row["location"])
+                    deleted += 1
+        if deleted:
+            logger.info(f"Report sweep removed {deleted} expired artifacts")
         return deleted
 
+    def _delete_artifact(self, location: str, storage: str):
+        if storage == "memory":
+            self.memory_store.delete(location)
+            location, storage = str(self.reports_dir / MemoryReportStore.name_of(location)), "disk"
+        if storage == "disk":
+            try:
+                Path(location).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Could not delete {location}: {e}")
+
+    def cleanup_old_reports(self, days: int = 30) -> int:
+        """Manual cleanup with custom days threshold"""
+        return self.sweep_reports(max_age_days=days)
+
 # ==================== CLI ====================
 def main():
     """Command-line interface"""
@@ -1789,8 +2879,8 @@ def main():
                     print("Invalid year\n")
 
             elif choice == '5':
-                reports = agent.list_reports()
-                print(f"\nReports ({len(reports)}):")
+                reports, total = agent.list_reports()
+                print(f"\nReports ({len(reports)} of {total}):")
                 print("-" * 80)
                 for i, r in enumerate(reports, 1):
                     print(f"{i}. {r['filename']}")
@@ -0,0 +1,266 @@
+"""
+Streaming anomaly detection on daily donation totals.
+
+The detector keeps a short rolling history of per-day aggregates for every
+school and payment mode (plus the organisation-wide total) and compares the
+current day against the robust median / MAD of that history. New donations
+are pulled incrementally with a (created_at, payment_id) watermark, so each
+refresh only reads rows inserted since the previous one — donations_raw is
+scanned once at warm-up and never again.
+"""
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+import logging
+import threading
+
+import numpy as np
+from sqlalchemy import text
+
+from ml.db import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Aggregate slots per (dimension, key, day)
+AMOUNT, COUNT, FAILED, ATTEMPTS = range(4)
+
+MAD_SCALE = 1.4826  # MAD -> standard deviation for normally distributed data
+
+
+def _dimensions(row):
+    """Every series a donation row contributes to"""
+    return (
+        ("overall", "all"),
+        ("school", row["school_name"] or "Not Specified"),
+        ("payment_mode", row["payment_mode"] or "Unknown"),
+    )
+
+
+class DonationAnomalyDetector:
+    """
+    Rolling robust statistics per day, school and payment mode.
+
+    Metrics checked for every series:
+    - amount        : successful amount for the day (spikes and drops)
+    - count         : successful transactions for the day (spikes and drops)
+    - failed_ratio  : failed / attempted transactions (spikes only)
+    """
+
+    def __init__(self, window_days: int = 28, min_history: int = 7,
+                 threshold: float = 3.5, min_attempts: int = 20,
+                 batch_size: int = 5000, max_alerts: int = 200):
+        self.window_days = window_days
+        self.min_history = min_history
+        self.threshold = threshold
+        self.min_attempts = min_attempts
+        self.batch_size = batch_size
+
+        # day -> {(dimension, key): [amount, count, failed, attempts]}
+        self._days: "OrderedDict[object, dict]" = OrderedDict()
+        self._watermark = None          # (created_at, payment_id)
+        self._alerts = deque(maxlen=max_alerts)
+        self._active = {}               # (dimension, key, metric, day) -> alert
+        self._lock = threading.Lock()
+        self.last_refresh = None
+
+    # ==================== INGEST ====================
+    def observe(self, row: dict):
+        """Fold one donation into the running aggregates"""
+        day = row["payment_date"].date()
+        success = row["payment_status"] == "Success"
+        buckets = self._days.get(day)
+        if buckets is None:
+            buckets = self._days[day] = {}
+            self._days = OrderedDict(sorted(self._days.items()))
+            while len(self._days) > self.window_days + 1:
+                self._days.popitem(last=False)
+            if day not in self._days:  # older than the retained window
+                return
+
+        for series in _dimensions(row):
+            acc = buckets.setdefault(series, [0.0, 0, 0, 0])
+            acc[ATTEMPTS] += 1
+            if success:
+                acc[AMOUNT] += float(row["amount"] or 0)
+                acc[COUNT] += 1
+            else:
+                acc[FAILED] += 1
+
+    def _warm_up(self, conn):
+        """
+        Seed the history with one grouped query over the retained window.
+        The watermark and the history are read in one REPEATABLE READ
+        snapshot: a row committed between the two statements would otherwise
+        be missing from the history yet sit below the watermark, and never
+        be observed.
+        """
+        since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) \
+            - timedelta(days=self.window_days)
+        conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        with conn.begin():
+            conn.execute(text("SET TRANSACTION READ ONLY"))
+            mark = conn.execute(text("""
+                SELECT created_at, payment_id
+                FROM donations_raw
+                WHERE created_at IS NOT NULL
+                ORDER BY created_at DESC, payment_id DESC
+                LIMIT 1
+            """)).fetchone()
+            rows = conn.execute(text("""
+                SELECT
+                    DATE(payment_date)                                                  AS day,
+                    COALESCE(school_name, 'Not Specified')                              AS school_name,
+                    COALESCE(payment_mode, 'Unknown')                                   AS payment_mode,
+                    COALESCE(SUM(CASE WHEN payment_status = 'Success' THEN amount END), 0) AS amount,
+                    COUNT(CASE WHEN payment_status = 'Success' THEN 1 END)             AS success,
+                    COUNT(CASE WHEN payment_status != 'Success' THEN 1 END)            AS failed
+                FROM donations_raw
+                WHERE payment_date >= :since
+                GROUP BY 1, 2, 3
+            """), {"since": since}).mappings().all()
+
+        for r in rows:
+            buckets = self._days.setdefault(r["day"], {})
+            for series in _dimensions(r):
+                acc = buckets.setdefault(series, [0.0, 0, 0, 0])
+                acc[AMOUNT] += float(r["amount"])
+                acc[COUNT] += r["success"]
+                acc[FAILED] += r["failed"]
+                acc[ATTEMPTS] += r["success"] + r["failed"]
+        self._days = OrderedDict(sorted(self._days.items()))
+
+        self._watermark = (mark[0], mark[1]) if mark else (datetime.min, 0)
+        logger.info(f"Anomaly detector warmed up with {len(self._days)} days of history")
+
+    def refresh(self) -> int:
+        """Pull donations inserted since the watermark and re-evaluate. Returns rows read."""
+        with self._lock:
+            read = 0
+            with get_engine().connect() as conn:
+                if self._watermark is None:
+                    self._warm_up(conn)
+                else:
+                    while True:
+                        rows = conn.execute(text("""
+                            SELECT payment_id, created_at, payment_date, amount,
+                                   payment_status, school_name, payment_mode
+                            FROM donations_raw
+                            WHERE (created_at, payment_id) > (:ts, :pid)
+                            ORDER BY created_at, payment_id
+                            LIMIT :batch
+                        """), {"ts": self._watermark[0], "pid": self._watermark[1],
+                               "batch": self.batch_size}).mappings().all()
+                        for r in rows:
+                            if r["payment_date"] is not None:
+                                self.observe(r)
+                        read += len(rows)
+                        if rows:
+                            self._watermark = (rows[-1]["created_at"], rows[-1]["payment_id"])
+                        if len(rows) < self.batch_size:
+                            break
+
+            self._evaluate()
+            self.last_refresh = datetime.now()
+            return read
+
+    # ==================== DETECTION ====================
+    @staticmethod
+    def _robust_score(value: float, history: np.ndarray):
+        median = float(np.median(history))
+        mad = float(np.median(np.abs(history - median)))
+        # Floor the spread so flat histories don't turn every wobble into an alert
+        spread = max(MAD_SCALE * mad, 0.05 * abs(median), 1.0)
+        return (value - median) / spread, median
+
+    def _evaluate(self):
+        # An outage means *no* rows today — the empty day still has to be checked
+        now = datetime.now()
+        if self._days and now.date() > next(reversed(self._days)):
+            self._days[now.date()] = {}
+            while len(self._days) > self.window_days + 1:
+                self._days.popitem(last=False)
+        self._active = {k: v for k, v in self._active.items() if k[3] in self._days}
+
+        if len(self._days) < 2:
+            return
+
+        days = list(self._days.keys())
+        today = days[-1]
+        history_days = days[:-1][-self.window_days:]
+        current = self._days[today]
+
+        # Expected totals scale with how much of the current day has elapsed
+        if today == now.date():
+            elapsed = (now - datetime.combine(today, datetime.min.time())).total_seconds() / 86400
+        else:
+            elapsed = 1.0
+
+        series_keys = set(current)
+        for day in history_days:
+            series_keys.update(self._days[day])
+
+        for series in series_keys:
+            past = [self._days[d].get(series, (0.0, 0, 0, 0)) for d in history_days]
+            if len(past) < self.min_history:
+                continue
+            acc = current.get(series, (0.0, 0, 0, 0))
+
+            for metric, slot in (("amount", AMOUNT), ("count", COUNT)):
+                history = np.array([p[slot] for p in past], dtype=float) * elapsed
+                score, expected = self._robust_score(float(acc[slot]), history)
+                # Drops only count once enough of the day has passed to be meaningful
+                if score >= self.threshold or (score <= -self.threshold and elapsed >= 0.25):
+                    self._raise(series, metric, today, acc[slot], expected, score)
+
+            if acc[ATTEMPTS] >= self.min_attempts:
+                ratios = np.array([p[FAILED] / p[ATTEMPTS] for p in past if p[ATTEMPTS]], dtype=float)
+                if len(ratios) >= self.min_history:
+                    ratio = acc[FAILED] / acc[ATTEMPTS]
+                    median = float(np.median(ratios))
+                    mad = float(np.median(np.abs(ratios - median)))
+                    score = (ratio - median) / max(MAD_SCALE * mad, 0.02)
+                    if score >= self.threshold:
+                        self._raise(series, "failed_ratio", today, round(ratio, 4), median, score)
+
+    def _raise(self, series, metric, day, value, expected, score):
+        dimension, key = series
+        alert_key = (dimension, key, metric, day)
+        alert = {
+            "dimension": dimension,
+            "key": key,
+            "metric": metric,
+            "day": day.isoformat(),
+            "value": round(float(value), 2),
+            "expected": round(float(expected), 2),
+            "score": round(float(score), 2),
+            "direction": "spike" if score > 0 else "drop",
+            "detected_at": datetime.now().isoformat(),
+        }
+        if alert_key in self._active:
+            # Same anomaly still in progress — update it in place
+            self._active[alert_key].update({k: alert[k] for k in ("value", "expected", "score")})
+            return
+        self._active[alert_key] = alert
+        self._alerts.append(alert)
+        logger.warning(
+            f"Donation anomaly: {dimension}={key} {metric} {alert['direction']} "
+            f"(value={alert['value']}, expected={alert['expected']}, score={alert['score']})"
+        )
+
+    def alerts(self, since_days: int = 2) -> list:
+        """Recent alerts, newest first"""
+        cutoff = (datetime.now() - timedelta(days=since_days)).date().isoformat()
+        with self._lock:
+            return [a for a in reversed(self._alerts) if a["day"] >= cutoff]
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector() -> DonationAnomalyDetector:
+    """Process-wide detector instance"""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = DonationAnomalyDetector()
+        return _detector
@@ -0,0 +1,31 @@
+"""
+Shared database engine for the ML modules, created on first use
+"""
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+import os
+import threading
+from pathlib import Path
+
+# Load environment variables from .env file
+env_path = Path(__file__).parent.parent / '.env'
+load_dotenv(dotenv_path=env_path)
+
+_engine = None
+_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the engine, creating it on first call (not at import)"""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                database_url = os.getenv("DATABASE_URL")
+                if not database_url:
+                    raise ValueError(
+                        "DATABASE_URL not found in environment variables. "
+                        "Please create a .env file in the backend directory with DATABASE_URL set."
+                    )
+                _engine = create_engine(database_url, pool_pre_ping=True)
+    return _engine
@@ -0,0 +1,328 @@
+"""
+Persisted per-donor RFM / lifetime-value summary.
+
+donor_summary holds one row per donor (recency, frequency, monetary, lifetime
+value, RFM scores and segment, first/last donation). It is refreshed
+incrementally: only donors with payments inserted after the stored
+(created_at, payment_id) watermark, less a short overlap for late commits,
+are re-aggregated; a nightly full rebuild reconciles status changes.
+All-time donor queries (top donors, frequency buckets, repeat rate) then
+read donor_summary and scale with the number of donors instead of the
+number of transactions.
+"""
+from datetime import datetime, timedelta
+import logging
+import os
+import threading
+
+from sqlalchemy import text
+
+from ml.db import get_engine
+
+logger = logging.getLogger(__name__)
+
+# How far before the watermark each incremental refresh looks again
+OVERLAP_MINUTES = int(os.getenv("DONOR_SUMMARY_OVERLAP_MINUTES", 15))
+
+# The only definition of these tables (schema.sql points here). The two
+# donations_raw indexes serve the per-donor re-aggregation and the
+# (created_at, payment_id) watermark scans.
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS donor_summary (
+        donor_email       TEXT PRIMARY KEY,
+        donor_name        TEXT,
+        first_donation    TIMESTAMP,
+        last_donation     TIMESTAMP,
+        donation_count    INTEGER NOT NULL DEFAULT 0,
+        total_amount      NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        avg_amount        NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        recency_days      INTEGER,
+        annual_value      NUMERIC(14, 2),
+        r_score           SMALLINT,
+        f_score           SMALLINT,
+        m_score           SMALLINT,
+        rfm_segment       VARCHAR(32),
+        refreshed_at      TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+    CREATE INDEX IF NOT EXISTS idx_donor_summary_total ON donor_summary (total_amount DESC);
+    CREATE INDEX IF NOT EXISTS idx_donor_summary_segment ON donor_summary (rfm_segment);
+    CREATE TABLE IF NOT EXISTS donor_summary_state (
+        id                SMALLINT PRIMARY KEY DEFAULT 1,
+        last_created_at   TIMESTAMP,
+        last_payment_id   BIGINT,
+        refreshed_at      TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_donations_donor_email ON donations_raw (donor_email);
+    CREATE INDEX IF NOT EXISTS idx_donations_created_at ON donations_raw (created_at, payment_id)
+"""
+
+# Fixed thresholds keep every donor's score independent of the others,
+# which is what makes per-donor incremental refresh possible.
+R_SCORE_SQL = """
+    CASE
+        WHEN {recency} <= 30  THEN 4
+        WHEN {recency} <= 90  THEN 3
+        WHEN {recency} <= 365 THEN 2
+        ELSE 1
+    END"""
+
+F_SCORE_SQL = """
+    CASE
+        WHEN {count} > 10 THEN 4
+        WHEN {count} >= 6 THEN 3
+        WHEN {count} >= 2 THEN 2
+        ELSE 1
+    END"""
+
+M_SCORE_SQL = """
+    CASE
+        WHEN {total} >= 100000 THEN 4
+        WHEN {total} >= 25000  THEN 3
+        WHEN {total} >= 5000   THEN 2
+        ELSE 1
+    END"""
+
+SEGMENT_SQL = """
+    CASE
+        WHEN {r} >= 3 AND {f} >= 3 THEN 'Champions'
+        WHEN {f} >= 3               THEN 'Loyal'
+        WHEN {r} = 4 AND {f} = 1    THEN 'New'
+        WHEN {r} = 1                THEN 'Lapsed'
+        WHEN {r} = 2 AND {f} >= 2   THEN 'At Risk'
+        ELSE 'Needs Attention'
+    END"""
+
+_recency = "(CURRENT_DATE - DATE(a.last_donation))"
+_r = R_SCORE_SQL.format(recency=_recency)
+_f = F_SCORE_SQL.format(count="a.donation_count")
+_m = M_SCORE_SQL.format(total="a.total_amount")
+
+UPSERT_SQL = f"""
+    WITH touched AS (
+        SELECT DISTINCT donor_email
+        FROM donations_raw
+        WHERE donor_email IS NOT NULL
+          AND (created_at, payment_id) > (:since_ts, :since_id)
+          AND (created_at, payment_id) <= (:until_ts, :until_id)
+    ),
+    a AS (
+        SELECT
+            d.donor_email,
+            MAX(d.donor_name)   AS donor_name,
+            MIN(d.payment_date) AS first_donation,
+            MAX(d.payment_date) AS last_donation,
+            COUNT(*)            AS donation_count,
+            SUM(d.amount)       AS total_amount,
+            AVG(d.amount)       AS avg_amount
+        FROM donations_raw d
+        JOIN touched t USING (donor_email)
+        WHERE d.payment_status = 'Success'
+        GROUP BY d.donor_email
+    )
+    INSERT INTO donor_summary (
+        donor_email, donor_name, first_donation, last_donation, donation_count,
+        total_amount, avg_amount, recency_days, annual_value,
+        r_score, f_score, m_score, rfm_segment, refreshed_at
+    )
+    SELECT
+        a.donor_email, a.donor_name, a.first_donation, a.last_donation, a.donation_count,
+        a.total_amount, ROUND(a.avg_amount, 2), {_recency},
+        ROUND(a.total_amount * 365.0 / GREATEST(DATE(a.last_donation) - DATE(a.first_donation), 365), 2),
+        {_r}, {_f}, {_m},
+        {SEGMENT_SQL.format(r=_r, f=_f)},
+        NOW()
+    FROM a
+    ON CONFLICT (donor_email) DO UPDATE SET
+        donor_name     = EXCLUDED.donor_name,
+        first_donation = EXCLUDED.first_donation,
+        last_donation  = EXCLUDED.last_donation,
+        donation_count = EXCLUDED.donation_count,
+        total_amount   = EXCLUDED.total_amount,
+        avg_amount     = EXCLUDED.avg_amount,
+        recency_days   = EXCLUDED.recency_days,
+        annual_value   = EXCLUDED.annual_value,
+        r_score        = EXCLUDED.r_score,
+        f_score        = EXCLUDED.f_score,
+        m_score        = EXCLUDED.m_score,
+        rfm_segment    = EXCLUDED.rfm_segment,
+        refreshed_at   = EXCLUDED.refreshed_at
+"""
+
+# Recency drifts every day even without new payments; this touches only
+# donor_summary, never donations_raw.
+_s_recency = "(CURRENT_DATE - DATE(last_donation))"
+_s_r = R_SCORE_SQL.format(recency=_s_recency)
+RECENCY_SQL = f"""
+    UPDATE donor_summary SET
+        recency_days = {_s_recency},
+        r_score      = {_s_r},
+        rfm_segment  = {SEGMENT_SQL.format(r=_s_r, f="f_score")}
+"""
+
+_ready = False
+_lock = threading.Lock()
+
+
+def ensure_schema():
+    with get_engine().begin() as conn:
+        for statement in SCHEMA_SQL.split(";"):
+            if statement.strip():
+                conn.execute(text(statement))
+
+
+def refresh_donor_summary() -> int:
+    """
+    Re-aggregate only donors touched since the last refresh. Returns donors updated.
+
+    The watermark is the newest committed (created_at, payment_id), but a
+    transaction can commit after a newer row with an earlier created_at. Each
+    refresh therefore re-reads the last OVERLAP_MINUTES before the watermark
+    too; re-aggregating a donor twice is harmless. Rows committed later than
+    that, and status changes on old rows, are picked up by the nightly
+    rebuild_donor_summary().
+    """
+    with _lock, get_engine().begin() as conn:
+        state = conn.execute(text(
+            "SELECT last_created_at, last_payment_id FROM donor_summary_state WHERE id = 1 FOR UPDATE"
+        )).fetchone()
+        until = conn.execute(text("""
+            SELECT created_at, payment_id FROM donations_raw
+            WHERE created_at IS NOT NULL
+            ORDER BY created_at DESC, payment_id DESC
+            LIMIT 1
+        """)).fetchone()
+        if until is None:
+            return 0
+
+        if state and state[0]:
+            since_ts, since_id = state[0] - timedelta(minutes=OVERLAP_MINUTES), 0
+        else:
+            since_ts, since_id = datetime.min, 0
+
+        updated = conn.execute(text(UPSERT_SQL), {
+            "since_ts": since_ts, "since_id": since_id,
+            "until_ts": until[0], "until_id": until[1],
+        }).rowcount
+        _save_watermark(conn, until)
+
+    logger.info(f"Donor summary refreshed: {updated} donors updated")
+    return updated
+
+
+def _save_watermark(conn, until):
+    conn.execute(text("""
+        INSERT INTO donor_summary_state (id, last_created_at, last_payment_id, refreshed_at)
+        VALUES (1, :ts, :pid, NOW())
+        ON CONFLICT (id) DO UPDATE SET
+            last_created_at = EXCLUDED.last_created_at,
+            last_payment_id = EXCLUDED.last_payment_id,
+            refreshed_at    = EXCLUDED.refreshed_at
+    """), {"ts": until[0], "pid": until[1]})
+
+
+def refresh_recency() -> int:
+    with get_engine().begin() as conn:
+        return conn.execute(text(RECENCY_SQL)).rowcount
+
+
+def rebuild_donor_summary() -> int:
+    """
+    Re-aggregate every donor in one transaction (scheduled nightly). Reconciles
+    what the incremental refresh cannot see: late commits and payments whose
+    status changed. Donors left with no successful payment are removed.
+    Readers keep seeing the previous summary until it commits.
+    """
+    with _lock, get_engine().begin() as conn:
+        until = conn.execute(text("""
+            SELECT created_at, payment_id FROM donations_raw
+            WHERE created_at IS NOT NULL
+            ORDER BY created_at DESC, payment_id DESC
+            LIMIT 1
+        """)).fetchone()
+        if until is None:
+            return 0
+        updated = conn.execute(text(UPSERT_SQL), {
+            "since_ts": datetime.min, "since_id": 0,
+            "until_ts": until[0], "until_id": until[1],
+        }).rowcount
+        removed = conn.execute(text("""
+            DELETE FROM donor_summary s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM donations_raw d
+                WHERE d.donor_email = s.donor_email AND d.payment_status = 'Success'
+            )
+        """)).rowcount
+        _save_watermark(conn, until)
+
+    logger.info(f"Donor summary rebuilt: {updated} donors updated, {removed} removed")
+    return updated
+
+
+def ensure_donor_summary():
+    """Create and populate the summary once per process before the first read"""
+    global _ready
+    if _ready:
+        return
+    ensure_schema()
+    refresh_donor_summary()
+    _ready = True
+
+
+# ---------- READERS ----------
+def top_donors(limit: int = 10) -> list:
+    ensure_donor_summary()
+    q = text("""
+        SELECT donor_name, donor_email, total_amount::float AS total_amount, donation_count,
+               last_donation, avg_amount::float AS avg_donation, rfm_segment
+        FROM donor_summary
+        WHERE total_amount > 0
+        ORDER BY total_amount DESC
+        LIMIT :limit
+    """)
+    with get_engine().connect() as conn:
+        return [dict(r) for r in conn.execute(q, {"limit": limit}).mappings()]
+
+
+def frequency_buckets() -> list:
+    ensure_donor_summary()
+    q = text("""
+        SELECT
+            CASE
+                WHEN donation_count = 1 THEN 'One-time'
+                WHEN donation_count BETWEEN 2 AND 5 THEN 'Occasional (2-5)'
+                WHEN donation_count BETWEEN 6 AND 10 THEN 'Regular (6-10)'
+                ELSE 'Frequent (10+)'
+            END AS frequency,
+            COUNT(*) AS donor_count,
+            SUM(donation_count) AS total_donations
+        FROM donor_summary
+        GROUP BY 1
+    """)
+    with get_engine().connect() as conn:
+        return [dict(r) for r in conn.execute(q).mappings()]
+
+
+def repeat_rate() -> float:
+    """Percentage of donors with more than one successful donation"""
+    ensure_donor_summary()
+    q = text("""
+        SELECT COUNT(*) AS donors, COUNT(*) FILTER (WHERE donation_count > 1) AS repeat
+        FROM donor_summary
+    """)
+    with get_engine().connect() as conn:
+        row = conn.execute(q).fetchone()
+    return round((row[1] / row[0]) * 100, 1) if row and row[0] else 0.0
+
+
+def segment_breakdown() -> list:
+    ensure_donor_summary()
+    q = text("""
+        SELECT rfm_segment AS segment, COUNT(*) AS donors,
+               SUM(total_amount)::float AS lifetime_value,
+               ROUND(AVG(annual_value), 2)::float AS avg_annual_value
+        FROM donor_summary
+        GROUP BY rfm_segment
+        ORDER BY lifetime_value DESC
+    """)
+    with get_engine().connect() as conn:
+        return [dict(r) for r in conn.execute(q).mappings()]
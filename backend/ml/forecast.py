@@ -1,22 +1,8 @@
 import pandas as pd
-from sqlalchemy import create_engine
 from sklearn.linear_model import LinearRegression
 import numpy as np
-from dotenv import load_dotenv
-import os
-from pathlib import Path
-
-# Load environment variables from .env file
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError(
-        "DATABASE_URL not found in environment variables. "
-        "Please create a .env file in the backend directory with DATABASE_URL set."
-    )
 
-engine = create_engine(DATABASE_URL)
+from ml.db import get_engine
 
 
 # --------------------------------
@@ -32,7 +18,47 @@ def load_monthly_data():
     GROUP BY month
     ORDER BY month
     """
-    return pd.read_sql(q, engine)
+    return pd.read_sql(q, get_engine())
+
+
+# Columns a forecast can be broken down by
+SERIES_COLUMNS = ("school_name", "campaign_name")
+
+# DATE_TRUNC unit, pandas frequency and season length of each aggregation
+FREQUENCIES = {"monthly": ("month", "MS", 12), "weekly": ("week", "W-MON", 52)}
+
+
+def load_series_by(column="school_name", freq="monthly"):
+    """Monthly or weekly totals per value of `column`, as a (series x period) matrix"""
+    if column not in SERIES_COLUMNS:
+        raise ValueError(f"Unsupported grouping column: {column}")
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unknown forecast frequency: {freq}")
+    unit, pandas_freq, _ = FREQUENCIES[freq]
+    q = f"""
+    SELECT
+        {column} AS series,
+        DATE_TRUNC('{unit}', payment_date) AS period,
+        SUM(amount) AS total
+    FROM donations_raw
+    WHERE payment_status = 'Success'
+      AND {column} IS NOT NULL
+    GROUP BY series, period
+    ORDER BY period
+    """
+    df = pd.read_sql(q, get_engine())
+    if df.empty:
+        return df
+    matrix = df.pivot_table(index="series", columns="period", values="total", aggfunc="sum")
+    full_range = pd.date_range(matrix.columns.min(), matrix.columns.max(), freq=pandas_freq)
+    return matrix.reindex(columns=full_range, fill_value=0).fillna(0)
+
+
+def _regular_series(df, time_col="month", freq="MS"):
+    """Fill calendar gaps with zero so every step is one period apart"""
+    series = df.set_index(pd.to_datetime(df[time_col]))["total"].astype(float)
+    full_range = pd.date_range(series.index.min(), series.index.max(), freq=freq)
+    return series.reindex(full_range, fill_value=0.0)
 
 
 # --------------------------------
@@ -74,10 +100,112 @@ def ml_forecast(df):
     return model.predict(next_t)[0]
 
 
+# --------------------------------
+# SEASONAL FORECAST (HOLT-WINTERS)
+# --------------------------------
+HW_ALPHAS = np.round(np.linspace(0.1, 0.9, 9), 2)
+HW_BETAS = np.array([0.0, 0.05, 0.1, 0.2, 0.3])
+HW_GAMMAS = np.round(np.linspace(0.1, 0.9, 9), 2)
+
+
+def holt_winters_fit(Y, season_length=12, horizon=1,
+                     alphas=HW_ALPHAS, betas=HW_BETAS, gammas=HW_GAMMAS):
+    """
+    Additive Holt-Winters fitted to many series at once.
+
+    Y is a (n_series, n_periods) array of evenly spaced totals. Every
+    (alpha, beta, gamma) combination of the grid is run for every series in
+    a single pass over time, so the work per step is one array operation of
+    shape (n_series, n_grid). The combination with the lowest one-step-ahead
+    squared error (after the first season, which seeds the state) wins.
+
+    Returns a dict of arrays indexed by series: forecast (n_series, horizon),
+    alpha, beta, gamma and rmse.
+    """
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    n_series, n_obs = Y.shape
+    m = season_length
+    if n_obs < 2 * m:
+        raise ValueError(f"Holt-Winters needs at least {2 * m} periods, got {n_obs}")
+
+    a, b, g = (p.ravel() for p in np.meshgrid(alphas, betas, gammas, indexing="ij"))
+    n_grid = a.size
+
+    # Initial state from the first two seasons, broadcast to (series, grid)
+    level0 = Y[:, :m].mean(axis=1)
+    trend0 = (Y[:, m:2 * m].mean(axis=1) - level0) / m
+    level = np.repeat(level0[:, None], n_grid, axis=1)
+    trend = np.repeat(trend0[:, None], n_grid, axis=1)
+    season = np.repeat((Y[:, :m] - level0[:, None])[:, None, :], n_grid, axis=1)
+
+    sse = np.zeros((n_series, n_grid))
+    for t in range(n_obs):
+        y = Y[:, t][:, None]
+        s = season[:, :, t % m]
+        err = y - (level + trend + s)
+        if t >= m:
+            sse += err ** 2
+
+        new_level = a * (y - s) + (1 - a) * (level + trend)
+        trend = b * (new_level - level) + (1 - b) * trend
+        season[:, :, t % m] = g * (y - new_level) + (1 - g) * s
+        level = new_level
+
+    best = sse.argmin(axis=1)
+    rows = np.arange(n_series)
+    steps = np.arange(1, horizon + 1)
+    season_idx = (n_obs + steps - 1) % m
+    forecast = (
+        level[rows, best][:, None]
+        + steps[None, :] * trend[rows, best][:, None]
+        + season[rows, best][:, season_idx]
+    )
+
+    return {
+        "forecast": forecast,
+        "alpha": a[best],
+        "beta": b[best],
+        "gamma": g[best],
+        "rmse": np.sqrt(sse[rows, best] / (n_obs - m)),
+    }
+
+
+def seasonal_forecast(df, season_length=12, time_col="month", freq="MS"):
+    """Next-period Holt-Winters forecast for one aggregate series, or None"""
+    series = _regular_series(df, time_col, freq)
+    if len(series) < 2 * season_length:
+        return None
+    fit = holt_winters_fit(series.values[None, :], season_length=season_length)
+    return float(fit["forecast"][0, 0])
+
+
+def seasonal_forecast_by(column="school_name", freq="monthly", horizon=1):
+    """
+    Batched Holt-Winters forecast of the next `horizon` months or weeks for
+    every school / campaign at once: {name: [amount per period]}. Empty until
+    two full seasons (24 months or 104 weeks) of history exist.
+    """
+    matrix = load_series_by(column, freq)
+    season_length = FREQUENCIES[freq][2]
+    if matrix.empty or matrix.shape[1] < 2 * season_length:
+        return {}
+    fit = holt_winters_fit(matrix.values, season_length=season_length, horizon=horizon)
+    return {
+        name: [max(round(float(v), 2), 0.0) for v in fit["forecast"][i]]
+        for i, name in enumerate(matrix.index)
+    }
+
+
 # --------------------------------
 # FINAL DECISION ENGINE
 # --------------------------------
-def next_month_forecast():
+FORECAST_METHODS = ("hybrid", "statistical", "ml", "holt_winters")
+
+
+def next_month_forecast(method="hybrid"):
+    if method not in FORECAST_METHODS:
+        raise ValueError(f"Unknown forecast method: {method}")
+
     df = load_monthly_data()
 
     if len(df) < 3:
@@ -88,17 +216,33 @@ def next_month_forecast():
         }
 
     stat_pred = statistical_forecast(df)
-    ml_pred = ml_forecast(df)
+    ml_pred = ml_forecast(df) if method in ("hybrid", "ml") else None
+    hw_pred = seasonal_forecast(df) if method == "holt_winters" else None
 
     # Decision logic
-    if ml_pred is not None:
+    if hw_pred is not None:
+        final_pred = hw_pred
+        basis = "Seasonal: Holt-Winters"
+        confidence = "High"
+    elif method == "statistical":
+        final_pred = stat_pred
+        basis = "Statistical"
+        confidence = "Medium"
+    elif ml_pred is not None and method == "ml":
+        final_pred = ml_pred
+        basis = "ML: Linear trend"
+        confidence = "Medium"
+    elif ml_pred is not None:
         # Blend for stability
         final_pred = (0.6 * stat_pred) + (0.4 * ml_pred)
         basis = "Hybrid: Statistical + ML"
         confidence = "High"
     else:
         final_pred = stat_pred
-        basis = "Statistical (ML warming up)"
+        basis = (
+            "Statistical (Holt-Winters needs 24 months)"
+            if method == "holt_winters" else "Statistical (ML warming up)"
+        )
         confidence = "Medium"
 
     # Safety clamp
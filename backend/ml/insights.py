@@ -1,34 +1,19 @@
 import pandas as pd
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
-import os
-from pathlib import Path
 
-# Load environment variables from .env file
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError(
-        "DATABASE_URL not found in environment variables. "
-        "Please create a .env file in the backend directory with DATABASE_URL set."
-    )
-
-engine = create_engine(DATABASE_URL)
+from ml.db import get_engine
+from ml.donor_summary import repeat_rate
 
 
 # ---------- BASE DATA ----------
 def load_data():
     q = "SELECT * FROM donations_raw WHERE payment_status='Success'"
-    return pd.read_sql(q, engine)
+    return pd.read_sql(q, get_engine())
 
 
 # ---------- AI INSIGHTS ----------
 def donor_retention():
-    df = load_data()
-    donors = df.groupby("donor_email").size()
-    retained = (donors > 1).sum()
-    return round((retained / len(donors)) * 100, 1)
+    # Reads the persisted per-donor summary instead of every donation row
+    return repeat_rate()
 
 
 def peak_donation_day():
@@ -42,7 +27,7 @@ def peak_donation_day():
     ORDER BY cnt DESC
     LIMIT 1
     """
-    df = pd.read_sql(q, engine)
+    df = pd.read_sql(q, get_engine())
     return df.iloc[0]["day"].strip()
 
 
@@ -55,7 +40,7 @@ def top_school():
     ORDER BY total DESC
     LIMIT 1
     """
-    df = pd.read_sql(q, engine)
+    df = pd.read_sql(q, get_engine())
     return df.iloc[0]["school_name"], int(df.iloc[0]["total"])
 
 
@@ -73,7 +58,7 @@ def weekend_performance():
     WHERE payment_status = 'Success'
     GROUP BY d, day_type
     """
-    df = pd.read_sql(q, engine)
+    df = pd.read_sql(q, get_engine())
 
     if df.empty:
         return 0.0
@@ -94,7 +79,7 @@ def organization_engagement():
     WHERE payment_status='Success'
     GROUP BY donor_type
     """
-    df = pd.read_sql(q, engine).set_index("donor_type")
+    df = pd.read_sql(q, get_engine()).set_index("donor_type")
 
     # Organisation-level donors may be labelled Corporate, NGO, or Organization
     org_labels = [l for l in ("Corporate", "NGO", "Organization") if l in df.index]
@@ -111,10 +96,7 @@ def organization_engagement():
 
 
 def repeat_donors():
-    df = load_data()
-    donors = df.groupby("donor_email").size()
-    repeat = (donors > 1).sum()
-    return round((repeat / len(donors)) * 100, 1)
+    return repeat_rate()
 
 
 def upi_payments_percentage():
@@ -124,7 +106,7 @@ def upi_payments_percentage():
     WHERE payment_status='Success'
     GROUP BY payment_mode
     """
-    df = pd.read_sql(q, engine)
+    df = pd.read_sql(q, get_engine())
 
     total = df["cnt"].sum()
     upi = df[df["payment_mode"].str.contains("upi", case=False, na=False)]["cnt"].sum()
@@ -139,7 +121,7 @@ def seasonal_trends():
     WHERE payment_status='Success'
     GROUP BY m
     """
-    df = pd.read_sql(q, engine)
+    df = pd.read_sql(q, get_engine())
     peak_month = int(df.sort_values("total", ascending=False).iloc[0]["m"])
 
     return "Oct–Dec" if peak_month in (10, 11, 12) else "Other"
@@ -10,21 +10,17 @@ import os
 import uuid
 from pathlib import Path
 import mimetypes
-from datetime import datetime
-from models import get_db
+from models import get_db, get_db_context
 from models.admin_models import UploadedFile
-import boto3
-from botocore.exceptions import ClientError
+from services.uploads import get_upload_service
 
 router = APIRouter(prefix="/api/upload", tags=["upload"])
 
 # Configuration
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
 USE_S3 = os.getenv("USE_S3", "false").lower() == "true"
-AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
-AWS_SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
-AWS_REGION = os.getenv("AWS_REGION", "ap-southeast-2")
-S3_BUCKET = os.getenv("S3_BUCKET_NAME")
+# Respond once the file is on local disk; S3 upload continues in the background
+UPLOAD_IN_BACKGROUND = os.getenv("S3_UPLOAD_BACKGROUND", "true").lower() == "true"
 
 # Ensure upload directory exists
 Path(UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
@@ -44,34 +40,34 @@ class FileUploadResponse(BaseModel):
     mime_type: str
     storage_type: str
 
-def get_s3_client():
-    """Get configured S3 client"""
-    if not USE_S3:
-        return None
-    return boto3.client(
-        's3',
-        aws_access_key_id=AWS_ACCESS_KEY,
-        aws_secret_access_key=AWS_SECRET_KEY,
-        region_name=AWS_REGION
-    )
-
-def upload_to_s3(file_path: str, filename: str) -> Optional[str]:
-    """Upload file to S3 and return URL"""
+def upload_to_s3(file_path: str, content_type: str = None) -> Optional[str]:
+    """Upload file to S3 through the shared upload service and return URL"""
     try:
-        s3_client = get_s3_client()
-        if not s3_client or not S3_BUCKET:
+        service = get_upload_service()
+        if not service:
             return None
-        
-        s3_key = f"uploads/{datetime.now().year}/{datetime.now().month}/{filename}"
-        s3_client.upload_file(file_path, S3_BUCKET, s3_key)
-        
-        # Generate URL
-        url = f"https://{S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{s3_key}"
-        return url
-    except ClientError as e:
+        result = service.upload_file(file_path, "uploads", content_type=content_type)
+        return service.public_url(result.key)
+    except Exception as e:
         print(f"S3 upload failed: {e}")
         return None
 
+def schedule_s3_upload(file_id, file_path: str, content_type: str = None):
+    """Upload after the response; the file record switches to S3 once the object exists"""
+    service = get_upload_service()
+    if not service:
+        return
+
+    def mark_uploaded(result):
+        with get_db_context() as db:
+            db_file = db.query(UploadedFile).filter(UploadedFile.id == file_id).first()
+            if db_file:
+                db_file.storage_type = "s3"
+                db_file.s3_url = service.public_url(result.key)
+
+    service.submit(service.upload_file, file_path, "uploads",
+                   content_type=content_type, on_done=mark_uploaded)
+
 def validate_file(file: UploadFile, allowed_types: set) -> None:
     """Validate file type and size"""
     # Check file type
@@ -118,11 +114,11 @@ async def upload_image(
     # Get file size
     file_size = os.path.getsize(file_path)
     
-    # Upload to S3 if configured
+    # Upload to S3 if configured (after the commit below when in the background)
     s3_url = None
     storage_type = "local"
-    if USE_S3:
-        s3_url = upload_to_s3(file_path, stored_filename)
+    if USE_S3 and not UPLOAD_IN_BACKGROUND:
+        s3_url = upload_to_s3(file_path, file.content_type)
         if s3_url:
             storage_type = "s3"
     
@@ -150,6 +146,9 @@ async def upload_image(
         if os.path.exists(file_path):
             os.remove(file_path)
         raise HTTPException(status_code=500, detail=f"Failed to save file record: {str(e)}")
+
+    if USE_S3 and UPLOAD_IN_BACKGROUND:
+        schedule_s3_upload(db_file.id, file_path, file.content_type)
     
     # Generate file URL
     if storage_type == "s3" and s3_url:
@@ -193,11 +192,11 @@ async def upload_document(
     # Get file size
     file_size = os.path.getsize(file_path)
     
-    # Upload to S3 if configured
+    # Upload to S3 if configured (after the commit below when in the background)
     s3_url = None
     storage_type = "local"
-    if USE_S3:
-        s3_url = upload_to_s3(file_path, stored_filename)
+    if USE_S3 and not UPLOAD_IN_BACKGROUND:
+        s3_url = upload_to_s3(file_path, file.content_type)
         if s3_url:
             storage_type = "s3"
     
@@ -225,6 +224,9 @@ async def upload_document(
         if os.path.exists(file_path):
             os.remove(file_path)
         raise HTTPException(status_code=500, detail=f"Failed to save file record: {str(e)}")
+
+    if USE_S3 and UPLOAD_IN_BACKGROUND:
+        schedule_s3_upload(db_file.id, file_path, file.content_type)
     
     # Generate file URL
     if storage_type == "s3" and s3_url:
@@ -268,19 +270,18 @@ def delete_file(file_id: str, db: Session = Depends(get_db)):
     if not db_file:
         raise HTTPException(status_code=404, detail="File not found")
     
-    # Delete from S3 if applicable
-    if db_file.storage_type == "s3" and USE_S3:
+    # Delete from S3 if applicable — objects are content-addressed, so only
+    # when no other record points at the same object
+    if db_file.storage_type == "s3" and USE_S3 and db_file.s3_url:
         try:
-            s3_client = get_s3_client()
-            if s3_client and S3_BUCKET:
-                # Extract S3 key from the stored URL
-                if db_file.s3_url:
-                    # URL format: https://bucket.s3.region.amazonaws.com/uploads/year/month/file
-                    s3_key = db_file.s3_url.split(".amazonaws.com/", 1)[-1]
-                else:
-                    s3_key = f"uploads/{datetime.now().year}/{datetime.now().month}/{db_file.stored_filename}"
-                s3_client.delete_object(Bucket=S3_BUCKET, Key=s3_key)
-        except ClientError as e:
+            service = get_upload_service()
+            shared = db.query(UploadedFile).filter(
+                UploadedFile.s3_url == db_file.s3_url, UploadedFile.id != db_file.id
+            ).count()
+            s3_key = service.key_from_url(db_file.s3_url) if service else None
+            if s3_key and not shared:
+                service.delete(s3_key)
+        except Exception as e:
             print(f"S3 deletion failed: {e}")
     
     # Delete local file
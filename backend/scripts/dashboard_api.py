@@ -6,6 +6,9 @@ import logging
 import os
 from dotenv import load_dotenv
 
+from ml import donor_summary
+from services.report_periods import fiscal_year_of
+
 load_dotenv()  # loads .env into environment variables
 DATABASE_URL = os.getenv("DATABASE_URL")
 engine = create_engine(DATABASE_URL)
@@ -26,9 +29,17 @@ def get_date_filter(period):
     elif period == 'monthly':
         start_date = end_date - timedelta(days=30)
         return "AND payment_date >= :start_date", {'start_date': start_date}, "DATE(payment_date)"
+    elif period == 'quarterly':
+        # Current fiscal quarter (Apr–Jun, Jul–Sep, Oct–Dec, Jan–Mar) to date
+        start_date = datetime(end_date.year, (end_date.month - 1) // 3 * 3 + 1, 1)
+        return "AND payment_date >= :start_date", {'start_date': start_date}, "DATE_TRUNC('week', payment_date)"
     elif period == 'yearly':
         start_date = end_date - timedelta(days=365)
         return "AND payment_date >= :start_date", {'start_date': start_date}, "DATE_TRUNC('month', payment_date)"
+    elif period == 'fiscal_yearly':
+        # Current Indian fiscal year (from 1 April) to date
+        start_date = datetime(fiscal_year_of(end_date), 4, 1)
+        return "AND payment_date >= :start_date", {'start_date': start_date}, "DATE_TRUNC('month', payment_date)"
     else:  # 'all' or any other value
         return "", {}, "DATE_TRUNC('month', payment_date)"
 
@@ -78,7 +89,7 @@ def get_dashboard_data(period='monthly'):
     Get dashboard data for the specified period using multiple optimized queries.
     
     Parameters:
-    - period: 'weekly', 'monthly', 'yearly', or 'all' for all time
+    - period: 'weekly', 'monthly', 'quarterly', 'yearly', 'fiscal_yearly', or 'all' for all time
     """
     date_filter, params, trend_interval = get_date_filter(period)
     
@@ -127,9 +138,9 @@ def get_dashboard_data(period='monthly'):
             trend['date'] = pd.to_datetime(trend['date'])
             
             # Format based on period
-            if period in ['yearly', 'all']:
+            if period in ['yearly', 'fiscal_yearly', 'all']:
                 trend['date'] = trend['date'].dt.strftime('%b %Y')
-            elif period in ['weekly', 'monthly']:
+            elif period in ['weekly', 'monthly', 'quarterly']:
                 trend['date'] = trend['date'].dt.strftime('%b %d')
         except Exception as e:
             logger.warning(f"Could not format trend dates: {e}")
@@ -232,26 +243,72 @@ def get_dashboard_data(period='monthly'):
     with engine.connect() as connection:
         payment_mode = pd.read_sql(payment_mode_query, connection, params=params)
 
-    # ---------------- Top Donors ----------------
-    top_donors_query = text(f"""
-        SELECT
-            donor_name,
-            COALESCE(SUM(amount), 0) AS total_amount,
-            COUNT(*) AS donation_count,
-            MAX(payment_date) AS last_donation,
-            ROUND(AVG(amount), 2) AS avg_donation
-        FROM donations_raw
-        WHERE payment_status = 'Success'
-        {date_filter}
-        GROUP BY donor_name
-        HAVING COALESCE(SUM(amount), 0) > 0
-        ORDER BY total_amount DESC
-        LIMIT 10
-    """)
+    # ---------------- Top Donors & Donation Frequency ----------------
+    # All-time donor aggregates are read from the persisted donor_summary
+    # table (one row per donor) instead of re-grouping every donation. Its
+    # donors are keyed by donor_email, the dated branch groups by donor_name.
+    if not date_filter:
+        top_donors = pd.DataFrame(
+            donor_summary.top_donors(10),
+            columns=["donor_name", "total_amount", "donation_count", "last_donation", "avg_donation"]
+        )
+        donation_frequency = pd.DataFrame(
+            donor_summary.frequency_buckets(),
+            columns=["frequency", "donor_count", "total_donations"]
+        )
+    else:
+        top_donors_query = text(f"""
+            SELECT
+                donor_name,
+                COALESCE(SUM(amount), 0) AS total_amount,
+                COUNT(*) AS donation_count,
+                MAX(payment_date) AS last_donation,
+                ROUND(AVG(amount), 2) AS avg_donation
+            FROM donations_raw
+            WHERE payment_status = 'Success'
+            {date_filter}
+            GROUP BY donor_name
+            HAVING COALESCE(SUM(amount), 0) > 0
+            ORDER BY total_amount DESC
+            LIMIT 10
+        """)
     
-    with engine.connect() as connection:
-        top_donors = pd.read_sql(top_donors_query, connection, params=params)
+        with engine.connect() as connection:
+            top_donors = pd.read_sql(top_donors_query, connection, params=params)
+    
+        # ---------------- Donation Frequency ----------------
+        frequency_query = text(f"""
+            WITH donor_frequency AS (
+                SELECT
+                    donor_email,
+                    COUNT(*) as donation_count
+                FROM donations_raw
+                WHERE payment_status = 'Success'
+                {date_filter}
+                GROUP BY donor_email
+            )
+            SELECT
+                CASE
+                    WHEN donation_count = 1 THEN 'One-time'
+                    WHEN donation_count BETWEEN 2 AND 5 THEN 'Occasional (2-5)'
+                    WHEN donation_count BETWEEN 6 AND 10 THEN 'Regular (6-10)'
+                    ELSE 'Frequent (10+)'
+                END as frequency,
+                COUNT(*) as donor_count,
+                SUM(donation_count) as total_donations
+            FROM donor_frequency
+            GROUP BY 
+                CASE
+                    WHEN donation_count = 1 THEN 'One-time'
+                    WHEN donation_count BETWEEN 2 AND 5 THEN 'Occasional (2-5)'
+                    WHEN donation_count BETWEEN 6 AND 10 THEN 'Regular (6-10)'
+                    ELSE 'Frequent (10+)'
+                END
+        """)
     
+        with engine.connect() as connection:
+            donation_frequency = pd.read_sql(frequency_query, connection, params=params)
+
     # Convert last_donation to string format
     if not top_donors.empty and 'last_donation' in top_donors.columns:
         try:
@@ -259,39 +316,6 @@ def get_dashboard_data(period='monthly'):
         except:
             top_donors['last_donation'] = top_donors['last_donation'].astype(str)
 
-    # ---------------- Donation Frequency ----------------
-    frequency_query = text(f"""
-        WITH donor_frequency AS (
-            SELECT
-                donor_email,
-                COUNT(*) as donation_count
-            FROM donations_raw
-            WHERE payment_status = 'Success'
-            {date_filter}
-            GROUP BY donor_email
-        )
-        SELECT
-            CASE
-                WHEN donation_count = 1 THEN 'One-time'
-                WHEN donation_count BETWEEN 2 AND 5 THEN 'Occasional (2-5)'
-                WHEN donation_count BETWEEN 6 AND 10 THEN 'Regular (6-10)'
-                ELSE 'Frequent (10+)'
-            END as frequency,
-            COUNT(*) as donor_count,
-            SUM(donation_count) as total_donations
-        FROM donor_frequency
-        GROUP BY 
-            CASE
-                WHEN donation_count = 1 THEN 'One-time'
-                WHEN donation_count BETWEEN 2 AND 5 THEN 'Occasional (2-5)'
-                WHEN donation_count BETWEEN 6 AND 10 THEN 'Regular (6-10)'
-                ELSE 'Frequent (10+)'
-            END
-    """)
-    
-    with engine.connect() as connection:
-        donation_frequency = pd.read_sql(frequency_query, connection, params=params)
-
     # ---------------- Time of Day Analysis ----------------
     time_of_day_query = text(f"""
         SELECT
@@ -0,0 +1,48 @@
+"""
+Generate 80G donation receipts for a fiscal year (services/receipts.py).
+
+Re-running a year is safe: receipts keep their numbers, and unchanged
+receipts are not rendered again. Prints the batch, whose receipts can then
+be downloaded from GET /receipts/batches/{batch_id}/download.
+
+Usage (from the backend directory):
+    python scripts/generate_receipts.py --fiscal-year 2024
+    python scripts/generate_receipts.py --fiscal-year 2024 --mode donor_year --processes 8
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.receipts import MODES, ReceiptGenerator, fiscal_year_label  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fiscal-year", type=int, required=True, help="start year: 2024 = FY 2024-25")
+    parser.add_argument("--mode", choices=MODES, default="donation")
+    parser.add_argument("--processes", type=int,
+                        default=int(os.getenv("RECEIPT_PROCESSES", os.cpu_count() or 1)))
+    args = parser.parse_args()
+
+    print(f"Generating {args.mode} receipts for FY {fiscal_year_label(args.fiscal_year)} "
+          f"on {args.processes} processes", file=sys.stderr)
+    batch = ReceiptGenerator(processes=args.processes).run(
+        args.fiscal_year, args.mode,
+        progress=lambda total: print(f"  {total:,} receipts numbered", file=sys.stderr)
+    )
+    print(json.dumps(batch, indent=2))
+    sys.exit(0 if batch and batch["status"] == "completed" and not batch["failed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
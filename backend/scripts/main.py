@@ -3,41 +3,56 @@ FastAPI server for dashboard analytics
 Connects to PostgreSQL database and provides JSON data to frontend
 """
 
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
+import importlib.util
 import logging
 import os  # ← Add this import
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
+from pydantic import BaseModel, Field
+import anyio
+from starlette.concurrency import run_in_threadpool
 
 # Add parent directory to path to import ml modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ml.insights import *
-from ml.forecast import next_month_forecast
 
-# Import the optimized dashboard functions
-try:
-    from scripts.dashboard_api import (
-        get_dashboard_data, 
-        get_dashboard_data_optimized,
-        get_dashboard_data_legacy
-    )
-except ImportError:
-    # Fallback if module structure is different
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from scripts.dashboard_api import (
-        get_dashboard_data, 
-        get_dashboard_data_optimized,
-        get_dashboard_data_legacy
-    )
+def lazy_import(name: str):
+    """
+    Return a module whose body only runs on first attribute access.
+
+    Keeps pandas / scikit-learn / reportlab and their engines out of the
+    import path of this file, so the API starts serving before they load.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+insights = lazy_import("ml.insights")
+forecasting = lazy_import("ml.forecast")
+anomaly = lazy_import("ml.anomaly")
+churn = lazy_import("ml.churn")
+donor_summary = lazy_import("ml.donor_summary")
+dashboard_api = lazy_import("scripts.dashboard_api")
+report_agent = lazy_import("agent")
 
 # Import Admin Panel routes
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from routes.news import router as news_router
 from routes.team import router as team_router
 from routes.partners import router as partners_router
@@ -49,7 +64,15 @@ from routes.media_coverage import router as media_coverage_router
 
 # Import scheduler dependencies
 from apscheduler.schedulers.background import BackgroundScheduler
-from agent import FinalDonationReportAgent
+from services.report_jobs import ReportJobManager
+from services.report_prewarm import ReportPrewarmer
+from services.report_periods import MAX_COMPARISON_YEARS, YEAR_PERIODS, parse_year_spec
+from services.report_exports import MEDIA_TYPES, TABLES, missing_dependency
+from services.school_statements import get_statement_service
+from services.receipts import get_receipt_generator
+from services.circuit_breaker import breaker_states
+from services.render_metrics import render_timings
+from services.pdf_delivery import pdf_response
 
 # Setup logging
 logging.basicConfig(
@@ -58,26 +81,146 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize the Agent
-agent = FinalDonationReportAgent()
+# --- REPORT AGENT (created on first use) ---
+_agent = None
+_agent_lock = threading.Lock()
+_warmup_done = threading.Event()
+
+
+def get_agent():
+    """The process-wide FinalDonationReportAgent, built on first request"""
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                _agent = report_agent.FinalDonationReportAgent()
+    return _agent
+
+
+# REPORT_QUEUE=postgres: the API only enqueues and scripts/report_worker.py renders
+if os.getenv("REPORT_QUEUE", "local").lower() == "postgres":
+    from services.report_queue import PostgresReportQueue
+    report_jobs = PostgresReportQueue(get_agent)
+else:
+    report_jobs = ReportJobManager(get_agent)
+
+# Builds weekly / monthly / current-year reports ahead of the first request
+prewarmer = ReportPrewarmer(report_jobs.submit)
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+
+
+def warm_up():
+    """Load heavy modules and build the agent off the request path"""
+    started = time.perf_counter()
+    try:
+        for module in (insights, forecasting, dashboard_api):
+            getattr(module, "__file__")  # first attribute access runs the module body
+        get_agent()
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+    finally:
+        _warmup_done.set()
+        logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
 
 # --- AUTOMATIC CLEANUP SCHEDULER ---
 scheduler = BackgroundScheduler()
 
 def scheduled_cleanup():
-    logger.info("Running scheduled cleanup task...")
-    deleted_count = agent.cleanup_old_reports(days=30)
-    logger.info(f"Cleanup complete. Deleted {deleted_count} old reports.")
+    # Catalog query for expired artifacts — cost does not grow with reports/
+    try:
+        deleted_count = get_agent().sweep_reports(max_age_days=30)
+        logger.debug(f"Report sweep deleted {deleted_count} artifacts")
+    except Exception as e:
+        logger.error(f"Report sweep failed: {e}")
+
+def scheduled_prewarm():
+    try:
+        prewarmer.run(reason="period boundary")
+    except Exception as e:
+        logger.error(f"Report prewarm failed: {e}")
+
+def scheduled_prewarm_check():
+    try:
+        prewarmer.check_for_changes()
+    except Exception as e:
+        logger.error(f"Report prewarm check failed: {e}")
+
+def scheduled_anomaly_scan():
+    try:
+        new_rows = anomaly.get_detector().refresh()
+        logger.debug(f"Anomaly scan read {new_rows} new donations")
+    except Exception as e:
+        logger.error(f"Anomaly scan failed: {e}")
+
+def scheduled_churn_scoring():
+    try:
+        logger.info("Running scheduled churn scoring...")
+        result = churn.run_churn_scoring()
+        logger.info(f"Churn scoring complete: {result}")
+    except Exception as e:
+        logger.error(f"Churn scoring failed: {e}")
+
+def scheduled_donor_summary_refresh():
+    try:
+        donor_summary.refresh_donor_summary()
+    except Exception as e:
+        logger.error(f"Donor summary refresh failed: {e}")
+
+def scheduled_donor_summary_rebuild():
+    try:
+        donor_summary.rebuild_donor_summary()
+    except Exception as e:
+        logger.error(f"Donor summary rebuild failed: {e}")
+
+def scheduled_donor_recency_refresh():
+    try:
+        updated = donor_summary.refresh_recency()
+        logger.info(f"Donor recency refreshed for {updated} donors")
+    except Exception as e:
+        logger.error(f"Donor recency refresh failed: {e}")
 
 # --- LIFESPAN MANAGER ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    scheduler.add_job(scheduled_cleanup, 'interval', hours=24)
+    scheduler.add_job(scheduled_cleanup, 'interval',
+                      minutes=int(os.getenv("REPORT_SWEEP_MINUTES", 60)),
+                      max_instances=1, coalesce=True)
+    if PREWARM_ENABLED:
+        # Just after midnight: weekly (Mondays), monthly (the 1st) and the
+        # current-year window all roll over then. Jitter spreads replicas out.
+        scheduler.add_job(scheduled_prewarm, 'cron', hour=0,
+                          minute=int(os.getenv("PREWARM_MINUTE", 5)),
+                          jitter=int(os.getenv("PREWARM_JITTER_SECONDS", 120)),
+                          max_instances=1, coalesce=True)
+        scheduler.add_job(scheduled_prewarm_check, 'interval',
+                          minutes=int(os.getenv("PREWARM_CHECK_MINUTES", 2)), jitter=30,
+                          max_instances=1, coalesce=True)
+    scheduler.add_job(scheduled_anomaly_scan, 'interval', minutes=1,
+                      max_instances=1, coalesce=True)
+    scheduler.add_job(scheduled_churn_scoring, 'cron', hour=2, minute=30,
+                      max_instances=1, coalesce=True)
+    scheduler.add_job(scheduled_donor_summary_refresh, 'interval', minutes=5,
+                      max_instances=1, coalesce=True)
+    scheduler.add_job(scheduled_donor_recency_refresh, 'cron', hour=0, minute=15,
+                      max_instances=1, coalesce=True)
+    scheduler.add_job(scheduled_donor_summary_rebuild, 'cron', hour=3, minute=0,
+                      max_instances=1, coalesce=True)
     scheduler.start()
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    else:
+        _warmup_done.set()
     yield
     # Shutdown
     scheduler.shutdown()
+    report_jobs.shutdown()
+    get_statement_service().shutdown()
+    receipt_runner.shutdown(wait=False, cancel_futures=True)
+    from services.uploads import get_upload_service
+    upload_service = get_upload_service()
+    if upload_service:
+        upload_service.shutdown(wait=True)  # let queued S3 uploads finish
 
 # Create FastAPI app with lifespan
 app = FastAPI(
@@ -116,53 +259,374 @@ app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 # --- ENDPOINTS ---
 
+class ReportJobRequest(BaseModel):
+    period_type: str = Field(..., pattern="^(weekly|monthly|quarterly|yearly|fiscal_yearly)$")
+    year: Optional[int] = Field(None, ge=2000, le=2100)
+    force_regenerate: bool = False
+    priority: int = Field(0, ge=0, le=10)
+
+# Someone is blocked on the synchronous endpoints — serve them ahead of batch work
+INTERACTIVE_PRIORITY = 5
+REPORT_WAIT_TIMEOUT = float(os.getenv("REPORT_WAIT_TIMEOUT", 300))
+
+def _report_file_response(job, request: Request):
+    """Redirect to S3, or stream the PDF from memory / disk with ETag and Range support"""
+    artifact = get_agent().open_report(job.result or "")
+    if artifact is None:
+        # Evicted, or rendered by a worker on another machine without shared storage
+        raise HTTPException(status_code=404, detail="Report file is not available on this node")
+    kind, value = artifact
+    if kind == "url":
+        # Presigned URLs expire — never let a browser cache the redirect itself
+        return RedirectResponse(value, status_code=307, headers={"Cache-Control": "no-store"})
+    filename = os.path.basename(job.result.split("://")[-1])
+    if kind == "bytes":
+        data, etag = value
+        return pdf_response(request, filename, data=data, etag=etag)
+    return pdf_response(request, filename, path=value)
+
+def _serve_report(request: Request, period_type: str, year: int = None):
+    """Submit (or join) the report job and wait for it — keeps the GET endpoints synchronous"""
+    job = report_jobs.submit(period_type, year=year, priority=INTERACTIVE_PRIORITY)
+    if not job.wait(REPORT_WAIT_TIMEOUT):
+        # Still building: hand the caller the job to poll instead of timing out
+        return JSONResponse(
+            status_code=202,
+            content=job.to_dict(),
+            headers={"Location": f"/reports/jobs/{job.job_id}"}
+        )
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    return _report_file_response(job, request)
+
+@app.post("/reports/jobs", status_code=202)
+def submit_report_job(request: ReportJobRequest):
+    """Queue a report build; identical in-flight requests share one job"""
+    try:
+        job = report_jobs.submit(
+            request.period_type, year=request.year,
+            force_regenerate=request.force_regenerate,
+            priority=request.priority
+        )
+        return JSONResponse(
+            status_code=202,
+            content=job.to_dict(),
+            headers={"Location": f"/reports/jobs/{job.job_id}"}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/reports/jobs/{job_id}")
+def get_report_job(job_id: str):
+    """Poll status and progress of a report job"""
+    job = report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    data = job.to_dict()
+    if job.status == "completed":
+        data["download_url"] = f"/reports/jobs/{job_id}/download"
+    return data
+
+@app.get("/reports/jobs/{job_id}/download")
+def download_report_job(job_id: str, request: Request):
+    """Fetch the finished PDF of a report job"""
+    job = report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Report not ready ({job.progress}% - {job.stage})")
+    return _report_file_response(job, request)
+
+@app.get("/reports")
+def list_reports(
+    limit: int = Query(50, ge=1, le=500, description="Page size"),
+    offset: int = Query(0, ge=0, description="Reports to skip"),
+    period_type: Optional[str] = Query(None, description="Only this period type")
+):
+    """Generated reports on this node, newest first, from the report catalog"""
+    try:
+        reports, total = get_agent().list_reports(limit=limit, offset=offset, period_type=period_type)
+        return {"reports": reports, "total": total, "limit": limit, "offset": offset}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing reports: {str(e)}")
+
+@app.get("/reports/schools/{period_type}")
+def get_school_statements(
+    period_type: str,
+    year: Optional[int] = Query(None, ge=2000, le=2100,
+                                description="Yearly / fiscal-yearly statements: which (fiscal) year")
+):
+    """One donation statement PDF per school in the period, streamed as a ZIP"""
+    agent = get_agent()
+    try:
+        start_date, end_date, start_date_str, end_date_str, _ = agent.get_date_range(
+            period_type, year if period_type in YEAR_PERIODS else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        schools = agent.build_school_datasets(start_date_str, end_date_str)
+    except Exception as e:
+        logger.error(f"Error fetching school statement data: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Could not load school data: {str(e)}")
+    if not schools:
+        raise HTTPException(status_code=404, detail="No school donations in this period")
+
+    filename = f"school_statements_{period_type}_{year or start_date.year}.zip"
+    return StreamingResponse(
+        get_statement_service().stream_zip(schools, period_type, start_date, end_date),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"',
+                 "X-School-Count": str(len(schools))}
+    )
+
+# ==================== 80G RECEIPTS ====================
+class ReceiptBatchRequest(BaseModel):
+    fiscal_year: int = Field(..., ge=2000, le=2100, description="FY start year: 2024 = April 2024 - March 2025")
+    mode: str = Field("donation", pattern="^(donation|donor_year)$")
+
+# Batches are long and CPU-heavy (they fan out to their own process pool): one at a time
+receipt_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="receipts")
+
+@app.post("/receipts/batches", status_code=202)
+def create_receipt_batch(request: ReceiptBatchRequest):
+    """Generate (or refresh) the receipts of a fiscal year in the background"""
+    generator = get_receipt_generator()
+    try:
+        batch_id = generator.create_batch(request.fiscal_year, request.mode)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not create receipt batch: {str(e)}")
+    receipt_runner.submit(generator.run, request.fiscal_year, request.mode, batch_id)
+    return JSONResponse(
+        status_code=202,
+        content=generator.get_batch(batch_id),
+        headers={"Location": f"/receipts/batches/{batch_id}"}
+    )
+
+@app.get("/receipts/batches/{batch_id}")
+def get_receipt_batch(batch_id: str):
+    batch = get_receipt_generator().get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Receipt batch not found")
+    if batch["status"] == "completed":
+        batch["download_url"] = f"/receipts/batches/{batch_id}/download"
+    return batch
+
+@app.get("/receipts/batches/{batch_id}/download")
+def download_receipt_batch(batch_id: str):
+    """All receipts of a finished batch as a streamed ZIP"""
+    generator = get_receipt_generator()
+    batch = generator.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Receipt batch not found")
+    if batch["status"] == "running":
+        raise HTTPException(status_code=409, detail="Receipt batch is still running")
+    filename = f"receipts_FY{batch['fiscal_year']}_{batch['mode']}_{batch_id[:8]}.zip"
+    return StreamingResponse(
+        generator.stream_batch_zip(batch_id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.get("/reports/weekly")
-def get_weekly_report():
+def get_weekly_report(request: Request):
     try:
         # Check cache logic is already inside generate_report
-        file_path = agent.generate_report(period_type='weekly')
-        return FileResponse(
-            path=file_path, 
-            filename=os.path.basename(file_path),
-            media_type='application/pdf'
-        )
+        return _serve_report(request, 'weekly')
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating weekly report: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/reports/monthly")
-def get_monthly_report():
+def get_monthly_report(request: Request):
     try:
-        file_path = agent.generate_report(period_type='monthly')
-        return FileResponse(
-            path=file_path, 
-            filename=os.path.basename(file_path),
-            media_type='application/pdf'
-        )
+        return _serve_report(request, 'monthly')
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating monthly report: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/reports/yearly/{year}")
-def get_yearly_report(year: int):
+def get_yearly_report(year: int, request: Request):
     try:
-        file_path = agent.generate_report(period_type='yearly', year=year)
-        return FileResponse(
-            path=file_path, 
-            filename=os.path.basename(file_path),
-            media_type='application/pdf'
-        )
+        return _serve_report(request, 'yearly', year=year)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating yearly report: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/reports/quarterly")
+def get_quarterly_report(request: Request):
+    try:
+        return _serve_report(request, 'quarterly')
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating quarterly report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/reports/fiscal_yearly/{year}")
+def get_fiscal_yearly_report(year: int, request: Request):
+    """Fiscal year starting 1 April of `year` (2024 = FY 2024-25)"""
+    try:
+        return _serve_report(request, 'fiscal_yearly', year=year)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating fiscal-year report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/reports/comparison")
+def get_year_comparison(
+    request: Request,
+    years: str = Query(..., description="Years to compare, e.g. 2022,2023,2024 or 2021-2025"),
+    fiscal: bool = Query(False, description="Fiscal years (April - March) instead of calendar years"),
+    format: str = Query("pdf", regex="^(pdf|json)$")
+):
+    """Years side by side by month, with growth, school / campaign changes and donor retention"""
+    try:
+        year_list = parse_year_spec(years, max_years=MAX_COMPARISON_YEARS)
+        agent = get_agent()
+        comparison = agent.build_year_comparison(year_list, fiscal=fiscal)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error building year comparison: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Could not load comparison data: {str(e)}")
+    if format == "json":
+        return comparison
+    filename = f"year_comparison_{'FY' if fiscal else ''}{year_list[0]}-{year_list[-1]}.pdf"
+    return pdf_response(request, filename, data=agent.render_year_comparison(comparison))
+
+# ==================== TABULAR EXPORTS ====================
+EXPORT_FORMAT = "^(csv|xlsx|parquet)$"
+
+def _require_export_format(format: str):
+    module = missing_dependency(format)
+    if module:
+        raise HTTPException(status_code=501, detail=f"{format} exports need {module}, which is not installed")
+
+async def _until_disconnected(request: Request, chunks):
+    """
+    Pull chunks on a worker thread one at a time and stop once the client
+    is gone. Closing chunks releases what feeds them (the DB cursor, a
+    half-written cache file) right away instead of whenever they are
+    garbage collected; shielded, since a disconnect also cancels the response.
+    """
+    try:
+        while True:
+            chunk = await run_in_threadpool(next, chunks, None)
+            if chunk is None:
+                break
+            if await request.is_disconnected():
+                logger.info(f"Client left during {request.url.path} — export stopped")
+                break
+            yield chunk
+    finally:
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(chunks.close)
+
+def _attachment(request: Request, filename: str, format: str, chunks):
+    # No Content-Length: sent with chunked transfer encoding as it is produced
+    return StreamingResponse(
+        _until_disconnected(request, chunks), media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/reports/exports/transactions/{year}")
+def export_transactions(
+    year: int,
+    request: Request,
+    fiscal: bool = Query(False, description="Fiscal year starting 1 April of `year` instead of the calendar year"),
+    format: str = Query("csv", pattern=EXPORT_FORMAT)
+):
+    """Every donation of a year, streamed from a server-side cursor (for finance and audit)"""
+    _require_export_format(format)
+    if not 2000 <= year <= 2100:
+        raise HTTPException(status_code=400, detail="year must be between 2000 and 2100")
+    try:
+        filename, chunks = get_agent().export_transactions(year, fiscal=fiscal, fmt=format)
+    except Exception as e:
+        logger.error(f"Error exporting transactions: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Could not load transactions: {str(e)}")
+    return _attachment(request, filename, format, chunks)
+
+@app.get("/reports/exports/{period_type}")
+def export_report(
+    period_type: str,
+    request: Request,
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT),
+    table: Optional[str] = Query(None, description=f"One of {', '.join(TABLES)}; required for csv / parquet"),
+    year: Optional[int] = Query(None, ge=2000, le=2100,
+                                description="Yearly / fiscal-yearly reports: which (fiscal) year"),
+    limit: int = Query(10, ge=1, le=10000, description="Rows in the donors / schools / campaigns tables")
+):
+    """The report's tables (one sheet each in xlsx), from the same dataset and fingerprint as the PDF"""
+    _require_export_format(format)
+    if table is not None and table not in TABLES:
+        raise HTTPException(status_code=400, detail=f"Unknown table: {table} (one of {', '.join(TABLES)})")
+    if table is None and format != "xlsx":
+        raise HTTPException(status_code=400, detail=f"table is required for {format} exports")
+    agent = get_agent()
+    try:
+        filename, kind, value = agent.export_report(
+            period_type, year if period_type in YEAR_PERIODS else None, fmt=format,
+            tables=(table,) if table else TABLES, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error exporting {period_type} report: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Could not load report data: {str(e)}")
+    if kind == "file":
+        return pdf_response(request, filename, path=value, media_type=MEDIA_TYPES[format])
+    return _attachment(request, filename, format, value)
+
+@app.get("/api/donations/export")
+def export_donations(
+    request: Request,
+    start_date: Optional[str] = Query(None, description="First day (YYYY-MM-DD); omitted = from the first donation"),
+    end_date: Optional[str] = Query(None, description="Last day, inclusive (YYYY-MM-DD); omitted = up to now"),
+    school: Optional[str] = Query(None, description="Exact school name"),
+    campaign: Optional[str] = Query(None, description="Exact campaign name"),
+    status: Optional[str] = Query(None, description="Payment status, e.g. Success"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$")
+):
+    """
+    Raw donations matching the filters, one row each, streamed from a
+    server-side cursor as NDJSON or CSV. Memory use does not grow with the
+    number of rows, and the cursor is closed as soon as the client disconnects.
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1) if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    try:
+        chunks = get_agent().stream_transactions(
+            format, start_date=start, end_date=end, school=school, campaign=campaign, status=status
+        )
+    except Exception as e:
+        logger.error(f"Error exporting donations: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Could not load donations: {str(e)}")
+    filename = f"donations_{start_date or 'all'}_{end_date or datetime.now().strftime('%Y-%m-%d')}.{format}"
+    return _attachment(request, filename, format, chunks)
     
 
 @app.get("/api/dashboard")
 def dashboard(
     period: str = Query(
         "monthly", 
-        description="Time period for analytics: 'weekly', 'monthly', 'yearly', or 'all'",
-        regex="^(weekly|monthly|yearly|all)$"
+        description="Time period for analytics: 'weekly', 'monthly', 'quarterly', 'yearly', 'fiscal_yearly', or 'all'",
+        regex="^(weekly|monthly|quarterly|yearly|fiscal_yearly|all)$"
     ),
     optimized: bool = Query(
         True, 
@@ -186,16 +650,18 @@ def dashboard(
     The 'period' parameter controls the date range:
     - weekly: Last 7 days
     - monthly: Last 30 days (default)
+    - quarterly: Current quarter (Apr–Jun, Jul–Sep, Oct–Dec, Jan–Mar) to date
     - yearly: Last 365 days
+    - fiscal_yearly: Current fiscal year (from 1 April) to date
     - all: All time data
     """
     try:
         logger.info(f"Fetching dashboard data for period: {period}, optimized: {optimized}")
         
         if optimized:
-            data = get_dashboard_data_optimized(period)
+            data = dashboard_api.get_dashboard_data_optimized(period)
         else:
-            data = get_dashboard_data(period)
+            data = dashboard_api.get_dashboard_data(period)
         
         logger.info(f"Dashboard data fetched successfully for {period} period")
         return JSONResponse(
@@ -219,14 +685,14 @@ def ai_insights():
     """Comprehensive AI insights endpoint"""
     try:
         # Get all insights
-        retention = donor_retention()
-        peak_day = peak_donation_day()
-        top_school_name, top_school_amount = top_school()
-        weekend_perf = weekend_performance()
-        org_engagement = organization_engagement()
-        repeat_rate = repeat_donors()
-        upi_percentage = upi_payments_percentage()
-        seasonal = seasonal_trends()
+        retention = insights.donor_retention()
+        peak_day = insights.peak_donation_day()
+        top_school_name, top_school_amount = insights.top_school()
+        weekend_perf = insights.weekend_performance()
+        org_engagement = insights.organization_engagement()
+        repeat_rate = insights.repeat_donors()
+        upi_percentage = insights.upi_payments_percentage()
+        seasonal = insights.seasonal_trends()
         
         return {
             "donor_retention_rate": retention,
@@ -252,14 +718,76 @@ def ai_insights():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating insights: {str(e)}")
 
+@app.get("/api/ai-insights/anomalies")
+def ai_insights_anomalies(
+    days: int = Query(2, ge=1, le=28, description="Return alerts raised for the last N days"),
+    refresh: bool = Query(False, description="Pull new donations before answering")
+):
+    """Spike / drop alerts on daily totals per school and payment mode"""
+    try:
+        detector = anomaly.get_detector()
+        if refresh or detector.last_refresh is None:
+            detector.refresh()
+        alerts = detector.alerts(since_days=days)
+        return {
+            "alerts": alerts,
+            "count": len(alerts),
+            "last_refresh": detector.last_refresh.isoformat() if detector.last_refresh else None,
+            "window_days": detector.window_days,
+            "threshold": detector.threshold
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error detecting anomalies: {str(e)}")
+
+@app.get("/api/ai-insights/lapse-risk")
+def ai_insights_lapse_risk(
+    limit: int = Query(50, ge=1, le=1000, description="Maximum donors to return"),
+    min_score: float = Query(0.5, ge=0.0, le=1.0, description="Minimum churn score")
+):
+    """Donors most likely to lapse, from the latest daily churn scoring run"""
+    try:
+        donors = churn.likely_to_lapse(limit=limit, min_score=min_score)
+        return {"donors": donors, "count": len(donors)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching lapse risk: {str(e)}")
+
+@app.get("/api/ai-insights/lapse-risk/{donor_email}")
+def ai_insights_donor_lapse_risk(donor_email: str):
+    """Churn score for a single donor"""
+    score = churn.donor_churn_score(donor_email)
+    if not score:
+        raise HTTPException(status_code=404, detail="Donor has not been scored")
+    return score
+
+@app.get("/api/ai-insights/segments")
+def ai_insights_segments():
+    """Donor counts and lifetime value per RFM segment"""
+    try:
+        return {"segments": donor_summary.segment_breakdown()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching donor segments: {str(e)}")
+
 @app.get("/api/forecast")
-def forecast():
+def forecast(
+    method: str = Query(
+        "hybrid",
+        description="Forecast engine: 'hybrid', 'statistical', 'ml' or 'holt_winters' (seasonal)",
+        regex="^(hybrid|statistical|ml|holt_winters)$"
+    ),
+    by: Optional[str] = Query(
+        None,
+        description="Also forecast every school or campaign (one batched Holt-Winters fit)",
+        regex="^(school_name|campaign_name)$"
+    ),
+    freq: str = Query("monthly", description="Period of the per-series forecast", regex="^(monthly|weekly)$"),
+    horizon: int = Query(1, ge=1, le=12, description="Periods ahead in the per-series forecast")
+):
     """Donation forecast endpoint"""
     try:
-        forecast_data = next_month_forecast()
+        forecast_data = forecasting.next_month_forecast(method=method)
         
         if isinstance(forecast_data, dict):
-            return {
+            response = {
                 "predicted_amount": forecast_data["predicted_amount_lakhs"] * 100000,  # Convert to rupees
                 "confidence": forecast_data["confidence"],
                 "basis": forecast_data["basis"],
@@ -272,7 +800,7 @@ def forecast():
                 ]
             }
         else:
-            return {
+            response = {
                 "predicted_amount": 850000,
                 "confidence": "Low",
                 "basis": "Insufficient historical data",
@@ -284,6 +812,14 @@ def forecast():
                     "Start with conservative projections"
                 ]
             }
+        if by:
+            response["series"] = {
+                "by": by,
+                "freq": freq,
+                "horizon": horizon,
+                "forecasts": forecasting.seasonal_forecast_by(by, freq=freq, horizon=horizon)
+            }
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating forecast: {str(e)}")
 
@@ -293,7 +829,7 @@ def ai_insights_complete():
     try:
         # Get insights
         insights_response = ai_insights()
-        forecast_response = forecast()
+        forecast_response = forecast(method="hybrid", by=None)
         
         # Format for frontend
         top_school_info = insights_response.get("top_school", {})
@@ -429,7 +965,7 @@ def dashboard_custom(
         
         # Note: This would require modifying the dashboard functions to accept custom date ranges
         # For now, we'll use the period-based function
-        data = get_dashboard_data_optimized(period)
+        data = dashboard_api.get_dashboard_data_optimized(period)
         
         # Add custom range info to response
         data["date_range"] = {
@@ -474,11 +1010,21 @@ def available_periods():
                 "label": "Last 30 Days",
                 "description": "Data from the last 30 days"
             },
+            {
+                "value": "quarterly",
+                "label": "This Quarter",
+                "description": "Data since the start of the current fiscal quarter"
+            },
             {
                 "value": "yearly",
                 "label": "Last 365 Days",
                 "description": "Data from the last year"
             },
+            {
+                "value": "fiscal_yearly",
+                "label": "This Fiscal Year",
+                "description": "Data since 1 April (Indian fiscal year)"
+            },
             {
                 "value": "all",
                 "label": "All Time",
@@ -493,7 +1039,7 @@ def dashboard_kpis(
     period: str = Query(
         "monthly", 
         description="Time period for KPIs",
-        regex="^(weekly|monthly|yearly|all)$"
+        regex="^(weekly|monthly|quarterly|yearly|fiscal_yearly|all)$"
     )
 ):
     """
@@ -514,7 +1060,7 @@ def dashboard_kpis(
         logger.info(f"Fetching KPIs for period: {period}")
         
         # Get full data but we'll only return KPIs
-        data = get_dashboard_data_optimized(period)
+        data = dashboard_api.get_dashboard_data_optimized(period)
         
         return {
             "period": period,
@@ -537,7 +1083,7 @@ def dashboard_trend(
     period: str = Query(
         "monthly", 
         description="Time period for trend data",
-        regex="^(weekly|monthly|yearly|all)$"
+        regex="^(weekly|monthly|quarterly|yearly|fiscal_yearly|all)$"
     )
 ):
     """
@@ -548,7 +1094,7 @@ def dashboard_trend(
     try:
         logger.info(f"Fetching trend data for period: {period}")
         
-        data = get_dashboard_data_optimized(period)
+        data = dashboard_api.get_dashboard_data_optimized(period)
         
         return {
             "period": period,
@@ -571,7 +1117,7 @@ def dashboard_schools(
     period: str = Query(
         "monthly", 
         description="Time period for schools data",
-        regex="^(weekly|monthly|yearly|all)$"
+        regex="^(weekly|monthly|quarterly|yearly|fiscal_yearly|all)$"
     )
 ):
     """
@@ -582,7 +1128,7 @@ def dashboard_schools(
     try:
         logger.info(f"Fetching schools data for period: {period}")
         
-        data = get_dashboard_data_optimized(period)
+        data = dashboard_api.get_dashboard_data_optimized(period)
         
         return {
             "period": period,
@@ -605,7 +1151,7 @@ def dashboard_campaigns(
     period: str = Query(
         "monthly", 
         description="Time period for campaigns data",
-        regex="^(weekly|monthly|yearly|all)$"
+        regex="^(weekly|monthly|quarterly|yearly|fiscal_yearly|all)$"
     )
 ):
     """
@@ -616,7 +1162,7 @@ def dashboard_campaigns(
     try:
         logger.info(f"Fetching campaigns data for period: {period}")
         
-        data = get_dashboard_data_optimized(period)
+        data = dashboard_api.get_dashboard_data_optimized(period)
         
         return {
             "period": period,
@@ -639,7 +1185,7 @@ def dashboard_payment_modes(
     period: str = Query(
         "monthly", 
         description="Time period for payment modes data",
-        regex="^(weekly|monthly|yearly|all)$"
+        regex="^(weekly|monthly|quarterly|yearly|fiscal_yearly|all)$"
     )
 ):
     """
@@ -650,7 +1196,7 @@ def dashboard_payment_modes(
     try:
         logger.info(f"Fetching payment modes data for period: {period}")
         
-        data = get_dashboard_data_optimized(period)
+        data = dashboard_api.get_dashboard_data_optimized(period)
         
         return {
             "period": period,
@@ -675,9 +1221,44 @@ def health():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "service": "vistara-analytics-api",
-        "version": "2.0.0"
+        "version": "2.0.0",
+        "circuit_breakers": breaker_states(),
+        "render_timings": render_timings()
     }
 
+@app.get("/ready")
+def ready():
+    """
+    Readiness probe — separate from /health (liveness).
+
+    Ready once warm-up has finished and the database answers. Redis / S3 are
+    reported but not required: the agent falls back to local cache/storage.
+    """
+    checks = {"warmed_up": _warmup_done.is_set()}
+
+    try:
+        from ml.db import get_engine
+        from sqlalchemy import text
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        checks["database"] = "ok"
+    except Exception as e:
+        checks["database"] = f"error: {e}"
+
+    if _agent is not None:
+        checks.update(_agent.dependency_status())
+    checks["circuit_breakers"] = breaker_states()
+
+    is_ready = checks["warmed_up"] and checks["database"] == "ok"
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "status": "ready" if is_ready else "not_ready",
+            "checks": checks,
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+
 @app.get("/")
 def root():
     """Root endpoint with API information"""
@@ -693,22 +1274,41 @@ def root():
                 "upload": "/api/upload/image, /api/upload/document"
             },
             "analytics": {
-                "dashboard": "/api/dashboard?period=weekly|monthly|yearly|all",
+                "dashboard": "/api/dashboard?period=weekly|monthly|quarterly|yearly|fiscal_yearly|all",
                 "dashboard_custom": "/api/dashboard/custom?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD",
                 "dashboard_kpis": "/api/dashboard/kpis",
                 "dashboard_trend": "/api/dashboard/trend",
                 "dashboard_schools": "/api/dashboard/schools",
                 "dashboard_campaigns": "/api/dashboard/campaigns",
                 "dashboard_payment_modes": "/api/dashboard/payment-modes",
-                "available_periods": "/api/dashboard/periods"
+                "available_periods": "/api/dashboard/periods",
+                "donations_export": "/api/donations/export?start_date=&end_date=&school=&campaign=&status=&format=ndjson|csv"
             },
             "ai_ml": {
                 "ai_insights": "/api/ai-insights",
                 "ai_insights_complete": "/api/ai-insights-complete",
-                "forecast": "/api/forecast"
+                "anomalies": "/api/ai-insights/anomalies",
+                "lapse_risk": "/api/ai-insights/lapse-risk",
+                "segments": "/api/ai-insights/segments",
+                "forecast": "/api/forecast?method=hybrid|statistical|ml|holt_winters&by=school_name|campaign_name&freq=monthly|weekly&horizon=1"
+            },
+            "reports": {
+                "list": "/reports?limit=50&offset=0",
+                "school_statements": "/reports/schools/{period_type}?year= (ZIP)",
+                "receipts": "POST /receipts/batches, GET /receipts/batches/{batch_id}, GET /receipts/batches/{batch_id}/download",
+                "weekly": "/reports/weekly",
+                "monthly": "/reports/monthly",
+                "yearly": "/reports/yearly/{year}",
+                "quarterly": "/reports/quarterly",
+                "fiscal_yearly": "/reports/fiscal_yearly/{year}",
+                "comparison": "/reports/comparison?years=2022,2023,2024&fiscal=false&format=pdf|json",
+                "exports": "/reports/exports/{period_type}?format=xlsx|csv|parquet&table=&year=&limit=10",
+                "transactions": "/reports/exports/transactions/{year}?fiscal=false&format=csv|xlsx|parquet",
+                "jobs": "POST /reports/jobs, GET /reports/jobs/{job_id}, GET /reports/jobs/{job_id}/download"
             },
             "system": {
                 "health": "/health",
+                "readiness": "/ready",
                 "documentation": "/docs"
             }
         },
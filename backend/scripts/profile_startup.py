@@ -0,0 +1,100 @@
+"""
+Import-time profile of the API module, usable as a startup regression check.
+
+Runs `python -X importtime -c "import scripts.main"` in a fresh interpreter,
+prints the slowest imports and fails (exit code 1) when:
+- total import time exceeds the budget, or
+- a heavy module (pandas, scikit-learn, reportlab, redis, ...) is imported
+  eagerly — those must stay behind lazy_import() / first use.
+
+Usage (from the backend directory):
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --budget-ms 1500 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must not be loaded just by importing scripts.main
+HEAVY_MODULES = ("pandas", "sklearn", "reportlab", "redis", "numpy", "agent", "ml.insights")
+
+CHECK_SNIPPET = (
+    "import sys, json; import scripts.main; "
+    "print(json.dumps([m for m in {mods!r} if m in sys.modules and "
+    "type(sys.modules[m]).__name__ != '_LazyModule']))"
+)
+
+
+def profile_imports(top: int):
+    """Return (wall_ms, [(cumulative_us, module)] sorted desc) for importing scripts.main"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import scripts.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise SystemExit("Importing scripts.main failed")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = _parse(line)
+        rows.append((cumulative_us, name))
+    rows.sort(reverse=True)
+    return wall_ms, rows[:top]
+
+
+def _parse(line: str):
+    # "import time:       123 |       4567 |   package.module"
+    head, cumulative, name = line.split("|")
+    return int(head.split(":")[1]), int(cumulative), name.rstrip()
+
+
+def eager_heavy_modules():
+    proc = subprocess.run(
+        [sys.executable, "-c", CHECK_SNIPPET.format(mods=HEAVY_MODULES)],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise SystemExit("Importing scripts.main failed")
+    return proc.stdout.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", 2500)))
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    wall_ms, slowest = profile_imports(args.top)
+    print(f"import scripts.main: {wall_ms:.0f} ms wall (budget {args.budget_ms:.0f} ms)")
+    print(f"{'cumulative ms':>14}  module")
+    for cumulative_us, name in slowest:
+        print(f"{cumulative_us / 1000:>14.1f}  {name.strip()}")
+
+    failures = []
+    eager = eager_heavy_modules()
+    if eager != "[]":
+        failures.append(f"heavy modules imported eagerly: {eager}")
+    if wall_ms > args.budget_ms:
+        failures.append(f"startup import took {wall_ms:.0f} ms > budget {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Non-interactive batch report generation.
+
+Builds many reports at once across a process pool — one
+FinalDonationReportAgent per worker process — e.g. to regenerate years of
+reports after a schema change or a VERSION bump. Each report is fetched in
+one round trip (build_report_dataset); weekly and monthly reports cover the
+current windows, so they are built once however many years are given.
+
+Prints per-report timings and whether each report was served from cache or
+rendered, then a summary. Exits non-zero if any report failed.
+
+Usage (from the backend directory):
+    python scripts/report_batch.py --years 2019-2024
+    python scripts/report_batch.py --periods weekly monthly yearly --years 2022,2024
+    python scripts/report_batch.py --periods quarterly fiscal_yearly --years 2021-2024
+    python scripts/report_batch.py --years 2015-2025 --force --processes 8
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("report_batch")
+
+from services.report_periods import (  # noqa: E402
+    PERIOD_TYPES as PERIODS, YEAR_PERIODS, fiscal_year_of, parse_year_spec
+)
+
+_agent = None   # one per worker process
+
+
+def parse_years(spec: str):
+    try:
+        return parse_year_spec(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def plan(periods, years):
+    """Unique (period_type, year) builds; weekly/monthly/quarterly ignore the year"""
+    tasks = []
+    for period_type in periods:
+        if period_type == "yearly":
+            tasks.extend(("yearly", year) for year in (years or [datetime.now().year]))
+        elif period_type == "fiscal_yearly":
+            tasks.extend(("fiscal_yearly", year) for year in (years or [fiscal_year_of(datetime.now())]))
+        else:
+            tasks.append((period_type, None))
+    return tasks
+
+
+def _init_worker():
+    global _agent
+    from agent import FinalDonationReportAgent
+    _agent = FinalDonationReportAgent()
+
+
+def build(period_type: str, year, force: bool) -> dict:
+    stages = []
+    started = time.perf_counter()
+    try:
+        result = _agent.generate_report(
+            period_type, year=year, force_regenerate=force,
+            progress=lambda percent, stage: stages.append(stage)
+        )
+        # generate_report only queries and renders on a cache miss
+        outcome = "rendered" if "rendering" in stages else "cached"
+        error = None
+    except Exception as e:
+        result, outcome, error = None, "failed", str(e)
+    return {
+        "period_type": period_type,
+        "year": year,
+        "outcome": outcome,
+        "seconds": round(time.perf_counter() - started, 2),
+        "result": result,
+        "error": error,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--periods", nargs="+", choices=PERIODS, default=["yearly"])
+    parser.add_argument("--years", type=parse_years, default=[],
+                        help="years for yearly and fiscal-yearly reports (FY start year), "
+                             "e.g. 2019-2024 or 2019,2021 (default: current)")
+    parser.add_argument("--processes", type=int,
+                        default=int(os.getenv("REPORT_WORKER_PROCESSES", os.cpu_count() or 1)))
+    parser.add_argument("--force", action="store_true", help="bypass the cache and re-render everything")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON lines")
+    args = parser.parse_args()
+
+    tasks = plan(args.periods, args.years)
+    # Oldest years first: they are the most likely to need a full render
+    tasks.sort(key=lambda t: (t[0] not in YEAR_PERIODS, t[1] or 0))
+    processes = max(1, min(args.processes, len(tasks)))
+    print(f"Building {len(tasks)} reports on {processes} processes", file=sys.stderr)
+
+    started = time.perf_counter()
+    results = []
+    # reportlab rendering is CPU-bound: processes, not threads
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(build, period_type, year, args.force) for period_type, year in tasks]
+        for future in as_completed(futures):
+            r = future.result()
+            results.append(r)
+            if args.json:
+                print(json.dumps(r), flush=True)
+            else:
+                label = f"{r['period_type']} {r['year']}" if r["year"] else r["period_type"]
+                detail = r["error"] if r["error"] else r["result"]
+                print(f"{label:<14} {r['outcome']:<9} {r['seconds']:>8.2f}s  {detail}", flush=True)
+
+    counts = {o: sum(r["outcome"] == o for r in results) for o in ("rendered", "cached", "failed")}
+    print(f"Done in {time.perf_counter() - started:.1f}s: "
+          f"{counts['rendered']} rendered, {counts['cached']} cached, {counts['failed']} failed",
+          file=sys.stderr)
+    sys.exit(1 if counts["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Standalone report worker.
+
+Drains the Postgres report_jobs queue (services/report_queue.py) with
+FinalDonationReportAgent. Run as many of these as needed, on as many
+machines as needed — claims use FOR UPDATE SKIP LOCKED, so workers never
+collide. The API only enqueues when REPORT_QUEUE=postgres.
+
+Usage (from the backend directory):
+    python scripts/report_worker.py                  # one process per CPU
+    python scripts/report_worker.py --processes 4
+    python scripts/report_worker.py --once           # drain the queue and exit
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.report_queue import PostgresReportQueue  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("report_worker")
+
+REAP_INTERVAL = 60
+PRUNE_INTERVAL = 3600
+
+
+class ReportWorker:
+    """Claim → heartbeat while rendering → complete / fail, until stopped"""
+
+    def __init__(self, worker_id: str, poll_interval: float = 2.0):
+        from agent import FinalDonationReportAgent
+
+        self.worker_id = worker_id
+        self.poll_interval = poll_interval
+        self.agent = FinalDonationReportAgent()
+        self.queue = PostgresReportQueue(lambda: self.agent)
+        self.stop = threading.Event()
+        self._last_reap = self._last_prune = 0.0
+
+    def run(self, once: bool = False):
+        logger.info(f"Report worker {self.worker_id} started")
+        while not self.stop.is_set():
+            self._housekeeping()
+            try:
+                job = self.queue.claim(self.worker_id)
+            except Exception as e:
+                logger.error(f"Claim failed: {e}")
+                job = None
+            if job is None:
+                if once:
+                    break
+                # Jitter keeps idle workers from polling in lock-step
+                self.stop.wait(self.poll_interval * random.uniform(0.5, 1.5))
+                continue
+            self.process(job)
+        logger.info(f"Report worker {self.worker_id} stopped")
+
+    def process(self, job):
+        logger.info(f"Claimed job {job.job_id}: {job.period_type} {job.year or ''} "
+                    f"(attempt {job.attempts}/{job.max_attempts})")
+        state = {"progress": None, "stage": None}
+        lease_lost = threading.Event()
+        done = threading.Event()
+
+        def heartbeat_loop():
+            interval = max(self.queue.lease_seconds / 3, 1)
+            while not done.wait(interval):
+                try:
+                    if not self.queue.heartbeat(job.job_id, self.worker_id, **state):
+                        lease_lost.set()
+                        logger.warning(f"Lease lost for job {job.job_id}")
+                        return
+                except Exception as e:
+                    logger.error(f"Heartbeat failed for job {job.job_id}: {e}")
+
+        def on_progress(percent: int, stage: str):
+            state["progress"], state["stage"] = percent, stage
+
+        beat = threading.Thread(target=heartbeat_loop, daemon=True)
+        beat.start()
+        try:
+            result = self.agent.generate_report(
+                job.period_type, year=job.year,
+                force_regenerate=job.force_regenerate, progress=on_progress
+            )
+            if lease_lost.is_set() or not self.queue.complete(job.job_id, self.worker_id, result,
+                                                                forced=job.force_regenerate):
+                logger.warning(f"Job {job.job_id} finished after its lease was taken over; result discarded")
+            else:
+                logger.info(f"Job {job.job_id} completed: {result}")
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            try:
+                self.queue.fail(job.job_id, self.worker_id, str(e))
+            except Exception as db_error:
+                # The lease will expire and the reaper requeues it
+                logger.error(f"Could not record failure for job {job.job_id}: {db_error}")
+        finally:
+            done.set()
+            beat.join()
+
+    def _housekeeping(self):
+        now = time.monotonic()
+        try:
+            if now - self._last_reap >= REAP_INTERVAL:
+                self._last_reap = now
+                self.queue.reap_expired()
+            if now - self._last_prune >= PRUNE_INTERVAL:
+                self._last_prune = now
+                self.queue.prune()
+        except Exception as e:
+            logger.error(f"Queue housekeeping failed: {e}")
+
+
+def _worker_main(index: int, once: bool, poll_interval: float):
+    worker = ReportWorker(f"{socket.gethostname()}:{os.getpid()}:{index}", poll_interval)
+
+    def request_stop(signum, frame):
+        # Finish the current job; an unfinished lease would be reclaimed anyway
+        worker.stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    worker.run(once=once)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int,
+                        default=int(os.getenv("REPORT_WORKER_PROCESSES", os.cpu_count() or 1)))
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _worker_main(0, args.once, args.poll_interval)
+        return
+
+    # reportlab rendering is CPU-bound: one process per core, not threads
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_worker_main, args=(i, args.once, args.poll_interval),
+                    name=f"report-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+
+    def forward(signum, frame):
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # children get SIGINT from the terminal
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
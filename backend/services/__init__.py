@@ -0,0 +1,3 @@
+"""
+Shared services for report generation, caching and storage
+"""
@@ -0,0 +1,277 @@
+"""
+Content-addressed report artifact store shared across API replicas.
+
+A report's key is a hash of (report version, period, date range, data
+fingerprint): the same data always maps to the same object, so any replica
+that finds the key already stored serves it instead of rendering it again.
+Backends are pluggable:
+
+- local   : a directory (a shared volume when there are several nodes)
+- s3      : an S3 bucket; ARTIFACT_S3_ENDPOINT_URL points it at an
+            S3-compatible stand-in such as MinIO or localstack for tests
+- memory  : an in-process dict, for unit tests
+
+Every node keeps a read-through disk cache of the objects it has served,
+bounded by size (least recently used files are removed first).
+
+Artifacts are referenced as artifact://<key>/<download filename>.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from services.circuit_breaker import get_breaker
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_SCHEME = "artifact://"
+
+
+def artifact_key(version: str, period_type: str, year, start_date: str,
+                 end_date: str, data_fingerprint: str) -> str:
+    raw = f"{version}|{period_type}|{year or ''}|{start_date}|{end_date}|{data_fingerprint}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def parse_ref(ref: str) -> Tuple[str, str]:
+    """artifact://<key>/<filename> -> (key, filename)"""
+    key, _, filename = ref[len(ARTIFACT_SCHEME):].partition("/")
+    return key, filename or f"{key}.pdf"
+
+
+# ==================== BACKENDS ====================
+class LocalDirectoryBackend:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pdf"
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def put(self, key: str, data: bytes):
+        _atomic_write(self._path(key), data)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def url(self, key: str, filename: str) -> Optional[str]:
+        return None
+
+
+class S3Backend:
+    def __init__(self, bucket: str, prefix: str = "artifacts/", endpoint_url: str = None,
+                 region: str = None, url_expiry: int = 3600):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.url_expiry = url_expiry
+        self.breaker = get_breaker("s3")
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import boto3
+                    from botocore.config import Config
+                    self._client = boto3.client(
+                        "s3",
+                        region_name=self.region,
+                        endpoint_url=self.endpoint_url,
+                        config=Config(
+                            connect_timeout=float(os.getenv("S3_CONNECT_TIMEOUT", 2)),
+                            read_timeout=float(os.getenv("S3_READ_TIMEOUT", 10)),
+                            retries={"max_attempts": 2, "mode": "standard"},
+                        )
+                    )
+        return self._client
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key[:2]}/{key}.pdf"
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.breaker.call(self.client.head_object, Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, key: str, data: bytes):
+        self.breaker.call(
+            self.client.put_object, Bucket=self.bucket, Key=self._key(key), Body=data,
+            ContentType="application/pdf", ServerSideEncryption="AES256"
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        from botocore.exceptions import ClientError
+        try:
+            response = self.breaker.call(self.client.get_object, Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return response["Body"].read()
+
+    def url(self, key: str, filename: str) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._key(key),
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=self.url_expiry,
+        )
+
+
+class InMemoryBackend:
+    """Test stand-in with the backend interface; shared by every store in the process"""
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+
+    def exists(self, key: str) -> bool:
+        return key in self.objects
+
+    def put(self, key: str, data: bytes):
+        self.objects[key] = bytes(data)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.objects.get(key)
+
+    def url(self, key: str, filename: str) -> Optional[str]:
+        return None
+
+
+# ==================== STORE ====================
+class ArtifactStore:
+    """Backend + per-node read-through disk cache"""
+
+    def __init__(self, backend, cache_dir, cache_max_bytes: int = 512 * 1024 * 1024,
+                 redirect: bool = True):
+        self.backend = backend
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_max_bytes = cache_max_bytes
+        self.redirect = redirect
+        self._trim_lock = threading.Lock()
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.pdf"
+
+    @staticmethod
+    def ref(key: str, filename: str) -> str:
+        return f"{ARTIFACT_SCHEME}{key}/{filename}"
+
+    def exists(self, key: str) -> bool:
+        return self._cache_path(key).exists() or self.backend.exists(key)
+
+    def put(self, key: str, data: bytes, filename: str) -> str:
+        """Store once per key (identical content is never uploaded twice)"""
+        if not self.backend.exists(key):
+            self.backend.put(key, data)
+            logger.info(f"Artifact stored: {key[:16]} ({len(data):,} bytes)")
+        self._cache(key, data)
+        return self.ref(key, filename)
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path in the node cache, fetching from the backend on a miss"""
+        path = self._cache_path(key)
+        if path.exists():
+            os.utime(path)   # mark as recently used
+            return str(path)
+        data = self.backend.get(key)
+        if data is None:
+            return None
+        self._cache(key, data)
+        return str(path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Bytes from the node cache or the backend, without caching them (bulk reads)"""
+        try:
+            return self._cache_path(key).read_bytes()
+        except FileNotFoundError:
+            return self.backend.get(key)
+
+    def redirect_url(self, key: str, filename: str) -> Optional[str]:
+        return self.backend.url(key, filename) if self.redirect else None
+
+    def _cache(self, key: str, data: bytes):
+        try:
+            _atomic_write(self._cache_path(key), data)
+            self._trim()
+        except OSError as e:
+            logger.warning(f"Artifact cache write failed: {e}")
+
+    def _trim(self):
+        if not self._trim_lock.acquire(blocking=False):
+            return
+        try:
+            files = [(p.stat().st_mtime, p.stat().st_size, p) for p in self.cache_dir.glob("*/*.pdf")]
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.cache_max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+        except OSError as e:
+            logger.warning(f"Artifact cache trim failed: {e}")
+        finally:
+            self._trim_lock.release()
+
+
+def _atomic_write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+_memory_backend = InMemoryBackend()
+
+
+def store_from_env(cache_dir) -> Optional[ArtifactStore]:
+    """ARTIFACT_BACKEND=local|s3|memory; unset keeps the per-node reports/ behaviour"""
+    kind = os.getenv("ARTIFACT_BACKEND", "").lower()
+    if not kind:
+        return None
+    if kind == "local":
+        backend = LocalDirectoryBackend(os.getenv("ARTIFACT_DIR", "artifacts"))
+    elif kind == "s3":
+        backend = S3Backend(
+            bucket=os.getenv("ARTIFACT_S3_BUCKET") or os.getenv("S3_BUCKET_NAME"),
+            prefix=os.getenv("ARTIFACT_S3_PREFIX", "artifacts/"),
+            endpoint_url=os.getenv("ARTIFACT_S3_ENDPOINT_URL") or None,
+            region=os.getenv("AWS_REGION", "ap-southeast-2"),
+        )
+    elif kind == "memory":
+        backend = _memory_backend
+    else:
+        raise ValueError(f"Unknown ARTIFACT_BACKEND: {kind}")
+    return ArtifactStore(
+        backend,
+        cache_dir=cache_dir,
+        cache_max_bytes=int(os.getenv("ARTIFACT_CACHE_MB", 512)) * 1024 * 1024,
+        redirect=os.getenv("ARTIFACT_REDIRECT", "true").lower() == "true",
+    )
@@ -0,0 +1,147 @@
+"""
+Circuit breakers for the report path's external dependencies (Redis, S3, DB).
+
+A breaker counts consecutive failures — errors, and calls that succeed but
+blow the dependency's latency budget. After failure_threshold of them it
+opens and every call fails fast with CircuitOpenError, so callers drop to
+their local fallback immediately instead of waiting out network timeouts.
+After reset_timeout one probe call is let through (half-open): success
+closes the breaker, failure re-opens it.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 3,
+                 reset_timeout: float = 30.0, latency_budget: float = 1.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_budget = latency_budget
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._last_error = None
+        self._slow_calls = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go through now (claims the probe slot when half-open)"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._rejected += 1
+                    return False
+                self._state = HALF_OPEN
+            if self._probe_in_flight:
+                self._rejected += 1
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self, elapsed: float = 0.0):
+        if elapsed > self.latency_budget:
+            self._slow_calls += 1
+            self.record_failure(f"slow call: {elapsed * 1000:.0f} ms > "
+                                f"{self.latency_budget * 1000:.0f} ms budget")
+            return
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._state, self._failures, self._probe_in_flight = CLOSED, 0, False
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error) if error else self._last_error
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened: {self._last_error}")
+                self._state, self._opened_at = OPEN, time.monotonic()
+
+    def trip(self, error=None):
+        """Open immediately, e.g. when the initial connection attempt fails"""
+        with self._lock:
+            self._failures = max(self._failures, self.failure_threshold - 1)
+        self.record_failure(error)
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Run func through the breaker; raises CircuitOpenError without calling it when open"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit open")
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success(time.monotonic() - started)
+        return result
+
+    def snapshot(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "latency_budget_ms": round(self.latency_budget * 1000),
+                "slow_calls": self._slow_calls,
+                "rejected_calls": self._rejected,
+                "last_error": self._last_error,
+                "retry_in_s": round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+                if state == OPEN else None,
+            }
+
+
+# Per-dependency latency budgets (ms), overridable via BREAKER_<NAME>_BUDGET_MS
+DEFAULT_BUDGETS_MS = {"redis": 250, "s3": 5000, "db": 10000}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a dependency, shared by every caller"""
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            prefix = f"BREAKER_{name.upper()}"
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv(f"{prefix}_FAILURES", 3)),
+                reset_timeout=float(os.getenv(f"{prefix}_RESET_S", 30)),
+                latency_budget=float(os.getenv(f"{prefix}_BUDGET_MS",
+                                               DEFAULT_BUDGETS_MS.get(name, 1000))) / 1000,
+            )
+        return breaker
+
+
+def breaker_states() -> Dict[str, dict]:
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
@@ -0,0 +1,106 @@
+"""
+Keyed local cache in SQLite (WAL mode) — the fallback when Redis is down.
+
+Every operation touches one row, so lookups cost the same however many
+reports are cached. WAL lets readers in any number of uvicorn worker
+processes proceed while one of them writes; each write is a single
+statement and therefore atomic. Entries carry an absolute expiry: reads
+ignore (and drop) expired rows, and a background thread compacts the table
+periodically.
+"""
+from pathlib import Path
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        key         TEXT PRIMARY KEY,
+        value       TEXT NOT NULL,
+        expires_at  REAL NOT NULL
+    ) WITHOUT ROWID
+"""
+
+
+class LocalCache:
+    """Redis-hash-like get/set/delete with TTL, safe across threads and processes"""
+
+    def __init__(self, path, compact_interval: int = 3600, busy_timeout_ms: int = 5000):
+        self.path = Path(path)
+        self.compact_interval = compact_interval
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._compactor = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.busy_timeout_ms / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            conn.execute(SCHEMA_SQL)
+            self._local.conn = conn
+            self._start_compactor()
+        return conn
+
+    def get(self, key: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= time.time():
+            logger.info(f"Local cache expired for key={key}")
+            self._conn().execute(
+                "DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, time.time())
+            )
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, mapping: dict, ttl_seconds: int):
+        self._conn().execute(
+            """
+            INSERT INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at
+            """,
+            (key, json.dumps(mapping), time.time() + ttl_seconds)
+        )
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def compact(self) -> int:
+        """Drop expired entries. Returns rows removed."""
+        removed = self._conn().execute(
+            "DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+        if removed:
+            logger.info(f"Local cache compaction removed {removed} expired entries")
+        return removed
+
+    def _start_compactor(self):
+        with self._lock:
+            if self._compactor is not None:
+                return
+            self._compactor = threading.Thread(target=self._compact_loop, daemon=True,
+                                               name="local-cache-compactor")
+            self._compactor.start()
+
+    def _compact_loop(self):
+        while True:
+            time.sleep(self.compact_interval)
+            try:
+                self.compact()
+                self._conn().execute("PRAGMA wal_checkpoint(PASSIVE)")
+            except Exception as e:
+                logger.error(f"Local cache compaction error: {e}")
@@ -0,0 +1,113 @@
+"""
+In-process LRU tier for report metadata, kept coherent through Redis pub/sub.
+
+Cache hits are served from memory without a network round trip. Whenever a
+process writes or evicts a key in Redis it publishes the key on
+INVALIDATION_CHANNEL; every other process drops its local copy. Entries also
+expire after a short TTL, which bounds staleness if a message is missed
+(and the whole tier is cleared whenever the subscription has to reconnect).
+"""
+from collections import OrderedDict
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "reports:invalidate"
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU with per-entry TTL"""
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: float = 300):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return dict(item[1])
+
+    def set(self, key: str, value: dict, ttl_seconds: float = None):
+        ttl = min(ttl_seconds or self.ttl_seconds, self.ttl_seconds)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, dict(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class InvalidationListener:
+    """Subscribes to INVALIDATION_CHANNEL and evicts keys other processes changed"""
+
+    def __init__(self, cache: LRUCache, channel: str = INVALIDATION_CHANNEL):
+        self.cache = cache
+        self.channel = channel
+        self.origin = uuid.uuid4().hex   # lets a process ignore its own messages
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def message(self, key: str) -> str:
+        return json.dumps({"origin": self.origin, "key": key})
+
+    def start(self, redis_client):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._listen, args=(redis_client,),
+                                            daemon=True, name="cache-invalidation")
+            self._thread.start()
+
+    def _listen(self, redis_client):
+        backoff = 1
+        while True:
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything published while we were disconnected is lost
+                self.cache.clear()
+                backoff = 1
+                while True:
+                    # get_message polls, so the client's socket_timeout never fires on a quiet channel
+                    message = pubsub.get_message(timeout=30)
+                    if message:
+                        self._handle(message.get("data"))
+            except Exception as e:
+                logger.warning(f"Cache invalidation subscription dropped: {e}; retrying in {backoff}s")
+                self.cache.clear()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def _handle(self, data):
+        try:
+            payload = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") != self.origin:
+            self.cache.delete(payload.get("key", ""))
@@ -0,0 +1,149 @@
+"""
+In-memory PDF store and HTTP delivery with ETag / Range support.
+
+MemoryReportStore keeps recently rendered PDFs as bytes (bounded by total
+size, least recently used evicted first), so a report rendered in memory
+can be served without touching disk. pdf_response() serves either bytes or
+a file as a chunked stream with a strong ETag, answers If-None-Match with
+304 and single byte ranges with 206 — browsers' PDF viewers and download
+managers fetch large reports in ranges.
+"""
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+from typing import Iterator, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+MEMORY_SCHEME = "memory://"
+CHUNK_SIZE = 64 * 1024
+
+
+class MemoryReportStore:
+    """Bounded LRU of rendered PDFs, addressed as memory://<filename>"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()  # name -> (data, etag)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def name_of(ref: str) -> str:
+        return ref[len(MEMORY_SCHEME):] if ref.startswith(MEMORY_SCHEME) else ref
+
+    def put(self, name: str, data: bytes) -> str:
+        etag = '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+        with self._lock:
+            old = self._items.pop(name, None)
+            if old:
+                self._size -= len(old[0])
+            self._items[name] = (data, etag)
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._items) > 1:
+                _, (evicted, _) = self._items.popitem(last=False)
+                self._size -= len(evicted)
+        return MEMORY_SCHEME + name
+
+    def get(self, ref: str) -> Optional[Tuple[bytes, str]]:
+        name = self.name_of(ref)
+        with self._lock:
+            item = self._items.get(name)
+            if item is not None:
+                self._items.move_to_end(name)
+            return item
+
+    def delete(self, ref: str):
+        with self._lock:
+            item = self._items.pop(self.name_of(ref), None)
+            if item:
+                self._size -= len(item[0])
+
+    def __contains__(self, ref: str) -> bool:
+        with self._lock:
+            return self.name_of(ref) in self._items
+
+
+def file_etag(path: str) -> str:
+    st = os.stat(path)
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Single 'bytes=a-b' range -> inclusive (start, end); None means serve everything"""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None  # absent, foreign unit or multipart: a full 200 is a valid answer
+    spec = header[len("bytes="):].strip()
+    start_s, _, end_s = spec.partition("-")
+    try:
+        if start_s == "":              # suffix range: last N bytes
+            length = int(end_s)
+            if length <= 0:
+                raise ValueError
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+def _iter_bytes(data: bytes, start: int, end: int) -> Iterator[bytes]:
+    view = memoryview(data)
+    for offset in range(start, end + 1, CHUNK_SIZE):
+        yield bytes(view[offset:min(offset + CHUNK_SIZE, end + 1)])
+
+
+def _iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def pdf_response(request: Request, filename: str, data: bytes = None,
+                 path: str = None, etag: str = None, media_type: str = "application/pdf"):
+    """Stream a PDF (or a cached export) from bytes or a file, honouring If-None-Match and Range"""
+    if data is not None:
+        size = len(data)
+        etag = etag or '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+    else:
+        size = os.path.getsize(path)
+        etag = etag or file_etag(path)
+
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        byte_range = _parse_range(request.headers.get("range", ""), size)
+
+    start, end = byte_range or (0, size - 1)
+    status = 200
+    if byte_range:
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1 if size else 0)
+
+    body = _iter_bytes(data, start, end) if data is not None else _iter_file(path, start, end)
+    return StreamingResponse(body, status_code=status, headers=headers,
+                             media_type=media_type)
@@ -0,0 +1,492 @@
+"""
+Bulk 80G donation receipts.
+
+One receipt per successful donation (mode "donation") or per donor and
+fiscal year (mode "donor_year"; Indian fiscal year, April to March).
+
+- Donations are read through a server-side cursor in chunks of
+  RECEIPT_CHUNK_SIZE, so memory stays bounded however many there are.
+- Numbers are issued idempotently. A receipt is keyed by its payment (or
+  donor + year), and the first time a key is seen it takes the next number
+  from a per-year counter. The counter row is locked, so numbers are
+  gapless even with concurrent runs; re-running a year keeps every number.
+- Chunks are rendered in a process pool with at most two chunks in flight
+  per process. Each worker builds the agent's reportlab styles, the logo
+  and the static text once.
+- PDFs go to the artifact store under a hash of their content. A receipt
+  whose content has not changed is not rendered again.
+- Every run is a batch. It records which receipts it covered, and the PDF each
+  one had then, in receipt_batch_items. Its receipts can be downloaded as one
+  streamed ZIP, unchanged by later runs of the same year.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import text
+
+from ml.db import get_engine
+from services.artifact_store import ArtifactStore, LocalDirectoryBackend, store_from_env
+from services.report_periods import fiscal_year_bounds, fiscal_year_label
+from services.zip_stream import stream_zip
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_VERSION = "1"          # bump when the receipt layout changes
+RECEIPT_PREFIX = os.getenv("RECEIPT_PREFIX", "80G")
+CHUNK_SIZE = int(os.getenv("RECEIPT_CHUNK_SIZE", 200))
+MODES = ("donation", "donor_year")
+
+# The only definition of the receipt tables (schema.sql points here)
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS receipt_batches (
+        batch_id     UUID PRIMARY KEY,
+        fiscal_year  INTEGER NOT NULL,
+        mode         VARCHAR(16) NOT NULL,
+        status       VARCHAR(12) NOT NULL DEFAULT 'running',
+        total        INTEGER NOT NULL DEFAULT 0,
+        rendered     INTEGER NOT NULL DEFAULT 0,
+        reused       INTEGER NOT NULL DEFAULT 0,
+        failed       INTEGER NOT NULL DEFAULT 0,
+        error        TEXT,
+        created_at   TIMESTAMP NOT NULL DEFAULT NOW(),
+        finished_at  TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS receipt_counters (
+        fiscal_year  INTEGER PRIMARY KEY,
+        last_number  INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS donation_receipts (
+        receipt_key     TEXT PRIMARY KEY,
+        receipt_number  TEXT NOT NULL UNIQUE,
+        fiscal_year     INTEGER NOT NULL,
+        mode            VARCHAR(16) NOT NULL,
+        donor_name      TEXT,
+        donor_email     TEXT,
+        amount          NUMERIC NOT NULL,
+        artifact_key    TEXT,
+        batch_id        UUID,               -- the batch that issued the number
+        issued_at       TIMESTAMP NOT NULL DEFAULT NOW(),
+        rendered_at     TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_donation_receipts_batch
+        ON donation_receipts (batch_id, receipt_number);
+    CREATE TABLE IF NOT EXISTS receipt_batch_items (
+        batch_id      UUID NOT NULL,
+        receipt_key   TEXT NOT NULL,
+        artifact_key  TEXT,
+        PRIMARY KEY (batch_id, receipt_key)
+    )
+"""
+
+DONATIONS_SQL = """
+    SELECT payment_id, donor_name, donor_email, amount, payment_date,
+           payment_mode, transaction_id, school_name, campaign_name
+    FROM donations_raw
+    WHERE payment_status = 'Success'
+      AND payment_date >= :start_date AND payment_date < :end_date
+    ORDER BY payment_date, payment_id
+"""
+
+DONOR_YEAR_SQL = """
+    SELECT donor_name, donor_email,
+           SUM(amount) AS amount,
+           json_agg(json_build_object(
+               'payment_id', payment_id, 'payment_date', payment_date, 'amount', amount,
+               'payment_mode', payment_mode, 'transaction_id', transaction_id,
+               'school_name', school_name, 'campaign_name', campaign_name
+           ) ORDER BY payment_date, payment_id) AS donations
+    FROM donations_raw
+    WHERE payment_status = 'Success'
+      AND payment_date >= :start_date AND payment_date < :end_date
+    GROUP BY donor_name, donor_email
+    ORDER BY MIN(payment_date), donor_email, donor_name
+"""
+
+# Existing numbers for a chunk, read under the counter lock
+EXISTING_SQL = """
+    SELECT receipt_key, receipt_number, amount, artifact_key
+    FROM donation_receipts WHERE receipt_key = ANY(:keys)
+"""
+
+INSERT_SQL = """
+    INSERT INTO donation_receipts (receipt_key, receipt_number, fiscal_year, mode,
+                                   donor_name, donor_email, amount, batch_id)
+    VALUES (:receipt_key, :receipt_number, :fiscal_year, :mode,
+            :donor_name, :donor_email, :amount, :batch_id)
+"""
+
+# A batch's receipts; artifact_key is set up front when the PDF is reused as is
+BATCH_ITEM_SQL = """
+    INSERT INTO receipt_batch_items (batch_id, receipt_key, artifact_key)
+    VALUES (:batch_id, :receipt_key, :artifact_key)
+    ON CONFLICT (batch_id, receipt_key) DO NOTHING
+"""
+
+
+def receipt_filename(receipt_number: str) -> str:
+    return f"receipt_{re.sub(r'[^A-Za-z0-9]+', '_', receipt_number)}.pdf"
+
+
+def _content_key(receipt: dict) -> str:
+    raw = json.dumps([RECEIPT_VERSION, receipt["receipt_number"], receipt["donor_name"],
+                      receipt["donor_email"], receipt["amount"], receipt["donations"]],
+                     sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def receipt_store() -> ArtifactStore:
+    """The shared artifact store when configured (ARTIFACT_BACKEND), else a local directory"""
+    cache_dir = Path("cache") / "artifacts"
+    return store_from_env(cache_dir) or ArtifactStore(
+        LocalDirectoryBackend(os.getenv("RECEIPT_DIR", "receipts")), cache_dir=cache_dir
+    )
+
+
+# ==================== WORKER PROCESS ====================
+_renderer = None
+
+
+def _init_worker():
+    global _renderer
+    from agent import FinalDonationReportAgent
+    _renderer = ReceiptRenderer(FinalDonationReportAgent(), receipt_store())
+
+
+def _render_chunk(receipts: List[dict]) -> List[tuple]:
+    """Render and store a chunk; returns (receipt_key, artifact_key or None, error)"""
+    results = []
+    for receipt in receipts:
+        try:
+            key = receipt["artifact_key"]
+            if not _renderer.store.exists(key):
+                _renderer.store.put(key, _renderer.render(receipt), receipt_filename(receipt["receipt_number"]))
+            results.append((receipt["receipt_key"], key, None))
+        except Exception as e:
+            results.append((receipt["receipt_key"], None, str(e)))
+    return results
+
+
+class ReceiptRenderer:
+    """Per-worker receipt template: styles, logo and static text prepared once"""
+
+    def __init__(self, agent, store: ArtifactStore):
+        from reportlab.lib.pagesizes import A5
+        from reportlab.lib.units import mm
+        from reportlab.lib.utils import ImageReader
+        from reportlab.platypus import Paragraph, TableStyle
+
+        self.agent = agent
+        self.store = store
+        self.pagesize = A5
+        self.mm = mm
+        styles = agent.styles
+
+        self.logo = None
+        if os.path.exists(agent.logo_path):
+            try:
+                # Decoded and downscaled once per worker, then drawn on every receipt
+                from PIL import Image as PILImage
+                image = PILImage.open(agent.logo_path)
+                image.thumbnail((240, 240))
+                self.logo = ImageReader(image)
+            except Exception as e:
+                logger.warning(f"Receipt logo error: {e}")
+
+        trust_pan = os.getenv("TRUST_PAN", "")
+        registration = os.getenv("TRUST_80G_REGISTRATION", "")
+        self.header = [
+            Paragraph(agent.company_name, styles['CoverCompany'].clone('ReceiptCompany', fontSize=16, leading=20)),
+            Paragraph(os.getenv("TRUST_ADDRESS", agent.tagline), styles['CoverTagline'].clone('ReceiptAddress', spaceAfter=4)),
+            Paragraph("DONATION RECEIPT — SECTION 80G", styles['SectionHeader']),
+        ]
+        self.declaration = Paragraph(
+            f"Donations to {agent.company_name} are eligible for deduction under section 80G of the "
+            f"Income Tax Act, 1961"
+            + (f" (registration {registration})" if registration else "")
+            + (f". PAN of the trust: {trust_pan}." if trust_pan else "."),
+            styles['BodyTextClean']
+        )
+        self.table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), agent.primary_navy),
+            ('TEXTCOLOR', (0, 0), (-1, 0), agent.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Times-Roman'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, agent.border_gray),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [agent.white, agent.light_silver]),
+        ])
+        self.info_style = TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Times-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Times-Roman'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ])
+
+    def _draw_page(self, canvas_obj, doc):
+        if self.logo is not None:
+            size = 16 * self.mm
+            canvas_obj.drawImage(self.logo, doc.leftMargin, self.pagesize[1] - size - 6 * self.mm,
+                                 width=size, height=size, preserveAspectRatio=True, mask='auto')
+
+    def render(self, receipt: dict) -> bytes:
+        from reportlab.platypus import SimpleDocTemplate, Spacer, Table
+
+        mm, agent = self.mm, self.agent
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(
+            buffer, pagesize=self.pagesize,
+            leftMargin=12*mm, rightMargin=12*mm, topMargin=24*mm, bottomMargin=12*mm,
+            title=f"Receipt {receipt['receipt_number']}", author=agent.company_name
+        )
+        donations = receipt["donations"]
+        info = Table([
+            ["Receipt No.", receipt["receipt_number"]],
+            ["Date of issue", datetime.now().strftime('%d %B %Y')],
+            ["Financial year", fiscal_year_label(receipt["fiscal_year"])],
+            ["Received from", receipt["donor_name"] or receipt["donor_email"] or "Anonymous"],
+            ["Email", receipt["donor_email"] or "—"],
+            ["Amount", agent._format_currency(receipt["amount"])],
+        ], colWidths=[35*mm, 89*mm], style=self.info_style, hAlign='LEFT')
+
+        rows = [["Date", "Payment ID", "Mode", "Reference", "Amount"]]
+        for d in donations:
+            rows.append([
+                str(d["payment_date"])[:10], str(d["payment_id"]), d.get("payment_mode") or "—",
+                (d.get("transaction_id") or "—")[:22], agent._format_currency(d["amount"])
+            ])
+        details = Table(rows, colWidths=[20*mm, 22*mm, 18*mm, 38*mm, 26*mm],
+                        style=self.table_style, repeatRows=1)
+
+        story = list(self.header) + [info, Spacer(1, 4*mm), details, Spacer(1, 4*mm), self.declaration]
+        doc.build(story, onFirstPage=self._draw_page, onLaterPages=self._draw_page)
+        return buffer.getvalue()
+
+
+# ==================== GENERATOR ====================
+class ReceiptGenerator:
+    def __init__(self, processes: int = None):
+        self.processes = processes or int(os.getenv("RECEIPT_PROCESSES", os.cpu_count() or 1))
+        self._schema_ready = False
+
+    def ensure_schema(self):
+        if self._schema_ready:
+            return
+        with get_engine().begin() as conn:
+            for statement in SCHEMA_SQL.split(";"):
+                if statement.strip():
+                    conn.execute(text(statement))
+        self._schema_ready = True
+
+    def create_batch(self, fiscal_year: int, mode: str) -> str:
+        if mode not in MODES:
+            raise ValueError(f"Invalid receipt mode: {mode}")
+        self.ensure_schema()
+        batch_id = uuid.uuid4().hex
+        with get_engine().begin() as conn:
+            conn.execute(text(
+                "INSERT INTO receipt_batches (batch_id, fiscal_year, mode) VALUES (:b, :fy, :mode)"
+            ), {"b": batch_id, "fy": fiscal_year, "mode": mode})
+        return batch_id
+
+    def get_batch(self, batch_id: str) -> Optional[dict]:
+        self.ensure_schema()
+        try:
+            uuid.UUID(batch_id)
+        except ValueError:
+            return None
+        with get_engine().connect() as conn:
+            row = conn.execute(text("SELECT * FROM receipt_batches WHERE batch_id = :b"),
+                               {"b": batch_id}).mappings().first()
+        if row is None:
+            return None
+        batch = dict(row)
+        batch["batch_id"] = str(batch["batch_id"])
+        for column in ("created_at", "finished_at"):
+            batch[column] = batch[column].isoformat() if batch[column] else None
+        return batch
+
+    # ---------- source ----------
+    def _source(self, fiscal_year: int, mode: str) -> Iterator[List[dict]]:
+        """Chunks of receipt payloads, read through a server-side cursor"""
+        start_date, end_date = fiscal_year_bounds(fiscal_year)
+        sql = DONATIONS_SQL if mode == "donation" else DONOR_YEAR_SQL
+        with get_engine().connect() as conn:
+            result = conn.execution_options(stream_results=True, max_row_buffer=CHUNK_SIZE).execute(
+                text(sql), {"start_date": start_date, "end_date": end_date}
+            )
+            for rows in result.mappings().partitions(CHUNK_SIZE):
+                chunk = []
+                for row in rows:
+                    if mode == "donation":
+                        donations = [{k: row[k] for k in ("payment_id", "payment_date", "amount",
+                                                          "payment_mode", "transaction_id",
+                                                          "school_name", "campaign_name")}]
+                        key = f"payment:{row['payment_id']}"
+                    else:
+                        donations = row["donations"]
+                        key = f"donor:{fiscal_year}:{row['donor_email'] or ''}:{row['donor_name'] or ''}"
+                    chunk.append({
+                        "receipt_key": key,
+                        "fiscal_year": fiscal_year,
+                        "mode": mode,
+                        "donor_name": row["donor_name"],
+                        "donor_email": row["donor_email"],
+                        "amount": float(row["amount"] or 0),
+                        "donations": [dict(d, payment_date=str(d["payment_date"]),
+                                           amount=float(d["amount"] or 0)) for d in donations],
+                    })
+                yield chunk
+
+    # ---------- numbering ----------
+    def _assign_numbers(self, chunk: List[dict], fiscal_year: int, batch_id: str) -> List[dict]:
+        """Give each receipt its existing number, or the next ones from the locked year counter"""
+        keys = [r["receipt_key"] for r in chunk]
+        with get_engine().begin() as conn:
+            conn.execute(text(
+                "INSERT INTO receipt_counters (fiscal_year) VALUES (:fy) ON CONFLICT DO NOTHING"
+            ), {"fy": fiscal_year})
+            last = conn.execute(text(
+                "SELECT last_number FROM receipt_counters WHERE fiscal_year = :fy FOR UPDATE"
+            ), {"fy": fiscal_year}).scalar()
+            existing = {row.receipt_key: row for row in conn.execute(text(EXISTING_SQL), {"keys": keys})}
+
+            new_rows, changed = [], []
+            for receipt in chunk:
+                row = existing.get(receipt["receipt_key"])
+                if row is not None:
+                    receipt["receipt_number"] = row.receipt_number
+                    receipt["previous_artifact_key"] = row.artifact_key
+                    # A donor-year total grows with late donations: keep the row in line with the PDF
+                    if float(row.amount) != receipt["amount"]:
+                        changed.append({"k": receipt["receipt_key"], "amount": receipt["amount"]})
+                    continue
+                last += 1
+                receipt["receipt_number"] = f"{RECEIPT_PREFIX}/{fiscal_year_label(fiscal_year)}/{last:06d}"
+                receipt["previous_artifact_key"] = None
+                new_rows.append({k: receipt[k] for k in ("receipt_key", "receipt_number", "fiscal_year",
+                                                         "mode", "donor_name", "donor_email", "amount")}
+                                | {"batch_id": batch_id})
+            if new_rows:
+                conn.execute(text(INSERT_SQL), new_rows)
+                conn.execute(text("UPDATE receipt_counters SET last_number = :last WHERE fiscal_year = :fy"),
+                             {"last": last, "fy": fiscal_year})
+            if changed:
+                conn.execute(text("UPDATE donation_receipts SET amount = :amount WHERE receipt_key = :k"),
+                             changed)
+            for receipt in chunk:
+                receipt["artifact_key"] = _content_key(receipt)
+            conn.execute(text(BATCH_ITEM_SQL), [{
+                "batch_id": batch_id,
+                "receipt_key": r["receipt_key"],
+                "artifact_key": r["artifact_key"] if r["previous_artifact_key"] == r["artifact_key"] else None,
+            } for r in chunk])
+        return chunk
+
+    def _record(self, batch_id: str, results: List[tuple], reused: int = 0):
+        done = [{"k": key, "a": artifact} for key, artifact, error in results if artifact]
+        failed = [(key, error) for key, artifact, error in results if not artifact]
+        for key, error in failed:
+            logger.error(f"Receipt {key} failed: {error}")
+        with get_engine().begin() as conn:
+            if done:
+                conn.execute(text(
+                    "UPDATE donation_receipts SET artifact_key = :a, rendered_at = NOW() WHERE receipt_key = :k"
+                ), done)
+                conn.execute(text(
+                    "UPDATE receipt_batch_items SET artifact_key = :a WHERE batch_id = :b AND receipt_key = :k"
+                ), [dict(item, b=batch_id) for item in done])
+            conn.execute(text("""
+                UPDATE receipt_batches
+                SET rendered = rendered + :rendered, reused = reused + :reused, failed = failed + :failed
+                WHERE batch_id = :b
+            """), {"rendered": len(done), "reused": reused, "failed": len(failed), "b": batch_id})
+
+    # ---------- run ----------
+    def run(self, fiscal_year: int, mode: str = "donation", batch_id: str = None,
+            progress: Callable[[int], None] = None) -> dict:
+        """Generate (or refresh) every receipt of a fiscal year; returns the batch"""
+        batch_id = batch_id or self.create_batch(fiscal_year, mode)
+        started = datetime.now()
+        total = 0
+        try:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                     mp_context=ctx) as pool:
+                pending = set()
+                for chunk in self._source(fiscal_year, mode):
+                    chunk = self._assign_numbers(chunk, fiscal_year, batch_id)
+                    total += len(chunk)
+                    # Unchanged content already rendered: nothing to do
+                    todo = [r for r in chunk if r["previous_artifact_key"] != r["artifact_key"]]
+                    if len(todo) < len(chunk):
+                        self._record(batch_id, [], reused=len(chunk) - len(todo))
+                    if todo:
+                        pending.add(pool.submit(_render_chunk, todo))
+                    # Bounded memory: at most two chunks in flight per process
+                    while len(pending) >= self.processes * 2:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            self._record(batch_id, future.result())
+                    if progress:
+                        progress(total)
+                for future in pending:
+                    self._record(batch_id, future.result())
+            status, error = "completed", None
+        except Exception as e:
+            logger.error(f"Receipt batch {batch_id} failed: {e}", exc_info=True)
+            status, error = "failed", str(e)
+
+        with get_engine().begin() as conn:
+            conn.execute(text("""
+                UPDATE receipt_batches SET status = :status, total = :total, error = :error,
+                       finished_at = NOW()
+                WHERE batch_id = :b
+            """), {"status": status, "total": total, "error": error, "b": batch_id})
+        logger.info(f"Receipt batch {batch_id}: {total} receipts for FY {fiscal_year_label(fiscal_year)} "
+                    f"in {(datetime.now() - started).total_seconds():.1f}s ({status})")
+        return self.get_batch(batch_id)
+
+    # ---------- download ----------
+    def stream_batch_zip(self, batch_id: str) -> Iterator[bytes]:
+        """Every receipt rendered or reused by a batch as a streamed ZIP, read back through a cursor"""
+        store = receipt_store()
+
+        def entries():
+            with get_engine().connect() as conn:
+                result = conn.execution_options(stream_results=True, max_row_buffer=CHUNK_SIZE).execute(text("""
+                    SELECT r.receipt_number, i.artifact_key
+                    FROM receipt_batch_items i
+                    JOIN donation_receipts r ON r.receipt_key = i.receipt_key
+                    WHERE i.batch_id = :b AND i.artifact_key IS NOT NULL
+                    ORDER BY r.receipt_number
+                """), {"b": batch_id})
+                for row in result:
+                    data = store.get(row.artifact_key)
+                    if data is None:
+                        logger.warning(f"Receipt {row.receipt_number} missing from the artifact store")
+                        continue
+                    yield receipt_filename(row.receipt_number), data
+
+        return stream_zip(entries())
+
+
+_generator = None
+
+
+def get_receipt_generator() -> ReceiptGenerator:
+    global _generator
+    if _generator is None:
+        _generator = ReceiptGenerator()
+    return _generator
@@ -0,0 +1,92 @@
+"""
+PDF render timings.
+
+A render is timed section by section. Each section's time is what it took to
+build its flowables plus the layout and drawing it caused inside
+doc.build(), which the agent measures with zero-size marker flowables.
+"write" is the final page and PDF serialisation. Timings are aggregated per
+process and reported by render_timings() on /health. Renders in worker
+processes, such as the batch CLI and school statements, are counted in
+those processes only.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+_lock = threading.Lock()
+_stats: Dict[str, dict] = {}
+
+
+class SectionTimer:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.seconds: Dict[str, float] = {}
+        self._started = time.perf_counter()
+        self._current: Optional[str] = None
+        self._since = 0.0
+
+    def add(self, name: str, seconds: float):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    @contextmanager
+    def section(self, name: str):
+        """Time spent building a section's flowables"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def enter(self, name: Optional[str]):
+        """Layout and drawing from now on belong to `name` (called while the document builds)"""
+        now = time.perf_counter()
+        if self._current is not None:
+            self.add(self._current, now - self._since)
+        self._current, self._since = name, now
+
+    def finish(self) -> float:
+        """Close the last section and record the render; returns its total seconds"""
+        self.enter(None)
+        total = time.perf_counter() - self._started
+        _record(self.kind, self.seconds, total)
+        return total
+
+    def describe(self) -> str:
+        return ", ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in self.seconds.items())
+
+
+def _record(kind: str, sections: Dict[str, float], total: float):
+    with _lock:
+        stats = _stats.setdefault(kind, {"renders": 0, "total": 0.0, "max": 0.0, "last": 0.0, "sections": {}})
+        stats["renders"] += 1
+        stats["total"] += total
+        stats["max"] = max(stats["max"], total)
+        stats["last"] = total
+        for name, seconds in sections.items():
+            s = stats["sections"].setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+            s["count"] += 1
+            s["total"] += seconds
+            s["max"] = max(s["max"], seconds)
+            s["last"] = seconds
+
+
+def render_timings() -> Dict[str, dict]:
+    """{kind: {renders, avg_ms, max_ms, last_ms, sections: {name: {avg_ms, max_ms, last_ms}}}}"""
+    def ms(value):
+        return round(value * 1000, 1)
+
+    with _lock:
+        return {
+            kind: {
+                "renders": stats["renders"],
+                "avg_ms": ms(stats["total"] / stats["renders"]),
+                "max_ms": ms(stats["max"]),
+                "last_ms": ms(stats["last"]),
+                "sections": {
+                    name: {"avg_ms": ms(s["total"] / s["count"]), "max_ms": ms(s["max"]), "last_ms": ms(s["last"])}
+                    for name, s in stats["sections"].items()
+                },
+            }
+            for kind, stats in _stats.items()
+        }
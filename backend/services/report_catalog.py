@@ -0,0 +1,149 @@
+"""
+Catalog of generated report artifacts (SQLite, WAL), one per node.
+
+Every PDF the agent produces — a file in reports/, an in-memory render, an
+S3 object or a shared artifact — is recorded with its period, year,
+fingerprint, size, location and expiry. Listing pages through an index
+instead of globbing and stat-ing reports/, and the scheduled sweeper finds
+expired artifacts with one indexed query, so neither cost grows with the
+number of files on disk.
+"""
+from pathlib import Path
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS report_artifacts (
+        location          TEXT PRIMARY KEY,
+        report_id         TEXT,
+        period_type       TEXT NOT NULL,
+        year              INTEGER,
+        data_fingerprint  TEXT,
+        size_bytes        INTEGER NOT NULL DEFAULT 0,
+        storage           TEXT NOT NULL,
+        created_at        REAL NOT NULL,
+        expires_at        REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_report_artifacts_created ON report_artifacts (created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_report_artifacts_expires ON report_artifacts (expires_at)"
+    " WHERE expires_at IS NOT NULL",
+)
+
+COLUMNS = ("location", "report_id", "period_type", "year", "data_fingerprint",
+           "size_bytes", "storage", "created_at", "expires_at")
+
+# donation_report_<period>_<year|current>_<timestamp or content key>.pdf
+FILENAME_RE = re.compile(r"donation_report_(?P<period>[a-z_]+?)_(?P<year>\d{4}|current)_")
+
+
+def storage_of(location: str) -> str:
+    if location.startswith("http"):
+        return "s3"
+    if "://" in location:
+        return location.split("://", 1)[0]     # memory / artifact
+    return "disk"
+
+
+class ReportCatalog:
+    def __init__(self, path, busy_timeout_ms: int = 5000):
+        self.path = Path(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.busy_timeout_ms / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            for statement in SCHEMA_SQL:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    def record(self, location: str, period_type: str, year: Optional[int] = None,
+               report_id: str = None, data_fingerprint: str = None, size_bytes: int = 0,
+               ttl_seconds: Optional[int] = None, created_at: float = None):
+        """Add or refresh an artifact; ttl_seconds=None keeps it until removed"""
+        created_at = created_at or time.time()
+        self._conn().execute(
+            f"""
+            INSERT INTO report_artifacts ({", ".join(COLUMNS)})
+            VALUES ({", ".join("?" * len(COLUMNS))})
+            ON CONFLICT (location) DO UPDATE SET
+                report_id = excluded.report_id, data_fingerprint = excluded.data_fingerprint,
+                size_bytes = excluded.size_bytes, created_at = excluded.created_at,
+                expires_at = excluded.expires_at
+            """,
+            (location, report_id, period_type, year, data_fingerprint, size_bytes,
+             storage_of(location), created_at,
+             created_at + ttl_seconds if ttl_seconds is not None else None)
+        )
+
+    def remove(self, location: str):
+        self._conn().execute("DELETE FROM report_artifacts WHERE location = ?", (location,))
+
+    def list(self, limit: int = 50, offset: int = 0,
+             period_type: str = None) -> Tuple[List[Dict], int]:
+        """Newest first; returns (page, total)"""
+        where, params = ("WHERE period_type = ?", (period_type,)) if period_type else ("", ())
+        conn = self._conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM report_artifacts {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM report_artifacts {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            params + (limit, offset)
+        ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def expired(self, now: float = None, limit: int = 500) -> List[Dict]:
+        rows = self._conn().execute(
+            "SELECT * FROM report_artifacts WHERE expires_at IS NOT NULL AND expires_at <= ?"
+            " ORDER BY expires_at LIMIT ?",
+            (now or time.time(), limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def created_before(self, cutoff: float, limit: int = 500) -> List[Dict]:
+        rows = self._conn().execute(
+            "SELECT * FROM report_artifacts WHERE created_at < ? ORDER BY created_at LIMIT ?",
+            (cutoff, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def is_empty(self) -> bool:
+        return self._conn().execute("SELECT 1 FROM report_artifacts LIMIT 1").fetchone() is None
+
+    def adopt_directory(self, directory, ttl_for) -> int:
+        """
+        One-off import of PDFs already in a directory (reports written before
+        the catalog existed). ttl_for(period_type) gives each file's lifetime.
+        """
+        adopted = 0
+        for file in Path(directory).glob("*.pdf"):
+            match = FILENAME_RE.match(file.name)
+            period_type = match.group("period") if match else "unknown"
+            year = match.group("year") if match else None
+            stats = file.stat()
+            self.record(
+                str(file), period_type,
+                year=int(year) if year and year.isdigit() else None,
+                size_bytes=stats.st_size, ttl_seconds=ttl_for(period_type),
+                created_at=stats.st_mtime
+            )
+            adopted += 1
+        if adopted:
+            logger.info(f"Report catalog adopted {adopted} existing files from {directory}")
+        return adopted
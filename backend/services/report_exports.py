@@ -0,0 +1,238 @@
+"""
+Tabular report exports: CSV, XLSX, Parquet and NDJSON.
+
+A table is (name, columns, batches): columns are (name, type) pairs with
+type one of "string", "int64", "float64" or "timestamp", and batches is an
+iterable of row lists. write_export() turns tables into bytes chunk by
+chunk, so a StreamingResponse can send the file while it is being written
+and memory holds about one batch:
+
+- csv     : one table, UTF-8 with a BOM so Excel keeps non-ASCII names
+- ndjson  : one table, a JSON object per row (timestamps in ISO 8601)
+- parquet : one table, one row group per batch (pyarrow)
+- xlsx    : one sheet per table, continued on a new sheet past Excel's
+            row limit (openpyxl write-only mode, which spools rows to a
+            temporary file; the finished workbook is then read back in chunks)
+
+The report tables come from a ReportDataset (dataset_tables), so an export
+holds exactly the figures of the PDF for the same data. Transaction-level
+exports and /api/donations/export stream donations_raw through a
+server-side cursor instead (FinalDonationReportAgent.iter_transactions).
+
+pyarrow and openpyxl are optional: missing_dependency() tells the API to
+refuse those formats up front instead of failing halfway through a download.
+"""
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from services.zip_stream import ChunkSink
+
+EXPORT_FORMATS = ("csv", "xlsx", "parquet", "ndjson")
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "ndjson": "application/x-ndjson",
+}
+
+_DEPENDENCIES = {"xlsx": "openpyxl", "parquet": "pyarrow"}
+
+Columns = Sequence[Tuple[str, str]]
+Table = Tuple[str, Columns, Iterable[List[tuple]]]
+
+TABLE_COLUMNS: Dict[str, Columns] = {
+    "summary": (("metric", "string"), ("value", "float64")),
+    "donors": (("donor_name", "string"), ("number_of_donations", "int64"),
+               ("total_donated", "float64"), ("average_donation", "float64"),
+               ("donor_type", "string")),
+    "schools": (("school_name", "string"), ("school_location", "string"),
+                ("donation_count", "int64"), ("total_amount", "float64"),
+                ("unique_donors", "int64")),
+    "campaigns": (("campaign_name", "string"), ("donation_type", "string"),
+                  ("donation_count", "int64"), ("total_amount", "float64"),
+                  ("unique_donors", "int64")),
+    "monthly": (("month_number", "int64"), ("month_name", "string"),
+                ("transaction_count", "int64"), ("total_amount", "float64"),
+                ("unique_donors", "int64")),
+    "comparison": (("metric", "string"), ("this_period", "float64"),
+                   ("previous_period", "float64"), ("change_pct", "float64")),
+}
+TABLES = tuple(TABLE_COLUMNS)
+
+# Selected from donations_raw in this order (contact details stay out)
+TRANSACTION_COLUMNS: Columns = (
+    ("payment_id", "int64"), ("payment_date", "timestamp"),
+    ("donor_name", "string"), ("donor_email", "string"), ("donor_type", "string"),
+    ("school_name", "string"), ("school_location", "string"),
+    ("campaign_name", "string"), ("donation_type", "string"),
+    ("payment_mode", "string"), ("payment_status", "string"),
+    ("amount", "int64"), ("transaction_id", "string"),
+)
+
+# Same metrics as the PDF's period-over-period table
+COMPARISON_METRICS = ("total_amount", "total_transactions", "successful_transactions",
+                      "unique_donors", "avg_donation")
+
+# Rows per server-side cursor fetch (and per Parquet row group)
+BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", 5000))
+EXCEL_MAX_ROWS = 1_048_576
+READ_CHUNK = 256 * 1024
+
+
+def missing_dependency(fmt: str) -> Optional[str]:
+    """Name of the module a format needs but is not installed, else None"""
+    module = _DEPENDENCIES.get(fmt)
+    return module if module and importlib.util.find_spec(module) is None else None
+
+
+def export_key(content_key: str, fmt: str, tables: Sequence[str], limit: int) -> str:
+    """Cache key of an export of the report whose artifact key is content_key"""
+    return hashlib.sha256(f"{content_key}|{fmt}|{','.join(tables)}|{limit}".encode()).hexdigest()
+
+
+# ==================== REPORT TABLES ====================
+def _coerce(value: Any, kind: str):
+    if value is None:
+        return None
+    if kind == "int64":
+        return int(value)
+    if kind == "float64":
+        return float(value)
+    if kind == "string":
+        return str(value).strip()
+    return value
+
+
+def _rows(items: Iterable[Dict[str, Any]], columns: Columns) -> List[tuple]:
+    return [tuple(_coerce(item.get(name), kind) for name, kind in columns) for item in items]
+
+
+def dataset_tables(dataset, names: Sequence[str]) -> List[Table]:
+    """The named sections of a ReportDataset as tables (monthly / comparison only when present)"""
+    tables = []
+    for name in names:
+        columns = TABLE_COLUMNS[name]
+        if name == "summary":
+            figures = {**dataset.summary, **dataset.status_summary}
+            rows = _rows(({"metric": k, "value": v} for k, v in figures.items()), columns)
+        elif name == "monthly":
+            if dataset.monthly_data is None:
+                continue
+            rows = _rows(dataset.monthly_data, columns)
+        elif name == "comparison":
+            if not dataset.comparison:
+                continue
+            previous = dataset.comparison.get("summary") or {}
+            rows = []
+            for metric in COMPARISON_METRICS:
+                current_value = float(dataset.summary.get(metric) or 0)
+                previous_value = float(previous.get(metric) or 0)
+                change = ((current_value - previous_value) / previous_value * 100
+                          if previous_value else None)
+                rows.append((metric, current_value, previous_value, change))
+        else:
+            rows = _rows(getattr(dataset, name), columns)
+        tables.append((name, columns, [rows]))
+    return tables
+
+
+# ==================== WRITERS ====================
+def write_export(fmt: str, tables: Sequence[Table]) -> Iterator[bytes]:
+    if fmt == "xlsx":
+        return _write_xlsx(tables)
+    if len(tables) != 1:
+        raise ValueError(f"A {fmt} export holds exactly one table")
+    _, columns, batches = tables[0]
+    if fmt == "csv":
+        return _write_csv(columns, batches)
+    if fmt == "parquet":
+        return _write_parquet(columns, batches)
+    if fmt == "ndjson":
+        return _write_ndjson(columns, batches)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def _write_csv(columns: Columns, batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(name for name, _ in columns)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _json_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _write_ndjson(columns: Columns, batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    names = [name for name, _ in columns]
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(names, row)), default=_json_value, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+def _write_parquet(columns: Columns, batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"string": pa.string(), "int64": pa.int64(),
+             "float64": pa.float64(), "timestamp": pa.timestamp("us")}
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for rows in batches:
+            if not rows:
+                continue
+            arrays = [pa.array(values, type=field.type)
+                      for values, field in zip(zip(*rows), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    yield sink.drain()     # footer
+
+
+def _write_xlsx(tables: Sequence[Table]) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for name, columns, batches in tables:
+        header = [column for column, _ in columns]
+        sheet, part, written = None, 1, EXCEL_MAX_ROWS
+        for rows in batches:
+            for row in rows:
+                if written == EXCEL_MAX_ROWS:
+                    sheet = workbook.create_sheet(name if part == 1 else f"{name} ({part})")
+                    sheet.append(header)
+                    part, written = part + 1, 1
+                sheet.append(row)
+                written += 1
+        if sheet is None:
+            workbook.create_sheet(name).append(header)
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while chunk := f.read(READ_CHUNK):
+                yield chunk
+    finally:
+        os.unlink(path)
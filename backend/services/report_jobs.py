@@ -0,0 +1,152 @@
+"""
+Asynchronous report jobs with single-flight deduplication.
+
+A job is keyed by the agent's report_id (period, year, date range, version).
+While a job for a report_id is queued or running, identical submissions
+attach to it instead of building the same PDF again. A forced submission
+upgrades a job that has not started yet. It does not attach to a job already
+running without force; it starts its own build instead. Callers poll status and
+progress by job id, or block on wait() — the synchronous /reports/* endpoints
+do the latter.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import logging
+import os
+import threading
+import uuid
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+
+
+@dataclass
+class ReportJob:
+    """One report build, shared by every request that asked for it"""
+    job_id: str
+    report_id: str
+    period_type: str
+    year: Optional[int]
+    force_regenerate: bool = False
+    status: str = QUEUED
+    progress: int = 0
+    stage: str = "queued"
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    waiters: int = 1
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "report_id": self.report_id,
+            "period_type": self.period_type,
+            "year": self.year,
+            "status": self.status,
+            "progress": self.progress,
+            "stage": self.stage,
+            "waiters": self.waiters,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ReportJobManager:
+    """In-process job registry backed by a small thread pool"""
+
+    def __init__(self, agent_factory: Callable, max_workers: int = None,
+                 retention: timedelta = timedelta(hours=1)):
+        self._agent_factory = agent_factory
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("REPORT_WORKERS", 2)),
+            thread_name_prefix="report-job"
+        )
+        self._retention = retention
+        self._jobs: Dict[str, ReportJob] = {}
+        self._inflight: Dict[str, ReportJob] = {}   # report_id -> job
+        self._lock = threading.Lock()
+
+    def submit(self, period_type: str, year: int = None,
+               force_regenerate: bool = False, priority: int = 0) -> ReportJob:
+        """
+        Start a build, or attach to the identical one already in flight.
+        priority only matters to the Postgres queue; the local pool is FIFO.
+        """
+        report_id, resolved_year = self._agent_factory().resolve_report_id(period_type, year)
+
+        with self._lock:
+            self._prune()
+            job = self._inflight.get(report_id)
+            if job is not None and (job.force_regenerate or not force_regenerate
+                                    or job.status == QUEUED):
+                job.force_regenerate = job.force_regenerate or force_regenerate
+                job.waiters += 1
+                logger.info(f"Attached to in-flight report job {job.job_id} ({report_id})")
+                return job
+
+            job = ReportJob(
+                job_id=uuid.uuid4().hex,
+                report_id=report_id,
+                period_type=period_type,
+                year=resolved_year,
+                force_regenerate=force_regenerate,
+            )
+            self._jobs[job.job_id] = job
+            self._inflight[report_id] = job
+
+        self._executor.submit(self._run, job)
+        logger.info(f"Queued report job {job.job_id} for {period_type} {resolved_year or ''}")
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: ReportJob):
+        # Under the lock, so a forced submission either upgrades this job first or starts its own
+        with self._lock:
+            job.status, job.started_at = RUNNING, datetime.now()
+            force_regenerate = job.force_regenerate
+
+        def on_progress(percent: int, stage: str):
+            job.progress, job.stage = percent, stage
+
+        try:
+            job.result = self._agent_factory().generate_report(
+                job.period_type, year=job.year,
+                force_regenerate=force_regenerate, progress=on_progress
+            )
+            job.status, job.progress, job.stage = COMPLETED, 100, "done"
+        except Exception as e:
+            logger.error(f"Report job {job.job_id} failed: {e}")
+            job.status, job.error, job.stage = FAILED, str(e), "failed"
+        finally:
+            job.finished_at = datetime.now()
+            with self._lock:
+                if self._inflight.get(job.report_id) is job:
+                    del self._inflight[job.report_id]
+            job._done.set()
+
+    def _prune(self):
+        cutoff = datetime.now() - self._retention
+        for job_id in [j.job_id for j in self._jobs.values()
+                       if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
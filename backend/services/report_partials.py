@@ -0,0 +1,247 @@
+"""
+Month-segmented report aggregation.
+
+A report period is split into calendar-month segments, each with its own
+fingerprint. For every segment the agent keeps a partial aggregate:
+- totals (sums, counts, min / max)
+- per-status counts
+- per-donor, per-school and per-campaign aggregates
+- donor key sets, used as exact distinct-donor sketches
+
+Partials are cached under their fingerprint, so only months whose data
+changed are read back from the database. merge_partials() then folds the
+months into the same sections a single full-period query would produce.
+A late status change in January recomputes January only.
+compare_years() lays the same partials out year against year.
+
+Distinct payment counts are summed across months, which assumes a
+payment_id never spans two months.
+"""
+import calendar
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+
+def partial_from_row(row) -> Dict[str, Any]:
+    """One MONTH_PARTIALS_SQL row -> a JSON-serialisable partial"""
+    def num(value):
+        return float(value) if isinstance(value, Decimal) else value
+
+    return {
+        "month": row["month"],
+        "month_name": row["month_name"],
+        "payments": row["payments"],
+        "ok_payments": row["ok_payments"] or 0,
+        "success_amount": num(row["success_amount"]),
+        "success_rows": row["success_rows"],
+        "failed_rows": row["failed_rows"],
+        "min_success": num(row["min_success"]),
+        "max_success": num(row["max_success"]),
+        "donor_keys": row["donor_keys"] or [],
+        # [donor_key, display name, payments, rows, total]
+        "donors": row["donors"] or [],
+        # [school_name, school_location, payments, total, donor_keys]
+        "schools": row["schools"] or [],
+        # [campaign_name, payments, total, donor_keys]
+        "campaigns": row["campaigns"] or [],
+        # [payment_status, count, total]
+        "statuses": row["statuses"] or [],
+    }
+
+
+def merge_partials(partials: List[Dict[str, Any]], limit: Optional[int] = 10,
+                   with_monthly: bool = False) -> Dict[str, Any]:
+    """Fold month partials into summary / donors / schools / campaigns / statuses / monthly (limit=None keeps all)"""
+    payments = success_rows = failed_rows = 0
+    success_amount = 0.0
+    min_success: Optional[float] = None
+    max_success: Optional[float] = None
+    all_donors = set()
+    donors: Dict[str, list] = {}
+    schools: Dict[tuple, list] = {}
+    campaigns: Dict[str, list] = {}
+    statuses: Dict[Any, list] = {}
+    monthly = []
+
+    for p in sorted(partials, key=lambda p: p["month"]):
+        payments += p["payments"]
+        success_rows += p["success_rows"]
+        failed_rows += p["failed_rows"]
+        success_amount += p["success_amount"] or 0
+        if p["min_success"] is not None:
+            min_success = p["min_success"] if min_success is None else min(min_success, p["min_success"])
+        if p["max_success"] is not None:
+            max_success = p["max_success"] if max_success is None else max(max_success, p["max_success"])
+        all_donors.update(p["donor_keys"])
+
+        for key, name, n_pay, n_rows, total in p["donors"]:
+            d = donors.setdefault(key, [name, 0, 0, 0.0])
+            d[1] += n_pay
+            d[2] += n_rows
+            d[3] += total or 0
+
+        for name, location, n_pay, total, keys in p["schools"]:
+            s = schools.setdefault((name, location), [0, 0.0, set()])
+            s[0] += n_pay
+            s[1] += total or 0
+            s[2].update(keys)
+
+        for name, n_pay, total, keys in p["campaigns"]:
+            c = campaigns.setdefault(name, [0, 0.0, set()])
+            c[0] += n_pay
+            c[1] += total or 0
+            c[2].update(keys)
+
+        for status, count, total in p["statuses"]:
+            st = statuses.setdefault(status, [0, 0.0])
+            st[0] += count
+            st[1] += total or 0
+
+        if with_monthly and p["ok_payments"]:
+            monthly.append({
+                "month_number": int(p["month"][5:7]),
+                "month_name": p["month_name"],
+                "transaction_count": p["ok_payments"],
+                "total_amount": p["success_amount"] or 0,
+                "unique_donors": len(p["donors"]),
+            })
+
+    def top(items):
+        return sorted(items, key=lambda item: item["total_amount"], reverse=True)[:limit]
+
+    return {
+        "summary": {
+            "total_transactions": payments,
+            "unique_donors": len(all_donors),
+            "total_amount": success_amount,
+            "avg_donation": success_amount / success_rows if success_rows else 0,
+            "min_donation": min_success or 0,
+            "max_donation": max_success or 0,
+            "successful_transactions": success_rows,
+            "failed_transactions": failed_rows,
+        },
+        "donors": [
+            {
+                "donor_name": name,
+                "number_of_donations": n_pay,
+                "total_donated": total,
+                "average_donation": total / n_rows if n_rows else 0,
+                "donor_type": "Recurring" if n_pay > 1 else "One-time",
+            }
+            for name, n_pay, n_rows, total in sorted(donors.values(), key=lambda d: d[3], reverse=True)[:limit]
+        ],
+        "schools": top(
+            {
+                "school_name": name or "Not Specified",
+                "school_location": location or "Unknown",
+                "donation_count": n_pay,
+                "total_amount": total,
+                "unique_donors": len(keys),
+            }
+            for (name, location), (n_pay, total, keys) in schools.items()
+        ),
+        "campaigns": top(
+            {
+                "campaign_name": name or "General Fund",
+                "donation_type": "Recurring" if n_pay > len(keys) else "One-time",
+                "donation_count": n_pay,
+                "total_amount": total,
+                "unique_donors": len(keys),
+            }
+            for name, (n_pay, total, keys) in campaigns.items()
+        ),
+        "statuses": sorted(
+            ({"payment_status": status, "count": count, "total_amount": total}
+             for status, (count, total) in statuses.items()),
+            key=lambda st: st["count"], reverse=True
+        ),
+        "monthly": monthly if with_monthly else None,
+    }
+
+
+def _change_pct(current: float, previous: float) -> Optional[float]:
+    return (current - previous) / previous * 100 if previous else None
+
+
+def compare_years(partials_by_year: Dict[int, List[Dict[str, Any]]], month_order: List[int],
+                  limit: int = 10) -> Dict[str, Any]:
+    """
+    Years side by side from their month partials:
+    - summary : per-year totals, growth and donor retention against the year before it
+    - monthly : each month's success total per year, in month_order
+    - schools / campaigns : per-year totals and the change from the first to the last year,
+      the `limit` largest in the last year
+
+    Retention is the share of the previous year's successful donors who gave again.
+    """
+    years = sorted(partials_by_year)
+    merged = {year: merge_partials(partials_by_year[year], limit=None, with_monthly=True) for year in years}
+    donor_sets = {
+        year: {donor[0] for p in partials_by_year[year] for donor in p["donors"]}
+        for year in years
+    }
+
+    summary = []
+    for i, year in enumerate(years):
+        s = merged[year]["summary"]
+        row = {
+            "year": year,
+            "total_amount": s["total_amount"],
+            "total_transactions": s["total_transactions"],
+            "successful_transactions": s["successful_transactions"],
+            "unique_donors": len(donor_sets[year]),
+            "avg_donation": s["avg_donation"],
+            "growth_pct": None,
+            "new_donors": len(donor_sets[year]),
+            "retained_donors": None,
+            "retention_pct": None,
+        }
+        if i:
+            previous = years[i - 1]
+            retained = len(donor_sets[year] & donor_sets[previous])
+            row.update(
+                growth_pct=_change_pct(s["total_amount"], merged[previous]["summary"]["total_amount"]),
+                new_donors=len(donor_sets[year] - donor_sets[previous]),
+                retained_donors=retained,
+                retention_pct=retained / len(donor_sets[previous]) * 100 if donor_sets[previous] else None,
+            )
+        summary.append(row)
+
+    monthly = []
+    for month_number in month_order:
+        amounts = {
+            year: next((m["total_amount"] for m in merged[year]["monthly"]
+                        if m["month_number"] == month_number), 0)
+            for year in years
+        }
+        monthly.append({
+            "month_number": month_number,
+            "month_name": calendar.month_name[month_number],
+            "amounts": amounts,
+            "growth_pct": _change_pct(amounts[years[-1]], amounts[years[-2]]) if len(years) > 1 else None,
+        })
+
+    def side_by_side(section, key):
+        table: Dict[Any, Dict[str, Any]] = {}
+        for year in years:
+            for item in merged[year][section]:
+                entry = table.setdefault(key(item), {**item, "amounts": {y: 0 for y in years}})
+                entry["amounts"][year] = item["total_amount"]
+        rows = []
+        for entry in table.values():
+            first, last = entry["amounts"][years[0]], entry["amounts"][years[-1]]
+            rows.append({
+                **{k: v for k, v in entry.items()
+                   if k not in ("total_amount", "donation_count", "unique_donors", "donation_type")},
+                "change": last - first,
+                "change_pct": _change_pct(last, first),
+            })
+        return sorted(rows, key=lambda r: r["amounts"][years[-1]], reverse=True)[:limit]
+
+    return {
+        "years": years,
+        "summary": summary,
+        "monthly": monthly,
+        "schools": side_by_side("schools", lambda sc: (sc["school_name"], sc["school_location"])),
+        "campaigns": side_by_side("campaigns", lambda c: c["campaign_name"]),
+    }
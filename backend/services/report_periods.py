@@ -0,0 +1,110 @@
+"""
+Report period arithmetic.
+
+Besides the calendar periods (weekly, monthly, yearly), reports can cover
+the Indian fiscal year the trustees report on. A fiscal year runs from April
+to March and is labelled by its start year: FY 2024 = 2024-25. Its quarters
+are Q1 Apr–Jun, Q2 Jul–Sep, Q3 Oct–Dec and Q4 Jan–Mar. Every period except
+weekly is a whole number of calendar months, so those reports are merged
+from the same cached month partials (services/report_partials.py). A new
+period type therefore reuses the months already aggregated for the others
+instead of scanning the raw rows again.
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+PERIOD_TYPES = ("weekly", "monthly", "quarterly", "yearly", "fiscal_yearly")
+
+# Chosen by year; the others always cover the last complete week / month / quarter
+YEAR_PERIODS = ("yearly", "fiscal_yearly")
+
+# Long enough for a month-by-month breakdown
+MULTI_MONTH_PERIODS = ("quarterly", "yearly", "fiscal_yearly")
+
+# Years a report may be asked for; parse_year_spec checks them before expanding a range
+MIN_YEAR, MAX_YEAR = 2000, 2100
+
+# Years a comparison report puts side by side
+MAX_COMPARISON_YEARS = 5
+
+
+def fiscal_year_of(day: datetime) -> int:
+    return day.year if day.month >= 4 else day.year - 1
+
+
+def fiscal_year_bounds(fiscal_year: int):
+    """FY 2024 = 2024-25: 1 April 2024 (inclusive) to 1 April 2025 (exclusive)"""
+    return datetime(fiscal_year, 4, 1), datetime(fiscal_year + 1, 4, 1)
+
+
+def fiscal_year_label(fiscal_year: int) -> str:
+    return f"{fiscal_year}-{(fiscal_year + 1) % 100:02d}"
+
+
+def fiscal_quarter(day: datetime) -> Tuple[int, int]:
+    """(quarter 1-4, fiscal year) a date falls in"""
+    return (day.month - 4) % 12 // 3 + 1, fiscal_year_of(day)
+
+
+def end_of_day(day: datetime) -> datetime:
+    return day.replace(hour=23, minute=59, second=59, microsecond=0)
+
+
+def add_months(first_of_month: datetime, months: int) -> datetime:
+    index = first_of_month.year * 12 + first_of_month.month - 1 + months
+    return first_of_month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _year_earlier(day: datetime) -> datetime:
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:      # 29 February
+        return day.replace(year=day.year - 1, day=28)
+
+
+def previous_period(period_type: str, start_date: datetime, end_date: datetime) -> Tuple[datetime, datetime]:
+    """
+    The period a report is compared with: the week / month / quarter before,
+    or the same span one year earlier for yearly and fiscal-yearly reports
+    (so a year to date is compared with the previous year to the same date).
+    """
+    if period_type == 'weekly':
+        return start_date - timedelta(days=7), start_date - timedelta(seconds=1)
+    if period_type in ('monthly', 'quarterly'):
+        months = 1 if period_type == 'monthly' else 3
+        return add_months(start_date, -months), start_date - timedelta(seconds=1)
+    if period_type in YEAR_PERIODS:
+        return _year_earlier(start_date), _year_earlier(end_date)
+    raise ValueError(f"Invalid period_type: {period_type}")
+
+
+def _spec_year(text: str) -> int:
+    year = int(text)
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise ValueError(f"Year {year} is outside {MIN_YEAR}-{MAX_YEAR}")
+    return year
+
+
+def parse_year_spec(spec: str, max_years: Optional[int] = None) -> List[int]:
+    """
+    '2019-2024', '2019,2021,2023' or a mix: '2015-2017,2020'. Every year must
+    lie in MIN_YEAR-MAX_YEAR and, with max_years, a range may not span more
+    years than that; both are checked before a range is expanded.
+    """
+    years = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = (_spec_year(y) for y in part.split("-", 1))
+            if first > last:
+                raise ValueError(f"Empty year range: {part}")
+            if max_years is not None and last - first + 1 > max_years:
+                raise ValueError(f"Year range {part} spans more than {max_years} years")
+            years.update(range(first, last + 1))
+        else:
+            years.add(_spec_year(part))
+        if max_years is not None and len(years) > max_years:
+            raise ValueError(f"More than {max_years} years: {spec}")
+    return sorted(years)
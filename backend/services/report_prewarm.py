@@ -0,0 +1,114 @@
+"""
+Report prewarming for the predictable periods.
+
+Weekly, monthly and quarterly reports cover fixed windows that roll over at
+midnight on Monday, on the 1st and at the start of a quarter; the current
+calendar- and fiscal-year reports roll over daily. Prewarming
+builds them through the report job queue shortly after each boundary (and
+after a burst of new donations has settled), so the first request of the
+day is a cache hit instead of a full query + render.
+
+Only one replica does the work: each run takes a Postgres advisory lock and
+replicas that do not get it skip the run. The scheduler adds jitter to the
+start times so replicas don't all hit the lock (and the DB) at once.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+import os
+import threading
+import time
+import zlib
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+
+from ml.db import get_engine
+from services.report_periods import fiscal_year_of
+
+logger = logging.getLogger(__name__)
+
+PREWARM_WAIT_SECONDS = float(os.getenv("PREWARM_WAIT_SECONDS", 900))
+# A burst counts as settled once no new donation has arrived for this long
+PREWARM_QUIET_SECONDS = float(os.getenv("PREWARM_QUIET_SECONDS", 300))
+
+
+@contextmanager
+def leader_lock(name: str):
+    """
+    Yields True if this process holds the named session-level advisory lock
+    for the duration of the block, False if another replica holds it.
+    """
+    key = zlib.crc32(name.encode())          # stable across processes (unlike hash())
+    conn = get_engine().connect()
+    try:
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+    finally:
+        conn.close()
+
+
+class ReportPrewarmer:
+    """Builds the predictable reports through submit(period_type, year=, priority=)"""
+
+    def __init__(self, submit: Callable, lock_name: str = "report_prewarm"):
+        self._submit = submit
+        self.lock_name = lock_name
+        self.last_run: Optional[datetime] = None
+        self.last_result: dict = {}
+        self._seen_max_created = None      # newest donations_raw.created_at seen
+        self._changed_at = None            # monotonic time new data was first noticed
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def targets() -> List[tuple]:
+        # Longest first: queued in order, the shorter periods mostly merge month partials already cached
+        return [("yearly", datetime.now().year), ("fiscal_yearly", fiscal_year_of(datetime.now())),
+                ("quarterly", None), ("monthly", None), ("weekly", None)]
+
+    def run(self, reason: str = "schedule") -> dict:
+        """Build every target unless another replica is already doing it"""
+        if not self._lock.acquire(blocking=False):
+            return {"skipped": "already running"}
+        try:
+            with leader_lock(self.lock_name) as leader:
+                if not leader:
+                    logger.info("Report prewarm skipped — another replica holds the lock")
+                    return {"skipped": "not leader"}
+                started = time.monotonic()
+                jobs = [(period, self._submit(period, year=year, priority=0))
+                        for period, year in self.targets()]
+                result = {}
+                # Hold the lock until the builds finish so no replica repeats them
+                for period, job in jobs:
+                    job.wait(PREWARM_WAIT_SECONDS)
+                    result[period] = job.status
+                self.last_run, self.last_result = datetime.now(), result
+                logger.info(f"Report prewarm ({reason}) finished in "
+                            f"{time.monotonic() - started:.1f}s: {result}")
+                return result
+        finally:
+            self._lock.release()
+
+    def check_for_changes(self) -> Optional[dict]:
+        """
+        Prewarm once a burst of new donations has settled: new rows were seen
+        and none have arrived for PREWARM_QUIET_SECONDS. One index lookup.
+        """
+        with get_engine().connect() as conn:
+            newest = conn.execute(text("SELECT MAX(created_at) FROM donations_raw")).scalar()
+        if self._seen_max_created is None:
+            self._seen_max_created = newest        # first check only sets the baseline
+            return None
+        if newest != self._seen_max_created:
+            self._seen_max_created = newest
+            self._changed_at = time.monotonic()
+            return None
+        if self._changed_at is not None and time.monotonic() - self._changed_at >= PREWARM_QUIET_SECONDS:
+            self._changed_at = None
+            return self.run(reason="data change")
+        return None
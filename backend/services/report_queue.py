@@ -0,0 +1,340 @@
+"""
+Postgres-backed report job queue.
+
+The API enqueues rows into report_jobs; any number of report workers
+(scripts/report_worker.py, on any machine) claim them with
+FOR UPDATE SKIP LOCKED, so two workers never pick the same job and nobody
+blocks on a row another worker holds. A claimed job carries a lease that the
+worker extends with heartbeats; when a worker dies its lease runs out and the
+job goes back to the queue until max_attempts is reached. Failed attempts are
+retried with exponential backoff. A partial unique index on report_id keeps
+one queued/running job per report, so identical submissions attach to it.
+A forced submission upgrades the job it attaches to. If that job is already
+running without force, it goes back to the queue once it finishes and is
+rebuilt with force.
+"""
+from dataclasses import dataclass, field
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from sqlalchemy import text
+
+from ml.db import get_engine
+from services.report_jobs import ReportJob, COMPLETED, FAILED
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = int(os.getenv("REPORT_LEASE_SECONDS", 120))
+MAX_ATTEMPTS = int(os.getenv("REPORT_MAX_ATTEMPTS", 3))
+RETRY_BASE_SECONDS = 30
+RETENTION_DAYS = 7
+
+# The only definition of report_jobs (schema.sql points here)
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS report_jobs (
+        job_id            UUID PRIMARY KEY,
+        report_id         VARCHAR(32) NOT NULL,
+        period_type       VARCHAR(20) NOT NULL,
+        year              INTEGER,
+        force_regenerate  BOOLEAN NOT NULL DEFAULT FALSE,
+        priority          SMALLINT NOT NULL DEFAULT 0,
+        status            VARCHAR(12) NOT NULL DEFAULT 'queued',
+        attempts          SMALLINT NOT NULL DEFAULT 0,
+        max_attempts      SMALLINT NOT NULL DEFAULT 3,
+        progress          SMALLINT NOT NULL DEFAULT 0,
+        stage             VARCHAR(32) NOT NULL DEFAULT 'queued',
+        result            TEXT,
+        error             TEXT,
+        worker_id         TEXT,
+        waiters           INTEGER NOT NULL DEFAULT 1,
+        run_after         TIMESTAMP NOT NULL DEFAULT NOW(),
+        lease_expires_at  TIMESTAMP,
+        heartbeat_at      TIMESTAMP,
+        created_at        TIMESTAMP NOT NULL DEFAULT NOW(),
+        started_at        TIMESTAMP,
+        finished_at       TIMESTAMP
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_report_jobs_inflight
+        ON report_jobs (report_id) WHERE status IN ('queued', 'running');
+    CREATE INDEX IF NOT EXISTS idx_report_jobs_ready
+        ON report_jobs (priority DESC, run_after, created_at) WHERE status = 'queued';
+    CREATE INDEX IF NOT EXISTS idx_report_jobs_lease
+        ON report_jobs (lease_expires_at) WHERE status = 'running'
+"""
+
+ENQUEUE_SQL = """
+    INSERT INTO report_jobs (job_id, report_id, period_type, year, force_regenerate,
+                             priority, max_attempts)
+    VALUES (:job_id, :report_id, :period_type, :year, :force_regenerate,
+            :priority, :max_attempts)
+    ON CONFLICT (report_id) WHERE status IN ('queued', 'running')
+    DO UPDATE SET
+        waiters          = report_jobs.waiters + 1,
+        priority         = GREATEST(report_jobs.priority, EXCLUDED.priority),
+        force_regenerate = report_jobs.force_regenerate OR EXCLUDED.force_regenerate
+    RETURNING *, (xmax <> 0) AS attached
+"""
+
+CLAIM_SQL = """
+    WITH next AS (
+        SELECT job_id
+        FROM report_jobs
+        WHERE status = 'queued' AND run_after <= NOW()
+        ORDER BY priority DESC, run_after, created_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    UPDATE report_jobs j SET
+        status           = 'running',
+        worker_id        = :worker_id,
+        attempts         = j.attempts + 1,
+        stage            = 'claimed',
+        started_at       = NOW(),
+        heartbeat_at     = NOW(),
+        lease_expires_at = NOW() + make_interval(secs => :lease)
+    FROM next
+    WHERE j.job_id = next.job_id
+    RETURNING j.*
+"""
+
+HEARTBEAT_SQL = """
+    UPDATE report_jobs SET
+        heartbeat_at     = NOW(),
+        lease_expires_at = NOW() + make_interval(secs => :lease),
+        progress         = COALESCE(:progress, progress),
+        stage            = COALESCE(:stage, stage)
+    WHERE job_id = :job_id AND worker_id = :worker_id AND status = 'running'
+"""
+
+COMPLETE_SQL = """
+    UPDATE report_jobs SET
+        status = 'completed', progress = 100, stage = 'done', result = :result,
+        error = NULL, lease_expires_at = NULL, finished_at = NOW()
+    WHERE job_id = :job_id AND worker_id = :worker_id AND status = 'running'
+"""
+
+# A force requested after an unforced claim: run again (attempt not counted) instead of completing
+REQUEUE_FORCED_SQL = """
+    UPDATE report_jobs SET
+        status = 'queued', stage = 'queued', progress = 0, attempts = attempts - 1,
+        run_after = NOW(), worker_id = NULL, lease_expires_at = NULL
+    WHERE job_id = :job_id AND worker_id = :worker_id AND status = 'running'
+      AND force_regenerate AND NOT :forced
+"""
+
+# Retry with exponential backoff until the attempts are used up
+FAIL_SQL = """
+    UPDATE report_jobs SET
+        status           = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+        stage            = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'retry_wait' END,
+        finished_at      = CASE WHEN attempts >= max_attempts THEN NOW() END,
+        run_after        = NOW() + make_interval(secs => :base * POWER(2, attempts - 1)),
+        error            = :error,
+        worker_id        = NULL,
+        lease_expires_at = NULL
+    WHERE job_id = :job_id AND worker_id = :worker_id AND status = 'running'
+"""
+
+# Jobs whose worker stopped heartbeating go back to the queue
+REAP_SQL = """
+    UPDATE report_jobs SET
+        status           = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+        stage            = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+        finished_at      = CASE WHEN attempts >= max_attempts THEN NOW() END,
+        error            = 'lease expired (worker ' || COALESCE(worker_id, '?') || ' stopped heartbeating)',
+        run_after        = NOW(),
+        worker_id        = NULL,
+        lease_expires_at = NULL
+    WHERE job_id IN (
+        SELECT job_id FROM report_jobs
+        WHERE status = 'running' AND lease_expires_at < NOW()
+        FOR UPDATE SKIP LOCKED
+    )
+"""
+
+
+@dataclass
+class QueuedReportJob(ReportJob):
+    """A report_jobs row; wait() polls the table instead of an in-process event"""
+    priority: int = 0
+    attempts: int = 0
+    max_attempts: int = MAX_ATTEMPTS
+    worker_id: Optional[str] = None
+    _queue: Optional["PostgresReportQueue"] = field(default=None, repr=False)
+
+    @classmethod
+    def from_row(cls, row, queue=None) -> "QueuedReportJob":
+        return cls(
+            job_id=str(row["job_id"]),
+            report_id=row["report_id"],
+            period_type=row["period_type"],
+            year=row["year"],
+            force_regenerate=row["force_regenerate"],
+            status=row["status"],
+            progress=row["progress"],
+            stage=row["stage"],
+            result=row["result"],
+            error=row["error"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            waiters=row["waiters"],
+            priority=row["priority"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            worker_id=row["worker_id"],
+            _queue=queue,
+        )
+
+    def wait(self, timeout: float = None, poll_interval: float = 1.0) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.finished:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+            latest = self._queue.get(self.job_id)
+            if latest is not None:
+                self.__dict__.update({k: v for k, v in latest.__dict__.items() if k != "_queue"})
+        return True
+
+    def to_dict(self) -> dict:
+        data = super().to_dict()
+        data.update({
+            "priority": self.priority,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "worker_id": self.worker_id,
+        })
+        return data
+
+
+class PostgresReportQueue:
+    """
+    Same submit/get/shutdown surface as ReportJobManager, but only enqueues —
+    rendering happens in report worker processes.
+    """
+
+    def __init__(self, agent_factory: Callable, lease_seconds: int = LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self._agent_factory = agent_factory
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._schema_ready = False
+        self._lock = threading.Lock()
+
+    def ensure_schema(self):
+        if self._schema_ready:
+            return
+        with self._lock:
+            if self._schema_ready:
+                return
+            with get_engine().begin() as conn:
+                for statement in SCHEMA_SQL.split(";"):
+                    if statement.strip():
+                        conn.execute(text(statement))
+            self._schema_ready = True
+
+    # ==================== PRODUCER ====================
+    def submit(self, period_type: str, year: int = None,
+               force_regenerate: bool = False, priority: int = 0) -> QueuedReportJob:
+        """Enqueue a build, or attach to the identical queued/running one"""
+        self.ensure_schema()
+        report_id, resolved_year = self._agent_factory().resolve_report_id(period_type, year)
+        with get_engine().begin() as conn:
+            row = conn.execute(text(ENQUEUE_SQL), {
+                "job_id": uuid.uuid4().hex,
+                "report_id": report_id,
+                "period_type": period_type,
+                "year": resolved_year,
+                "force_regenerate": force_regenerate,
+                "priority": priority,
+                "max_attempts": self.max_attempts,
+            }).mappings().one()
+        job = QueuedReportJob.from_row(row, self)
+        if row["attached"]:
+            logger.info(f"Attached to queued report job {job.job_id} ({report_id})")
+        else:
+            logger.info(f"Enqueued report job {job.job_id} for {period_type} {resolved_year or ''}")
+        return job
+
+    def get(self, job_id: str) -> Optional[QueuedReportJob]:
+        self.ensure_schema()
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+        with get_engine().connect() as conn:
+            row = conn.execute(
+                text("SELECT * FROM report_jobs WHERE job_id = :job_id"), {"job_id": job_id}
+            ).mappings().first()
+        return QueuedReportJob.from_row(row, self) if row else None
+
+    def shutdown(self):
+        pass
+
+    # ==================== CONSUMER ====================
+    def claim(self, worker_id: str) -> Optional[QueuedReportJob]:
+        """Take the highest-priority ready job, skipping rows other workers hold"""
+        self.ensure_schema()
+        with get_engine().begin() as conn:
+            row = conn.execute(text(CLAIM_SQL), {
+                "worker_id": worker_id, "lease": self.lease_seconds
+            }).mappings().first()
+        return QueuedReportJob.from_row(row, self) if row else None
+
+    def heartbeat(self, job_id: str, worker_id: str, progress: int = None,
+                  stage: str = None) -> bool:
+        """Extend the lease. False means the lease was lost and the job must be abandoned."""
+        with get_engine().begin() as conn:
+            return conn.execute(text(HEARTBEAT_SQL), {
+                "job_id": job_id, "worker_id": worker_id, "lease": self.lease_seconds,
+                "progress": progress, "stage": stage,
+            }).rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: str, forced: bool = False) -> bool:
+        """forced: whether the build ran with force_regenerate (as claimed)"""
+        with get_engine().begin() as conn:
+            if conn.execute(text(REQUEUE_FORCED_SQL), {
+                "job_id": job_id, "worker_id": worker_id, "forced": forced
+            }).rowcount == 1:
+                logger.info(f"Job {job_id} re-queued: a forced rebuild was requested while it ran")
+                return True
+            return conn.execute(text(COMPLETE_SQL), {
+                "job_id": job_id, "worker_id": worker_id, "result": result
+            }).rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        with get_engine().begin() as conn:
+            return conn.execute(text(FAIL_SQL), {
+                "job_id": job_id, "worker_id": worker_id, "error": error[:2000],
+                "base": RETRY_BASE_SECONDS,
+            }).rowcount == 1
+
+    def reap_expired(self) -> int:
+        """Requeue (or fail) running jobs whose lease ran out. Returns jobs touched."""
+        self.ensure_schema()
+        with get_engine().begin() as conn:
+            reaped = conn.execute(text(REAP_SQL)).rowcount
+        if reaped:
+            logger.warning(f"Reclaimed {reaped} report job(s) with expired leases")
+        return reaped
+
+    def prune(self, retention_days: int = RETENTION_DAYS) -> int:
+        with get_engine().begin() as conn:
+            return conn.execute(text("""
+                DELETE FROM report_jobs
+                WHERE status IN (:completed, :failed)
+                  AND finished_at < NOW() - make_interval(days => :days)
+            """), {"completed": COMPLETED, "failed": FAILED, "days": retention_days}).rowcount
+
+    def stats(self) -> dict:
+        self.ensure_schema()
+        with get_engine().connect() as conn:
+            rows = conn.execute(text(
+                "SELECT status, COUNT(*) FROM report_jobs GROUP BY status"
+            )).fetchall()
+        return {status: count for status, count in rows}
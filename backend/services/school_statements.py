@@ -0,0 +1,104 @@
+"""
+Per-school donation statements, delivered as one streamed ZIP.
+
+All schools' data comes from a single partitioned aggregation
+(FinalDonationReportAgent.build_school_datasets). Rendering is fanned out
+across a process pool, with one agent per worker process because reportlab
+is CPU-bound. The ZIP is streamed as statements finish (services/zip_stream),
+so the download starts with the first rendered PDF.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from services.zip_stream import stream_zip
+
+logger = logging.getLogger(__name__)
+
+_agent = None   # one per worker process
+
+
+def _init_worker():
+    global _agent
+    from agent import FinalDonationReportAgent
+    _agent = FinalDonationReportAgent()
+
+
+def _render(school: dict, period_type: str, start_date: datetime, end_date: datetime):
+    return school["school_name"], _agent.render_school_statement(school, period_type, start_date, end_date)
+
+
+def statement_filename(school_name: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", school_name).strip("_")[:80] or "school"
+    return f"statement_{slug}.pdf"
+
+
+class SchoolStatementService:
+    def __init__(self, processes: int = None):
+        self.processes = processes or int(os.getenv("SCHOOL_STATEMENT_PROCESSES", min(4, os.cpu_count() or 1)))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        # Started on first use: worker start-up imports reportlab and builds an agent
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.processes, initializer=_init_worker,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._pool
+
+    def stream_zip(self, schools: List[dict], period_type: str,
+                   start_date: datetime, end_date: datetime) -> Iterator[bytes]:
+        """Render every school's statement in the pool and yield the ZIP as it grows"""
+        started = time.monotonic()
+        futures = [self.pool.submit(_render, school, period_type, start_date, end_date)
+                   for school in schools]
+
+        def entries():
+            rendered, failed = 0, []
+            for future in as_completed(futures):
+                try:
+                    school_name, pdf = future.result()
+                except Exception as e:
+                    logger.error(f"School statement failed: {e}")
+                    failed.append(str(e))
+                    continue
+                rendered += 1
+                yield statement_filename(school_name), pdf
+            if failed:
+                yield "ERRORS.txt", "\n".join(failed).encode()
+            logger.info(f"School statements: {rendered} PDFs, {len(failed)} failed, "
+                        f"{time.monotonic() - started:.1f}s")
+
+        try:
+            yield from stream_zip(entries())
+        finally:
+            # Client went away (or we are done): drop whatever has not started
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_statement_service() -> SchoolStatementService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SchoolStatementService()
+        return _service
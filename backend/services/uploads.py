@@ -0,0 +1,213 @@
+"""
+Shared S3 upload service for report PDFs and admin media.
+
+- One long-lived boto3 client per process (clients are thread-safe).
+- Large files go up as multipart uploads with configurable part size and
+  concurrency (boto3 TransferConfig).
+- Objects are keyed by the SHA-256 of their content, so identical files are
+  stored once: an upload whose key already exists is skipped.
+- submit() runs the upload on a small background pool and returns a Future,
+  so a request can respond before S3 has the object.
+
+S3_ENDPOINT_URL points the service at an S3-compatible stand-in (MinIO,
+localstack) for local testing.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+import hashlib
+import io
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+from services.circuit_breaker import get_breaker
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+@dataclass
+class UploadResult:
+    key: str
+    sha256: str
+    size: int
+    skipped: bool      # True when identical content was already stored
+
+
+def sha256_of_file(path: str, chunk_size: int = MB) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadService:
+    def __init__(self, bucket: str, region: str = None, endpoint_url: str = None,
+                 multipart_threshold: int = 8 * MB, multipart_chunksize: int = 8 * MB,
+                 max_concurrency: int = 4, background_workers: int = 2):
+        self.bucket = bucket
+        self.region = region
+        self.endpoint_url = endpoint_url
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+        self.max_concurrency = max_concurrency
+        self.breaker = get_breaker("s3")
+
+        self._client = None
+        self._transfer_config = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=background_workers,
+                                            thread_name_prefix="s3-upload")
+
+    # ==================== CLIENT ====================
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import boto3
+                    from boto3.s3.transfer import TransferConfig
+                    from botocore.config import Config
+                    # Default credential chain (IAM role / AWS_* env / config)
+                    self._client = boto3.client(
+                        "s3",
+                        region_name=self.region,
+                        endpoint_url=self.endpoint_url,
+                        config=Config(
+                            connect_timeout=float(os.getenv("S3_CONNECT_TIMEOUT", 2)),
+                            read_timeout=float(os.getenv("S3_READ_TIMEOUT", 10)),
+                            retries={"max_attempts": 3, "mode": "standard"},
+                            # Room for every multipart thread plus the background pool
+                            max_pool_connections=max(10, self.max_concurrency * 4),
+                        )
+                    )
+                    self._transfer_config = TransferConfig(
+                        multipart_threshold=self.multipart_threshold,
+                        multipart_chunksize=self.multipart_chunksize,
+                        max_concurrency=self.max_concurrency,
+                        use_threads=True,
+                    )
+        return self._client
+
+    # ==================== KEYS / URLS ====================
+    @staticmethod
+    def content_key(prefix: str, sha256: str, suffix: str = "") -> str:
+        return f"{prefix.strip('/')}/{sha256[:2]}/{sha256}{suffix.lower()}"
+
+    def public_url(self, key: str) -> str:
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        for base in (f"{(self.endpoint_url or '').rstrip('/')}/{self.bucket}/",
+                     f"https://{self.bucket}.s3.{self.region}.amazonaws.com/"):
+            if base.strip("/") and url.startswith(base):
+                return url[len(base):].split("?", 1)[0]
+        # Legacy URLs of any region
+        if ".amazonaws.com/" in url:
+            return url.split(".amazonaws.com/", 1)[-1].split("?", 1)[0]
+        return None
+
+    def presigned_url(self, key: str, expires_in: int = 604800, filename: str = None) -> str:
+        params = {"Bucket": self.bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+    # ==================== UPLOADS ====================
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.breaker.call(self.client.head_object, Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def upload_file(self, path: str, prefix: str, content_type: str = None,
+                    sha256: str = None) -> UploadResult:
+        """Upload a file under its content hash; skipped if that object already exists"""
+        sha256 = sha256 or sha256_of_file(path)
+        key = self.content_key(prefix, sha256, Path(path).suffix)
+        size = os.path.getsize(path)
+        if self.exists(key):
+            logger.info(f"S3 upload skipped, identical object exists: {key}")
+            return UploadResult(key, sha256, size, skipped=True)
+        self.breaker.call(
+            self.client.upload_file, path, self.bucket, key,
+            ExtraArgs=self._extra_args(content_type, sha256), Config=self._transfer_config
+        )
+        logger.info(f"Uploaded to S3: {key} ({size:,} bytes)")
+        return UploadResult(key, sha256, size, skipped=False)
+
+    def upload_bytes(self, data: bytes, prefix: str, suffix: str = "",
+                     content_type: str = None) -> UploadResult:
+        sha256 = hashlib.sha256(data).hexdigest()
+        key = self.content_key(prefix, sha256, suffix)
+        if self.exists(key):
+            logger.info(f"S3 upload skipped, identical object exists: {key}")
+            return UploadResult(key, sha256, len(data), skipped=True)
+        self.breaker.call(
+            self.client.upload_fileobj, io.BytesIO(data), self.bucket, key,
+            ExtraArgs=self._extra_args(content_type, sha256), Config=self._transfer_config
+        )
+        logger.info(f"Uploaded to S3: {key} ({len(data):,} bytes)")
+        return UploadResult(key, sha256, len(data), skipped=False)
+
+    def submit(self, func: Callable, *args, on_done: Callable = None, **kwargs) -> Future:
+        """Run upload_file / upload_bytes in the background; on_done(result) runs on success"""
+        def run():
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"Background S3 upload failed: {e}")
+                raise
+            if on_done:
+                try:
+                    on_done(result)
+                except Exception as e:
+                    logger.error(f"Upload completion callback failed: {e}")
+            return result
+        return self._executor.submit(run)
+
+    def delete(self, key: str):
+        self.breaker.call(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    @staticmethod
+    def _extra_args(content_type: Optional[str], sha256: str) -> dict:
+        extra = {"ServerSideEncryption": "AES256", "Metadata": {"sha256": sha256}}
+        if content_type:
+            extra["ContentType"] = content_type
+        return extra
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_upload_service() -> Optional[UploadService]:
+    """Process-wide service, or None when S3 is not configured (USE_S3 / S3_BUCKET_NAME)"""
+    global _service
+    if os.getenv("USE_S3", "false").lower() != "true" or not os.getenv("S3_BUCKET_NAME"):
+        return None
+    with _service_lock:
+        if _service is None:
+            _service = UploadService(
+                bucket=os.getenv("S3_BUCKET_NAME"),
+                region=os.getenv("AWS_REGION", "ap-southeast-2"),
+                endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+                multipart_threshold=int(os.getenv("S3_MULTIPART_THRESHOLD_MB", 8)) * MB,
+                multipart_chunksize=int(os.getenv("S3_MULTIPART_CHUNK_MB", 8)) * MB,
+                max_concurrency=int(os.getenv("S3_MAX_CONCURRENCY", 4)),
+                background_workers=int(os.getenv("S3_UPLOAD_WORKERS", 2)),
+            )
+        return _service
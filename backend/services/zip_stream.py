@@ -0,0 +1,53 @@
+"""
+Streamed ZIP archives.
+
+stream_zip() writes entries into a ZIP as they arrive and yields the bytes
+written so far after each one, so a StreamingResponse can start sending
+before the last entry exists and memory holds at most one entry. Entries
+are stored, not deflated: the payloads here are PDFs, which are already
+compressed.
+"""
+from datetime import datetime
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+
+
+class ChunkSink:
+    """
+    Write-only file object whose bytes are taken out with drain(). Unseekable,
+    so ZipFile writes entries with data descriptors; also the sink of the
+    streamed Parquet exports (services/report_exports.py).
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False     # checked by pyarrow
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def stream_zip(entries: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """(name, data) pairs in, ZIP bytes out; duplicate names get a numeric suffix"""
+    sink = ChunkSink()
+    used = set()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for name, data in entries:
+            if name in used:
+                stem, dot, ext = name.rpartition(".")
+                name = f"{stem}_{len(used)}.{ext}" if dot else f"{name}_{len(used)}"
+            used.add(name)
+            archive.writestr(zipfile.ZipInfo(name, datetime.now().timetuple()[:6]), data)
+            yield sink.drain()
+    yield sink.drain()     # central directory
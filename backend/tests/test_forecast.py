@@ -0,0 +1,52 @@
+"""
+The batched Holt-Winters path fits every series in one pass and returns one
+forecast per series, the same as fitting each series on its own.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from ml import forecast
+
+
+def _seasonal_matrix(names, periods, season_length):
+    t = np.arange(periods)
+    rows = [
+        1000 * (i + 1) + 10 * t + 300 * np.sin(2 * np.pi * t / season_length)
+        for i in range(len(names))
+    ]
+    return pd.DataFrame(rows, index=names, columns=pd.date_range("2021-01-01", periods=periods, freq="MS"))
+
+
+def test_batched_fit_matches_per_series_fits():
+    Y = _seasonal_matrix(["a", "b", "c"], 36, 12).values
+    batched = forecast.holt_winters_fit(Y, horizon=3)
+    assert batched["forecast"].shape == (3, 3)
+    for i in range(3):
+        single = forecast.holt_winters_fit(Y[i], horizon=3)
+        np.testing.assert_allclose(batched["forecast"][i], single["forecast"][0])
+
+
+def test_seasonal_forecast_by_returns_one_forecast_per_series(monkeypatch):
+    names = ["School A", "School B", "School C", "School D"]
+    calls = []
+
+    def load_series_by(column, freq):
+        calls.append((column, freq))
+        return _seasonal_matrix(names, 110, 52)
+
+    monkeypatch.setattr(forecast, "load_series_by", load_series_by)
+    result = forecast.seasonal_forecast_by("school_name", freq="weekly", horizon=2)
+
+    assert calls == [("school_name", "weekly")]
+    assert sorted(result) == names
+    assert all(len(values) == 2 for values in result.values())
+
+
+def test_seasonal_forecast_by_needs_two_seasons(monkeypatch):
+    monkeypatch.setattr(forecast, "load_series_by", lambda column, freq: _seasonal_matrix(["a"], 23, 12))
+    assert forecast.seasonal_forecast_by("campaign_name") == {}
@@ -0,0 +1,69 @@
+"""
+A force_regenerate submission must never be served by a build that skipped
+the cache check it asked to bypass.
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from services.report_jobs import RUNNING, ReportJobManager
+
+
+class FakeAgent:
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.builds = []
+
+    def resolve_report_id(self, period_type, year):
+        return f"{period_type}-{year}", year
+
+    def generate_report(self, period_type, year=None, force_regenerate=False, progress=None):
+        self.builds.append((period_type, force_regenerate))
+        self.started.set()
+        assert self.release.wait(5)
+        return f"{period_type}-{'forced' if force_regenerate else 'cached'}.pdf"
+
+
+@pytest.fixture
+def manager():
+    agent = FakeAgent()
+    jobs = ReportJobManager(lambda: agent, max_workers=1)
+    yield jobs, agent
+    agent.release.set()
+    jobs.shutdown()
+
+
+def test_forced_submission_upgrades_queued_job(manager):
+    jobs, agent = manager
+    blocker = jobs.submit("weekly")               # holds the only worker
+    agent.started.wait(5)
+
+    queued = jobs.submit("monthly")
+    forced = jobs.submit("monthly", force_regenerate=True)
+    assert forced is queued
+    assert queued.waiters == 2
+
+    agent.release.set()
+    assert queued.wait(5) and blocker.wait(5)
+    assert queued.result == "monthly-forced.pdf"
+
+
+def test_forced_submission_does_not_attach_to_running_job(manager):
+    jobs, agent = manager
+    running = jobs.submit("monthly")
+    agent.started.wait(5)
+    assert running.status == RUNNING
+
+    forced = jobs.submit("monthly", force_regenerate=True)
+    assert forced is not running
+    assert jobs.submit("monthly") is forced       # later submissions attach to the forced build
+
+    agent.release.set()
+    assert running.wait(5) and forced.wait(5)
+    assert running.result == "monthly-cached.pdf"
+    assert forced.result == "monthly-forced.pdf"
@@ -0,0 +1,37 @@
+"""
+parse_year_spec must reject oversized or out-of-window year specs before
+expanding them, since the comparison endpoint parses untrusted query strings.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from services.report_periods import MAX_COMPARISON_YEARS, parse_year_spec
+
+
+def test_parses_ranges_and_lists():
+    assert parse_year_spec("2015-2017, 2020,2016") == [2015, 2016, 2017, 2020]
+
+
+@pytest.mark.parametrize("spec", ["1-999999999", "1999", "2024-2101", "2024-999999999999"])
+def test_rejects_years_outside_window(spec):
+    with pytest.raises(ValueError, match="outside"):
+        parse_year_spec(spec)
+
+
+def test_rejects_ranges_wider_than_max_years():
+    with pytest.raises(ValueError, match="spans more than"):
+        parse_year_spec("2000-2100", max_years=MAX_COMPARISON_YEARS)
+
+
+def test_rejects_too_many_listed_years():
+    with pytest.raises(ValueError, match="More than"):
+        parse_year_spec("2019,2020,2021-2023,2024", max_years=MAX_COMPARISON_YEARS)
+
+
+def test_rejects_empty_range():
+    with pytest.raises(ValueError, match="Empty"):
+        parse_year_spec("2024-2020")
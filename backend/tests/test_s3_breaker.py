@@ -0,0 +1,79 @@
+"""
+The S3 breaker must recover through the agent's s3_client property:
+open -> half-open probe (head_bucket) -> closed.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import agent as report_agent
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeS3:
+    def __init__(self):
+        self.healthy = False
+        self.head_calls = 0
+
+    def head_bucket(self, Bucket):
+        self.head_calls += 1
+        if not self.healthy:
+            raise ConnectionError("S3 unreachable")
+
+
+class FakeUploadService:
+    def __init__(self, client):
+        self.client = client
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("USE_REDIS", "false")
+    monkeypatch.setenv("USE_S3", "true")
+    monkeypatch.setenv("S3_BUCKET_NAME", "reports")
+    monkeypatch.delenv("ARTIFACT_BACKEND", raising=False)
+    s3 = FakeS3()
+    monkeypatch.setattr(report_agent, "get_upload_service", lambda: FakeUploadService(s3))
+    instance = report_agent.FinalDonationReportAgent()
+    instance.s3_breaker = CircuitBreaker("s3", failure_threshold=1, reset_timeout=0.05)
+    return instance, s3
+
+
+def test_s3_client_recovers_after_breaker_opens(agent):
+    instance, s3 = agent
+
+    # First use fails: the breaker opens and S3 is disabled
+    assert instance.s3_client is None
+    assert instance.s3_breaker.state == OPEN
+
+    # While open, no probe reaches S3
+    assert instance.s3_client is None
+    assert s3.head_calls == 1
+
+    # After the reset timeout, the property's probe runs head_bucket and closes the breaker
+    s3.healthy = True
+    time.sleep(0.06)
+    assert instance.s3_breaker.state == HALF_OPEN
+    assert instance.s3_client is s3
+    assert s3.head_calls == 2
+    assert instance.s3_breaker.state == CLOSED
+
+
+def test_failed_probe_reopens_breaker(agent):
+    instance, s3 = agent
+
+    assert instance.s3_client is None
+    time.sleep(0.06)
+    assert instance.s3_client is None       # probe ran and failed
+    assert s3.head_calls == 2
+    assert instance.s3_breaker.state == OPEN
+
+    s3.healthy = True
+    time.sleep(0.06)
+    assert instance.s3_client is s3
+    assert instance.s3_breaker.state == CLOSED
@@ -170,7 +170,7 @@ function ReportDownloadModal({ isOpen, onClose, onDownload, selectedYear, setSel
           <div>
             <h4 className="font-medium text-gray-900 mb-3">Select Report Type</h4>
             <div className="grid grid-cols-3 gap-3">
-              {['weekly', 'monthly', 'yearly'].map((type) => (
+              {['weekly', 'monthly', 'quarterly', 'yearly', 'fiscal_yearly'].map((type) => (
                 <button
                   key={type}
                   onClick={() => onDownload(type)}
@@ -179,19 +179,21 @@ function ReportDownloadModal({ isOpen, onClose, onDownload, selectedYear, setSel
                   {type === 'weekly' && (
                     <FileBarChart className="w-8 h-8 text-gray-600 group-hover:text-[#1a4d2e] mb-2" />
                   )}
-                  {type === 'monthly' && (
+                  {(type === 'monthly' || type === 'quarterly') && (
                     <FilePieChart className="w-8 h-8 text-gray-600 group-hover:text-[#1a4d2e] mb-2" />
                   )}
-                  {type === 'yearly' && (
+                  {(type === 'yearly' || type === 'fiscal_yearly') && (
                     <FileText className="w-8 h-8 text-gray-600 group-hover:text-[#1a4d2e] mb-2" />
                   )}
                   <span className="font-medium text-gray-800 group-hover:text-[#1a4d2e] capitalize">
-                    {type}
+                    {type === 'fiscal_yearly' ? 'Fiscal year' : type}
                   </span>
                   <span className="text-xs text-gray-500 mt-1">
                     {type === 'weekly' && 'Last 7 days'}
                     {type === 'monthly' && 'Last 30 days'}
+                    {type === 'quarterly' && 'Last full quarter'}
                     {type === 'yearly' && 'Annual report'}
+                    {type === 'fiscal_yearly' && 'April to March'}
                   </span>
                 </button>
               ))}
@@ -200,7 +202,7 @@ function ReportDownloadModal({ isOpen, onClose, onDownload, selectedYear, setSel
 
           {/* Year selection for yearly report */}
           <div>
-            <h4 className="font-medium text-gray-900 mb-3">Year Selection (For Yearly Report)</h4>
+            <h4 className="font-medium text-gray-900 mb-3">Year Selection (For Yearly and Fiscal-Year Reports)</h4>
             <div className="grid grid-cols-5 gap-2">
               {years.map((year) => (
                 <button
@@ -766,6 +768,8 @@ export default function Dashboard() {
       let endpoint;
       if (reportType === 'weekly') endpoint = 'http://localhost:8000/reports/weekly';
       else if (reportType === 'monthly') endpoint = 'http://localhost:8000/reports/monthly';
+      else if (reportType === 'quarterly') endpoint = 'http://localhost:8000/reports/quarterly';
+      else if (reportType === 'fiscal_yearly') endpoint = `http://localhost:8000/reports/fiscal_yearly/${selectedYear}`;
       else endpoint = `http://localhost:8000/reports/yearly/${selectedYear}`;
 
       setDownloadProgress(30);
@@ -835,7 +839,9 @@ export default function Dashboard() {
     const labels = {
       weekly: 'Last 7 Days',
       monthly: 'Last 30 Days',
+      quarterly: 'This Quarter',
       yearly: 'Last 12 Months',
+      fiscal_yearly: 'This Fiscal Year',
       all: 'All Time',
     };
     return labels[periodType] || 'Monthly';
@@ -892,7 +898,7 @@ export default function Dashboard() {
               <span className="font-medium text-gray-800">View Data For:</span>
             </div>
             <div className="flex flex-wrap gap-2">
-              {['weekly', 'monthly', 'yearly', 'all'].map((p) => (
+              {['weekly', 'monthly', 'quarterly', 'yearly', 'fiscal_yearly', 'all'].map((p) => (
                 <button
                   key={p}
                   onClick={() => setPeriod(p)}
@@ -25,3 +25,21 @@ CREATE TABLE donations_raw (
 
     created_at        TIMESTAMP DEFAULT NOW()
 );
+
+
+-- Daily churn / lapse scores: donor_churn_scores is defined and created by
+-- backend/ml/churn.py (SCHEMA_SQL, run before every scoring job).
+
+
+-- Per-donor RFM / lifetime-value summary: donor_summary, donor_summary_state
+-- and the donations_raw indexes its incremental refresh needs are defined and
+-- created by backend/ml/donor_summary.py (SCHEMA_SQL, run before first use).
+
+
+-- Report job queue (REPORT_QUEUE=postgres): report_jobs is defined and created
+-- by backend/services/report_queue.py (SCHEMA_SQL, run before first use).
+
+
+-- 80G receipts: receipt_batches, receipt_counters, donation_receipts and
+-- receipt_batch_items are defined and created by backend/services/receipts.py (SCHEMA_SQL, run before
+-- first use).